@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""窗口枚举性能对比: wmctrl + xprop 子进程 vs 原生 X11 后端
+
+用法:
+    python3 benchmarks/bench_enum.py [-n 轮数] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import groupy_x11
+
+
+def measure(func, rounds):
+    """运行 rounds 次，返回 (窗口数, 每次耗时 ms 列表)"""
+    times = []
+    count = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        count = len(func())
+        times.append((time.perf_counter() - start) * 1000)
+    return count, times
+
+
+def summarize(count, times):
+    return {
+        'windows': count,
+        'mean_ms': round(statistics.mean(times), 3),
+        'median_ms': round(statistics.median(times), 3),
+        'min_ms': round(min(times), 3),
+        'max_ms': round(max(times), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="窗口枚举性能对比")
+    parser.add_argument('-n', '--rounds', type=int, default=10, help="每种方式运行的轮数")
+    parser.add_argument('--json', action='store_true', help="输出 JSON")
+    args = parser.parse_args()
+
+    results = {}
+    results['subprocess'] = summarize(*measure(groupy_x11.subprocess_list_windows, args.rounds))
+    if groupy_x11.native_available():
+        results['native'] = summarize(*measure(groupy_x11.native_list_windows, args.rounds))
+    else:
+        print("⚠️  python-xlib 不可用或无法连接 X，跳过原生后端", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for method, r in results.items():
+        print(f"{method:>10}: {r['windows']} 个窗口, 平均 {r['mean_ms']:.2f} ms, "
+              f"中位 {r['median_ms']:.2f} ms (最小 {r['min_ms']:.2f}, 最大 {r['max_ms']:.2f})")
+    if 'native' in results and results['native']['median_ms'] > 0:
+        speedup = results['subprocess']['median_ms'] / results['native']['median_ms']
+        print(f"加速比: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""搜索框按键到画面更新的端到端延迟
+
+在 Xvfb 中运行切换器，用 XTest 注入按键，在 GTK 帧时钟的 after-paint 信号里
+记录搜索框内容变化后第一帧绘制完成的时刻，统计 p50 / p95 / p99。
+
+用法:
+    python3 benchmarks/bench_latency.py [--sizes 100,1000,5000]
+        [--variants switcher,lite,group] [-n 重复次数] [--json] [-o 结果文件]
+
+默认目标是 groupy.py 的 on_search (输入 -> 过滤 -> 重建 TreeView)。
+每次按键等上一帧画完再发送，测的是单次按键的延迟而不是吞吐。
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_variants import ROOT, make_adapter, write_json
+from groupy_cli import VARIANTS
+
+DEFAULT_SIZES = "100,1000,5000"
+# 搜索框连接了 changed 信号、输入即刷新的变体
+LATENCY_VARIANTS = ("switcher", "lite", "group")
+# 逐字输入后再逐个删除；只用小写字母、空格和点，不需要 Shift
+QUERIES = ['we', 'pro', 'main.py', 'pull request', 'term']
+# 开始输入前等待初始刷新结束 (groupy_lite.py 启动 5 秒后还会自动刷新一次)
+WARMUP_MS = {'lite': 5500}
+DEFAULT_WARMUP_MS = 1000
+KEY_GAP_MS = 20  # 一帧画完到下一次按键的间隔
+FRAME_TIMEOUT_MS = 2000  # 超过此时间没有新帧记为超时
+WORKER_TIMEOUT = 900  # 秒
+
+KEYSYMS = {' ': 'space', '.': 'period'}
+
+
+def key_sequence(repeat):
+    """[(keysym 名, 输入后搜索框应有的文字)]"""
+    keys = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            for i, char in enumerate(query):
+                keys.append((KEYSYMS.get(char, char), query[:i + 1]))
+            for i in range(len(query) - 1, -1, -1):
+                keys.append(('BackSpace', query[:i]))
+    return keys
+
+
+def percentile(ordered, p):
+    """最近秩百分位"""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# ============================================================
+# 子进程: 在虚拟屏幕中运行一个变体并注入按键
+
+def run_worker(variant, repeat):
+    import importlib
+    import io
+    import gi
+    gi.require_version('Gtk', '3.0')
+    from gi.repository import GLib, Gtk
+    from Xlib import X, XK
+    from Xlib import display as xdisplay
+    from Xlib.ext import xtest
+
+    real_stdout = sys.stdout
+    sys.stdout = io.StringIO()  # 丢弃变体的日志，只输出 JSON
+
+    module = importlib.import_module(VARIANTS[variant][0])
+    win, _ = make_adapter(variant, module)
+    loader = getattr(win, 'loader', None)
+    xd = xdisplay.Display()
+
+    keys = key_sequence(repeat)
+    state = {'next': 0, 't0': None, 'changed': False, 'expect': None, 'watchdog': None}
+    latencies = []
+    timeouts = []
+
+    def finish():
+        sys.stdout = real_stdout
+        print(json.dumps({'latencies': latencies, 'timeouts': len(timeouts),
+                          'keys': len(keys)}))
+        Gtk.main_quit()
+        return False
+
+    def focus():
+        # XTest 按键发给当前焦点窗口
+        win.present_with_time(X.CurrentTime)
+        win.search_entry.grab_focus()
+        xd.set_input_focus(win.get_window().get_xid(), X.RevertToParent, X.CurrentTime)
+        xd.sync()
+
+    def send_next():
+        if state['next'] >= len(keys):
+            return finish()
+        keysym, expect = keys[state['next']]
+        state['next'] += 1
+        keycode = xd.keysym_to_keycode(XK.string_to_keysym(keysym))
+        state['expect'] = expect
+        state['changed'] = False
+        state['t0'] = time.perf_counter()
+        xtest.fake_input(xd, X.KeyPress, keycode)
+        xtest.fake_input(xd, X.KeyRelease, keycode)
+        xd.flush()
+        state['watchdog'] = GLib.timeout_add(FRAME_TIMEOUT_MS, on_timeout)
+        return False
+
+    def on_timeout():
+        state['watchdog'] = None
+        timeouts.append(state['next'] - 1)
+        state['t0'] = None
+        focus()
+        GLib.timeout_add(KEY_GAP_MS, send_next)
+        return False
+
+    def on_changed(entry):
+        if state['t0'] is not None and entry.get_text() == state['expect']:
+            state['changed'] = True
+
+    def on_after_paint(clock):
+        if state['t0'] is None or not state['changed']:
+            return
+        if loader is not None and loader.pending is not None:
+            return  # 后台刷新还没把结果交付到列表
+        latencies.append((time.perf_counter() - state['t0']) * 1000)
+        state['t0'] = None
+        if state['watchdog'] is not None:
+            GLib.source_remove(state['watchdog'])
+            state['watchdog'] = None
+        GLib.timeout_add(KEY_GAP_MS, send_next)
+
+    def start():
+        win.search_entry.set_text("")
+        win.search_entry.connect("changed", on_changed)
+        win.get_frame_clock().connect("after-paint", on_after_paint)
+        focus()
+        GLib.timeout_add(KEY_GAP_MS, send_next)
+        return False
+
+    GLib.timeout_add(WARMUP_MS.get(variant, DEFAULT_WARMUP_MS), start)
+    Gtk.main()
+
+
+# ============================================================
+# 主进程
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return {
+        'p50_ms': round(percentile(ordered, 50), 2) if ordered else None,
+        'p95_ms': round(percentile(ordered, 95), 2) if ordered else None,
+        'p99_ms': round(percentile(ordered, 99), 2) if ordered else None,
+        'max_ms': round(ordered[-1], 2) if ordered else None,
+        'samples': len(ordered),
+    }
+
+
+def run_variant(variant, size, repeat, env):
+    try:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", variant, "-n", str(repeat)],
+            capture_output=True, text=True, env=env, timeout=WORKER_TIMEOUT, cwd=ROOT)
+    except subprocess.TimeoutExpired:
+        return None, f"超过 {WORKER_TIMEOUT} 秒"
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return None, lines[-1] if lines else f"退出码 {proc.returncode}"
+    try:
+        data = json.loads(proc.stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        return None, "无法解析输出"
+    result = dict(variant=variant, windows=size, **summarize(data['latencies']))
+    result['timeouts'] = data['timeouts']
+    return result, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索框按键到画面更新的延迟")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="窗口数，逗号分隔")
+    parser.add_argument('--variants', default="switcher", help="变体，逗号分隔")
+    parser.add_argument('-n', '--repeat', type=int, default=3, help="整组查询重复次数")
+    parser.add_argument('--json', action='store_true', help="输出 JSON")
+    parser.add_argument('-o', '--output', help="结果写入文件")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.repeat)
+        return 0
+
+    from xvfb_session import XvfbSession, missing_requirements
+    missing = missing_requirements()
+    if missing:
+        print("❌ 缺少: " + ", ".join(missing), file=sys.stderr)
+        return 2
+
+    variants = [v for v in args.variants.split(',') if v]
+    for v in variants:
+        if v not in LATENCY_VARIANTS:
+            parser.error(f"未知变体: {v} (可选: {', '.join(LATENCY_VARIANTS)})")
+
+    results = []
+    errors = []
+    with XvfbSession() as session:
+        meta = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'window_manager': session.wm_name,
+            'keys_per_run': len(key_sequence(args.repeat)),
+        }
+        for size in [int(x) for x in args.sizes.split(',')]:
+            with session.spawn_windows(size):
+                for variant in variants:
+                    print(f"⌨️  {variant} × {size} 个窗口...", file=sys.stderr)
+                    result, error = run_variant(variant, size, args.repeat, session.env)
+                    if result is not None:
+                        results.append(result)
+                    if error:
+                        errors.append({'variant': variant, 'windows': size, 'error': error})
+                        print(f"⚠️  {variant} × {size}: {error}", file=sys.stderr)
+
+    data = {'meta': meta, 'results': results, 'errors': errors}
+    if args.output:
+        write_json(args.output, data)
+    if args.json:
+        print(json.dumps(data, indent=2, ensure_ascii=False))
+        return 0
+
+    print(f"{'变体':>10} {'窗口数':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'超时':>6}")
+    for r in results:
+        print(f"{r['variant']:>10} {r['windows']:>8} {r['p50_ms'] or 0:>9.2f} "
+              f"{r['p95_ms'] or 0:>9.2f} {r['p99_ms'] or 0:>9.2f} {r['timeouts']:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""标题搜索性能对比: 线性 `search in name.lower()` vs 三元组索引
+
+用法:
+    python3 benchmarks/bench_search.py [--sizes 100,1000,10000] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groupy_search import TrigramIndex
+
+APPS = ['Chrome', 'Firefox', 'Terminal', 'VS Code', 'Files', 'WeChat', 'Slack', 'IDEA']
+WORDS = ['project', 'README.md', 'groupy', 'inbox', 'Pull Request', 'build', 'main.py',
+         'meeting', 'Dashboard', 'release', 'settings', 'docs', 'issue', 'review',
+         '微信', '文件', 'terminal', 'localhost:8080', 'YouTube', 'weekly report']
+QUERIES = ['a', 'we', 'pro', 'main.py', 'pull request', 'localhost', 'zzz-none']
+
+
+def make_windows(count, seed=0):
+    """生成 count 个 (xid, 标题, 应用名)"""
+    rnd = random.Random(seed)
+    windows = []
+    for i in range(count):
+        app = rnd.choice(APPS)
+        title = ' - '.join(rnd.sample(WORDS, rnd.randint(2, 4))) + f" ({i})"
+        windows.append((0x1000000 + i, f"{title} - {app}", app))
+    return windows
+
+
+def linear_search(windows, search):
+    return {xid for xid, name, app in windows
+            if search in name.lower() or search in app.lower()}
+
+
+def time_per_query(func, rounds):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="标题搜索性能对比")
+    parser.add_argument('--sizes', default='100,1000,10000', help="窗口数，逗号分隔")
+    parser.add_argument('-n', '--rounds', type=int, default=20, help="每个查询运行的轮数")
+    parser.add_argument('--json', action='store_true', help="输出 JSON")
+    args = parser.parse_args()
+
+    results = []
+    for size in [int(x) for x in args.sizes.split(',')]:
+        windows = make_windows(size)
+        index = TrigramIndex()
+        start = time.perf_counter()
+        for xid, name, app in windows:
+            index.add(xid, name, app)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for query in QUERIES:
+            expected = linear_search(windows, query.lower())
+            if index.search(query) != expected:
+                print(f"❌ 结果不一致: size={size} query={query!r}", file=sys.stderr)
+                sys.exit(1)
+            results.append({
+                'windows': size,
+                'query': query,
+                'hits': len(expected),
+                'index_build_ms': round(build_ms, 3),
+                'linear_ms': round(time_per_query(
+                    lambda: linear_search(windows, query.lower()), args.rounds), 4),
+                'index_ms': round(time_per_query(
+                    lambda: index.search(query), args.rounds), 4),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+
+    print(f"{'窗口数':>8} {'查询':>14} {'命中':>6} {'线性 ms':>10} {'索引 ms':>10}")
+    for r in results:
+        print(f"{r['windows']:>8} {r['query']:>14} {r['hits']:>6} "
+              f"{r['linear_ms']:>10.4f} {r['index_ms']:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""标签页浸泡测试: 反复打开、关闭大量短命窗口
+
+模拟聊天应用整天弹出又关闭的小窗口：在 main.py 的 GroupyWindow 中依次添加
+count 个窗口的标签页，同时最多保留 live 个，超出时关闭最早的。
+每隔一段统计新建的标签控件数、复用次数、Python 内存块数和进程 RSS，
+用来确认标签控件池生效后内存不随窗口总数增长。
+
+用法:
+    python3 benchmarks/bench_tabs.py [-c 10000] [--live 20] [--pool-size 32] [--json]
+
+--pool-size 0 关闭复用，作为对照。没有 DISPLAY 时在 Xvfb 中运行。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xvfb_session import XvfbSession
+
+SAMPLE_EVERY = 1000
+FIRST_XID = 0x7e000000  # 不与真实窗口冲突的假 XID
+APPS = [("wechat", "WeChat"), ("slack", "Slack"), ("dingtalk", "DingTalk"), ("lark", "Lark")]
+
+
+class SoakWindow:
+    """只提供 GroupyWindow 用到的 Wnck.Window 方法"""
+
+    def __init__(self, i):
+        self.xid = FIRST_XID + i
+        self.instance, self.group = APPS[i % len(APPS)]
+        self.name = f"{self.group} 通知 #{i}"
+
+    def get_xid(self):
+        return self.xid
+
+    def get_name(self):
+        return self.name
+
+    def get_class_instance_name(self):
+        return self.instance
+
+    def get_class_group_name(self):
+        return self.group
+
+    def is_skip_pager(self):
+        return False
+
+    def is_skip_tasklist(self):
+        return False
+
+
+def rss_kb():
+    """进程当前的常驻内存 (KB)"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return None
+
+
+def pump():
+    from gi.repository import Gtk
+    while Gtk.events_pending():
+        Gtk.main_iteration_do(False)
+
+
+def soak(count, live, pool_size):
+    import gi
+    gi.require_version('Gtk', '3.0')
+    import main as groupy_main
+
+    with contextlib.redirect_stdout(io.StringIO()):  # 丢弃主程序的日志
+        win = groupy_main.GroupyWindow()
+        win.show_all()
+        pump()
+    win.pool.max_size = pool_size
+
+    samples = []
+    opened = []
+    blocks_start = sys.getallocatedblocks()
+    rss_start = rss_kb()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            window = SoakWindow(i)
+            win.add_window_to_notebook(window)
+            opened.append(window)
+            if len(opened) > live:
+                win.on_window_closed(None, opened.pop(0))
+            pump()
+            if (i + 1) % SAMPLE_EVERY == 0:
+                samples.append({
+                    'windows': i + 1,
+                    'rss_kb': rss_kb(),
+                    'blocks': sys.getallocatedblocks() - blocks_start,
+                    'tabs': len(win.tabs),
+                    **win.pool.stats(),
+                })
+        for window in opened:
+            win.on_window_closed(None, window)
+        pump()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'windows': count,
+        'live': live,
+        'pool_size': pool_size,
+        'seconds': round(elapsed, 2),
+        'rss_start_kb': rss_start,
+        'rss_end_kb': rss_kb(),
+        'blocks_delta': sys.getallocatedblocks() - blocks_start,
+        'pool': win.pool.stats(),
+        'samples': samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="标签页浸泡测试")
+    parser.add_argument('-c', '--count', type=int, default=10000, help="打开、关闭的窗口总数")
+    parser.add_argument('--live', type=int, default=20, help="同时打开的窗口数")
+    parser.add_argument('--pool-size', type=int, default=None, help="标签控件池大小 (0 关闭复用)")
+    parser.add_argument('--json', action='store_true', help="输出 JSON")
+    args = parser.parse_args()
+
+    from groupy_tabs import POOL_SIZE
+    pool_size = POOL_SIZE if args.pool_size is None else args.pool_size
+
+    if os.environ.get('DISPLAY'):
+        result = soak(args.count, args.live, pool_size)
+    else:
+        with XvfbSession():
+            result = soak(args.count, args.live, pool_size)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{result['windows']} 个窗口 (同时 {result['live']} 个, 池 {result['pool_size']}), "
+          f"用时 {result['seconds']:.1f} 秒")
+    for s in result['samples']:
+        print(f"{s['windows']:>8}: RSS {s['rss_kb'] / 1024:.1f} MB, 内存块 +{s['blocks']}, "
+              f"新建标签 {s['created']}, 复用 {s['reused']}")
+    pool = result['pool']
+    print(f"RSS {result['rss_start_kb'] / 1024:.1f} -> {result['rss_end_kb'] / 1024:.1f} MB, "
+          f"内存块 +{result['blocks_delta']}, 新建标签 {pool['created']}, 复用 {pool['reused']}, "
+          f"丢弃 {pool['dropped']}")
+
+
+if __name__ == "__main__":
+    main()
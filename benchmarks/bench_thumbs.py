@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""窗口缩略图抓取耗时: MIT-SHM vs 普通 GetImage
+
+在 Xvfb (开启 Composite 和 MIT-SHM) 中创建一批窗口，用 groupy_thumbs 的
+WindowCapture 逐个抓取并缩小，统计每张的耗时和缓存占用。
+
+用法:
+    python3 benchmarks/bench_thumbs.py [-c 窗口数] [--size 1280x800] [-n 轮数] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xvfb_session import XvfbSession, missing_requirements
+
+
+def client_windows():
+    from Xlib import display as xdisplay
+    d = xdisplay.Display()
+    try:
+        prop = d.screen().root.get_full_property(d.intern_atom('_NET_CLIENT_LIST'), 0)
+        return list(prop.value) if prop is not None else []
+    finally:
+        d.close()
+
+
+def measure(xids, rounds, use_shm):
+    """抓取 rounds 轮，返回统计"""
+    from groupy_thumbs import WindowCapture, ThumbnailCache
+
+    capture = WindowCapture()
+    capture.use_shm = use_shm
+    cache = ThumbnailCache()
+    if not capture.available():
+        raise RuntimeError("没有 Composite 扩展")
+    if use_shm and capture.shm_opcode is None:
+        raise RuntimeError("没有 MIT-SHM 扩展")
+    times = []
+    missed = 0
+    try:
+        for xid in xids:
+            capture.redirect(xid)  # 重定向的开销不计入抓取
+        for _ in range(rounds):
+            for xid in xids:
+                start = time.perf_counter()
+                surface = capture.capture(xid)
+                times.append((time.perf_counter() - start) * 1000)
+                if surface is None:
+                    missed += 1
+                else:
+                    cache.put(xid, surface, time.time())
+        shm = capture.shm_captures > 0
+    finally:
+        capture.close()
+    times.sort()
+    return {
+        'shm': shm,
+        'captures': len(times),
+        'missed': missed,
+        'mean_ms': round(statistics.mean(times), 3),
+        'median_ms': round(statistics.median(times), 3),
+        'p95_ms': round(times[max(0, int(len(times) * 0.95) - 1)], 3),
+        'cache_bytes': cache.bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="窗口缩略图抓取耗时")
+    parser.add_argument('-c', '--count', type=int, default=20, help="窗口数")
+    parser.add_argument('--size', default="1280x800", help="窗口尺寸 (宽x高)")
+    parser.add_argument('-n', '--rounds', type=int, default=5, help="抓取轮数")
+    parser.add_argument('--json', action='store_true', help="输出 JSON")
+    args = parser.parse_args()
+
+    missing = missing_requirements()
+    if missing:
+        print("缺少: " + ", ".join(missing), file=sys.stderr)
+        sys.exit(2)
+    size = tuple(int(v) for v in args.size.split('x'))
+
+    results = {}
+    with XvfbSession() as session:
+        with session.spawn_windows(args.count, size):
+            xids = client_windows()
+            for method, use_shm in (('shm', True), ('getimage', False)):
+                try:
+                    results[method] = measure(xids, args.rounds, use_shm)
+                except RuntimeError as e:
+                    print(f"⚠️  跳过 {method}: {e}", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for method, r in results.items():
+        print(f"{method:>10}: {r['captures']} 次抓取 ({args.size}), 平均 {r['mean_ms']:.2f} ms, "
+              f"中位 {r['median_ms']:.2f} ms, p95 {r['p95_ms']:.2f} ms, "
+              f"未抓到 {r['missed']}, 缓存 {r['cache_bytes'] // 1024} KB")
+    if 'shm' in results and 'getimage' in results and results['shm']['median_ms'] > 0:
+        speedup = results['getimage']['median_ms'] / results['shm']['median_ms']
+        print(f"加速比: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
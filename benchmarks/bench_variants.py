@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""各前端变体随窗口数的性能: 枚举、分组、搜索过滤、列表填充
+
+在 Xvfb + 轻量窗口管理器中创建 10 / 100 / 1000 / 5000 个假窗口，
+每个变体在独立子进程中运行，结果输出为 JSON，并可与保存的基线对比。
+
+用法:
+    python3 benchmarks/bench_variants.py [--sizes 10,100,1000,5000]
+        [--variants switcher,lite,...] [-n 轮数] [--json] [-o 结果文件]
+        [--baseline 基线文件] [--save-baseline 基线文件] [--threshold 0.25]
+
+阶段:
+    enumerate  只枚举窗口 (变体自己的枚举方式)
+    group      按应用分组 (有分组的变体)
+    populate   重建列表/树 (没有单独枚举步骤的变体包含枚举)
+    search     输入一个搜索词到列表更新完成 (有搜索框的变体，取所有查询的中位数)
+
+有回归时退出码为 1。
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import groupy_x11
+from groupy_cli import VARIANTS
+
+DEFAULT_SIZES = "10,100,1000,5000"
+# 有窗口列表的变体 (tabs 只嵌入白名单窗口，ctl 没有界面)
+BENCH_VARIANTS = ("switcher", "lite", "group", "simple", "gnome", "combo", "stable")
+QUERIES = ['we', 'pro', 'main.py', 'pull request', 'zzz-none']
+WORKER_TIMEOUT = 900  # 秒
+# 比基线慢超过 threshold 且绝对差超过此值 (ms) 才算回归，避免小数值的抖动
+MIN_DELTA_MS = 1.0
+
+
+# ============================================================
+# 子进程: 在虚拟屏幕中运行一个变体
+
+def drain(loader=None):
+    """处理完所有待处理的 GTK 事件 (布局、绘制)，并等后台枚举交付结果"""
+    from gi.repository import Gtk
+    while True:
+        if Gtk.events_pending():
+            Gtk.main_iteration_do(False)
+        elif loader is not None and loader.pending is not None:
+            Gtk.main_iteration_do(True)
+        else:
+            break
+
+
+def time_ms(func, rounds, loader=None):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        drain(loader)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def typed_search(win, refresh=None, before=None):
+    """搜索框输入 query 后刷新；搜索框未连接 changed 信号的变体手动刷新"""
+    def run(query):
+        if before is not None:
+            before()
+        win.search_entry.set_text(query)
+        if refresh is not None:
+            refresh()
+    return run
+
+
+def make_adapter(variant, module):
+    """返回 (窗口, {阶段: 函数})，search 阶段的函数接受查询词"""
+    if variant == "switcher":
+        win = module.GroupyLiteWindow()
+        return win, {
+            'enumerate': win.registry.refresh,
+            'group': win.update_groups,
+            'populate': win.refresh_tree,
+            # 每次清空查询缓存，测的是冷查询
+            'search': typed_search(win, before=win.query_cache.clear),
+        }
+    if variant == "group":
+        win = module.GroupyLiteWindow()
+        return win, {
+            'enumerate': lambda: groupy_x11.list_windows(with_class=False),
+            # 枚举、分组和建树在同一个函数里
+            'populate': lambda: win.load_windows(None),
+            'search': typed_search(win),
+        }
+    if variant == "lite":
+        win = module.GroupyLiteWindow()
+        return win, {
+            'enumerate': win.get_windows,
+            'populate': lambda: win.refresh_windows(None),
+            'search': typed_search(win),
+        }
+    if variant == "simple":
+        win = module.GroupyLiteWindow()
+        return win, {
+            'enumerate': win.get_windows,
+            'populate': lambda: win.refresh(None),
+            'search': typed_search(win),
+        }
+    if variant == "gnome":
+        from gi.repository import Wnck
+        Wnck.Screen.get_default().force_update()
+        win = module.GroupyLiteWindow()
+        return win, {
+            'enumerate': lambda: (Wnck.Screen.get_default().force_update(), win.get_windows()),
+            'populate': lambda: win.refresh(None),
+            'search': typed_search(win),
+        }
+    if variant in ("combo", "stable"):
+        win = module.GroupyLiteWindow()
+        return win, {'populate': lambda: win.load_windows(None)}
+    raise ValueError(f"不支持的变体: {variant}")
+
+
+def run_worker(variant, rounds):
+    """子进程入口: 测量一个变体的各阶段，JSON 输出到 stdout"""
+    import importlib
+    import io
+    import gi
+    gi.require_version('Gtk', '3.0')
+
+    # 变体会打印大量日志，只保留最后的 JSON
+    real_stdout = sys.stdout
+    sys.stdout = io.StringIO()
+    try:
+        module = importlib.import_module(VARIANTS[variant][0])
+        win, phases = make_adapter(variant, module)
+        # 后台枚举的变体要等结果交付到列表才算完成
+        loader = getattr(win, 'loader', None)
+        drain(loader)
+
+        results = {}
+        for phase, func in phases.items():
+            if phase == 'search':
+                times = []
+                for query in QUERIES:
+                    times += time_ms(lambda: func(query), rounds, loader)
+                    func("")
+                    drain(loader)
+            else:
+                times = time_ms(func, rounds, loader)
+            results[phase] = times
+        win.destroy()
+    finally:
+        sys.stdout = real_stdout
+    print(json.dumps(results))
+
+
+# ============================================================
+# 主进程: 启动虚拟屏幕，按窗口数依次运行各变体
+
+def summarize(times):
+    ordered = sorted(times)
+    return {
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'min_ms': round(ordered[0], 3),
+        'samples': len(ordered),
+    }
+
+
+def run_variant(variant, size, rounds, env):
+    """在子进程中运行一个变体，返回 [{variant, windows, phase, ...}] 或错误信息"""
+    try:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", variant, "-n", str(rounds)],
+            capture_output=True, text=True, env=env, timeout=WORKER_TIMEOUT, cwd=ROOT)
+    except subprocess.TimeoutExpired:
+        return [], f"超过 {WORKER_TIMEOUT} 秒"
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return [], lines[-1] if lines else f"退出码 {proc.returncode}"
+    try:
+        phases = json.loads(proc.stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        return [], "无法解析输出"
+    return [dict(variant=variant, windows=size, phase=phase, **summarize(times))
+            for phase, times in phases.items()], None
+
+
+def result_key(r):
+    return f"{r['variant']}/{r['windows']}/{r['phase']}"
+
+
+def find_regressions(results, baseline, threshold):
+    """与基线对比，返回比基线慢的项"""
+    reference = {result_key(r): r for r in baseline.get('results', [])}
+    regressions = []
+    for r in results:
+        old = reference.get(result_key(r))
+        if old is None:
+            continue
+        delta = r['median_ms'] - old['median_ms']
+        if delta > MIN_DELTA_MS and r['median_ms'] > old['median_ms'] * (1 + threshold):
+            regressions.append({
+                'key': result_key(r),
+                'baseline_ms': old['median_ms'],
+                'median_ms': r['median_ms'],
+                'ratio': round(r['median_ms'] / old['median_ms'], 2) if old['median_ms'] else None,
+            })
+    return regressions
+
+
+def write_json(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="各前端变体随窗口数的性能")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="窗口数，逗号分隔")
+    parser.add_argument('--variants', default=",".join(BENCH_VARIANTS), help="变体，逗号分隔")
+    parser.add_argument('-n', '--rounds', type=int, default=5, help="每个阶段运行的轮数")
+    parser.add_argument('--json', action='store_true', help="输出 JSON")
+    parser.add_argument('-o', '--output', help="结果写入文件")
+    parser.add_argument('--baseline', help="与此基线对比")
+    parser.add_argument('--save-baseline', help="把本次结果保存为基线")
+    parser.add_argument('--threshold', type=float, default=0.25, help="回归阈值 (比例)")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.rounds)
+        return 0
+
+    from xvfb_session import XvfbSession, missing_requirements
+    missing = missing_requirements()
+    if missing:
+        print("❌ 缺少: " + ", ".join(missing), file=sys.stderr)
+        return 2
+
+    variants = [v for v in args.variants.split(',') if v]
+    for v in variants:
+        if v not in BENCH_VARIANTS:
+            parser.error(f"未知变体: {v} (可选: {', '.join(BENCH_VARIANTS)})")
+
+    results = []
+    errors = []
+    with XvfbSession() as session:
+        meta = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'window_manager': session.wm_name,
+            'rounds': args.rounds,
+        }
+        for size in [int(x) for x in args.sizes.split(',')]:
+            with session.spawn_windows(size):
+                for variant in variants:
+                    print(f"⏱  {variant} × {size} 个窗口...", file=sys.stderr)
+                    rows, error = run_variant(variant, size, args.rounds, session.env)
+                    results += rows
+                    if error:
+                        errors.append({'variant': variant, 'windows': size, 'error': error})
+                        print(f"⚠️  {variant} × {size}: {error}", file=sys.stderr)
+
+    data = {'meta': meta, 'results': results, 'errors': errors}
+    if args.baseline:
+        with open(args.baseline) as f:
+            data['regressions'] = find_regressions(results, json.load(f), args.threshold)
+    if args.output:
+        write_json(args.output, data)
+    if args.save_baseline:
+        write_json(args.save_baseline, {'meta': meta, 'results': results})
+
+    if args.json:
+        print(json.dumps(data, indent=2, ensure_ascii=False))
+    else:
+        print(f"{'变体':>10} {'窗口数':>8} {'阶段':>10} {'中位 ms':>10} {'p95 ms':>10}")
+        for r in results:
+            print(f"{r['variant']:>10} {r['windows']:>8} {r['phase']:>10} "
+                  f"{r['median_ms']:>10.2f} {r['p95_ms']:>10.2f}")
+        for r in data.get('regressions', []):
+            print(f"❌ 回归 {r['key']}: {r['baseline_ms']:.2f} -> {r['median_ms']:.2f} ms")
+
+    return 1 if data.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
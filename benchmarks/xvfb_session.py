@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""基准测试用的虚拟 X 环境: Xvfb + 轻量 EWMH 窗口管理器 + 批量假窗口
+
+Xvfb 开启 Composite 和 MIT-SHM 扩展 (缩略图基准需要)。
+
+需要 Xvfb、任一支持 EWMH 的窗口管理器 (openbox / fluxbox / icewm / ...) 和 python-xlib。
+
+作为库使用:
+    with XvfbSession() as session:
+        with session.spawn_windows(1000):
+            ...  # DISPLAY 已指向虚拟屏幕
+
+单独运行 (调试用): python3 benchmarks/xvfb_session.py spawn 100 [宽x高]
+"""
+
+import os
+import select
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_search import make_windows
+
+SCREEN = "1920x1080x24"
+START_TIMEOUT = 10  # 秒
+SPAWN_TIMEOUT = 120  # 秒，5000 个窗口时窗口管理器需要一些时间接管
+WINDOW_SIZE = (240, 120)
+
+# 按顺序尝试的窗口管理器 (命令, 参数)
+WINDOW_MANAGERS = [
+    ("openbox", []),
+    ("fluxbox", []),
+    ("icewm", []),
+    ("matchbox-window-manager", ["-use_titlebar", "no"]),
+    ("xfwm4", ["--compositor=off"]),
+    ("metacity", ["--replace"]),
+]
+
+# 应用名 -> (WM_CLASS 实例名, 类名)，与常见桌面应用一致
+WM_CLASSES = {
+    'Chrome': ("google-chrome", "Google-chrome"),
+    'Firefox': ("Navigator", "firefox"),
+    'Terminal': ("gnome-terminal-server", "Gnome-terminal"),
+    'VS Code': ("code", "Code"),
+    'Files': ("org.gnome.Nautilus", "Org.gnome.Nautilus"),
+    'WeChat': ("wechat", "WeChat"),
+    'Slack': ("slack", "Slack"),
+    'IDEA': ("jetbrains-idea", "jetbrains-idea"),
+}
+
+
+def find_window_manager():
+    """返回第一个已安装的窗口管理器 (命令, 参数)，没有则 None"""
+    for command, args in WINDOW_MANAGERS:
+        if shutil.which(command):
+            return command, args
+    return None
+
+
+def missing_requirements():
+    """缺少的依赖列表 (为空表示可以运行)"""
+    missing = []
+    if not shutil.which("Xvfb"):
+        missing.append("Xvfb")
+    if find_window_manager() is None:
+        missing.append("EWMH 窗口管理器 (" + " / ".join(c for c, _ in WINDOW_MANAGERS) + ")")
+    try:
+        import Xlib  # noqa: F401
+    except ImportError:
+        missing.append("python-xlib")
+    return missing
+
+
+def _root_property(d, name):
+    root = d.screen().root
+    prop = root.get_full_property(d.intern_atom(name), 0)
+    return prop.value if prop is not None else None
+
+
+def _wait_until(check, timeout, what):
+    deadline = time.monotonic() + timeout
+    while not check():
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"等待{what}超时")
+        time.sleep(0.05)
+
+
+class WindowSpawner:
+    """子进程持有的一批假窗口，close() 时全部销毁"""
+
+    def __init__(self, count, env, size=WINDOW_SIZE):
+        self.count = count
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "spawn", str(count), "%dx%d" % size],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, text=True)
+        ready, _, _ = select.select([self.proc.stdout], [], [], SPAWN_TIMEOUT)
+        line = self.proc.stdout.readline().strip() if ready else ""
+        if line != "ready":
+            self.close()
+            raise RuntimeError(f"创建 {count} 个窗口失败")
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.stdin.close()  # 子进程读到 EOF 后退出，窗口随连接关闭销毁
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class XvfbSession:
+    """启动 Xvfb 和窗口管理器，并把 DISPLAY 指向它们"""
+
+    def __init__(self, screen=SCREEN):
+        self.screen = screen
+        self.xvfb = None
+        self.wm = None
+        self.wm_name = None
+        self.display = None
+        self.env = None
+        self._old_display = None
+
+    def start(self):
+        missing = missing_requirements()
+        if missing:
+            raise RuntimeError("缺少: " + ", ".join(missing))
+
+        # -displayfd: 由 Xvfb 自选空闲的显示号，准备好后写回
+        r, w = os.pipe()
+        self.xvfb = subprocess.Popen(
+            ["Xvfb", "-displayfd", str(w), "-screen", "0", self.screen, "-nolisten", "tcp",
+             "+extension", "Composite", "+extension", "MIT-SHM"],
+            pass_fds=(w,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.close(w)
+        with os.fdopen(r) as f:
+            ready, _, _ = select.select([f], [], [], START_TIMEOUT)
+            number = f.readline().strip() if ready else ""
+        if not number:
+            self.stop()
+            raise RuntimeError("Xvfb 启动失败")
+        self.display = f":{number}"
+        self.env = dict(os.environ, DISPLAY=self.display)
+        self._old_display = os.environ.get('DISPLAY')
+        os.environ['DISPLAY'] = self.display
+
+        command, args = find_window_manager()
+        self.wm_name = command
+        self.wm = subprocess.Popen([command] + args, env=self.env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # 窗口管理器设置 _NET_SUPPORTING_WM_CHECK 后才算就绪
+        from Xlib import display as xdisplay
+        d = xdisplay.Display(self.display)
+        try:
+            _wait_until(lambda: _root_property(d, '_NET_SUPPORTING_WM_CHECK') is not None,
+                        START_TIMEOUT, f"窗口管理器 {command}")
+        finally:
+            d.close()
+        return self
+
+    def stop(self):
+        for proc in (self.wm, self.xvfb):
+            if proc is not None and proc.poll() is None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
+        self.wm = self.xvfb = None
+        if self._old_display is not None:
+            os.environ['DISPLAY'] = self._old_display
+        elif self.display is not None:
+            os.environ.pop('DISPLAY', None)
+
+    def spawn_windows(self, count, size=WINDOW_SIZE):
+        """创建 count 个 size (宽, 高) 的顶层窗口，等窗口管理器全部接管后返回 WindowSpawner"""
+        return WindowSpawner(count, self.env, size)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def spawn(count, size=WINDOW_SIZE):
+    """子进程: 创建窗口，打印 ready，一直持有到 stdin 关闭"""
+    from Xlib import X, Xatom
+    from Xlib import display as xdisplay
+
+    d = xdisplay.Display()
+    screen = d.screen()
+    before = len(_root_property(d, '_NET_CLIENT_LIST') or [])
+    net_wm_name = d.intern_atom('_NET_WM_NAME')
+    net_wm_pid = d.intern_atom('_NET_WM_PID')
+    utf8 = d.intern_atom('UTF8_STRING')
+
+    for i, (_, title, app) in enumerate(make_windows(count)):
+        window = screen.root.create_window(
+            (i * 7) % 1600, (i * 5) % 900, size[0], size[1], 0, screen.root_depth,
+            X.InputOutput, X.CopyFromParent, background_pixel=screen.white_pixel)
+        window.set_wm_name(title)
+        window.change_property(net_wm_name, utf8, 8, title.encode('utf-8'))
+        window.set_wm_class(*WM_CLASSES.get(app, (app.lower(), app)))
+        window.change_property(net_wm_pid, Xatom.CARDINAL, 32, [os.getpid()])
+        window.map()
+    d.flush()
+
+    _wait_until(lambda: len(_root_property(d, '_NET_CLIENT_LIST') or []) >= before + count,
+                SPAWN_TIMEOUT, f"窗口管理器接管 {count} 个窗口")
+    print("ready", flush=True)
+
+    # 持有窗口；同时读走 X 事件，避免服务端输出缓冲堆积
+    while True:
+        readable, _, _ = select.select([sys.stdin, d.fileno()], [], [])
+        if sys.stdin in readable and not sys.stdin.readline():
+            break
+        while d.pending_events():
+            d.next_event()
+    d.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) in (3, 4) and sys.argv[1] == "spawn":
+        size = tuple(int(v) for v in sys.argv[3].split('x')) if len(sys.argv) == 4 else WINDOW_SIZE
+        spawn(int(sys.argv[2]), size)
+    else:
+        print(__doc__.strip())
+        sys.exit(2)
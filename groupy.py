@@ -3,108 +3,62 @@
 
 import sys
 import os
+import json
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk, GLib
-
-def install_desktop_shortcut():
-    """创建桌面和应用菜单快捷方式"""
-    import os
-    
-    desktop_file = os.path.expanduser("~/.local/share/applications/groupy.desktop")
-    
-    # 检查是否已安装
-    if os.path.exists(desktop_file):
-        return
-    
-    content = """[Desktop Entry]
-Name=Groupy
-Comment=窗口标签化管理工具
-Exec=/home/lijiang/code/groupy/run_groupy.sh
-Icon=utilities-terminal
-Terminal=false
-Type=Application
-Categories=Utility;
-StartupNotify=true
-"""
-    
-    try:
-        os.makedirs(os.path.dirname(desktop_file), exist_ok=True)
-        with open(desktop_file, 'w') as f:
-            f.write(content)
-        print(f"已安装应用菜单: {desktop_file}")
-    except Exception as e:
-        print(f"无法创建快捷方式: {e}")
-
+from gi.repository import Gtk, Gdk, GdkPixbuf, GLib
+
+from groupy_x11 import activate_window, user_time
+from groupy_registry import WindowRegistry
+from groupy_async import AsyncLoader
+from groupy_appname import app_names, simplify_app_name, reload_rules
+from groupy_config import get_config
+from groupy_search import TrigramIndex, QueryCache
+from groupy_fuzzy import FuzzyMatcher
+from groupy_history import FrecencyStore, history_key
+from groupy_icons import window_icon
+from groupy_thumbs import thumbnails
+from groupy_ipc import IpcServer, acquire_instance_lock, hand_off
 
 APP_NAME = "Groupy Lite"
-LAST_FILE = os.path.expanduser("~/.config/groupy/last_selection")
 LOCK_FILE = os.path.expanduser("~/.config/groupy/groupy.lock")
 
-def check_single_instance():
-    """检查是否已有实例运行"""
-    import subprocess
-    
-    # 检查 lock 文件
-    if os.path.exists(LOCK_FILE):
-        try:
-            with open(LOCK_FILE, 'r') as f:
-                pid = int(f.read().strip())
-            # 检查进程是否存在
-            result = subprocess.run(['ps', '-p', str(pid), '-o', 'pid='], 
-                                  capture_output=True, text=True)
-            if pid and result.stdout.strip():
-                # 尝试激活现有窗口
-                try:
-                    subprocess.run(['wmctrl', '-a', APP_NAME], capture_output=True, timeout=1)
-                except:
-                    pass
-                print(f"Groupy 已在运行 (PID: {pid})")
-                return False
-        except:
-            pass
-    
-    # 创建 lock 文件
-    try:
-        with open(LOCK_FILE, 'w') as f:
-            f.write(str(os.getpid()))
-    except:
-        pass
+# 搜索方式: "fuzzy" 模糊匹配按分数排序, "substring" 子串匹配按应用名排序
+SEARCH_MODE = "fuzzy"
+FUZZY_TOP_K = 200  # 模糊搜索最多显示的窗口数
+HISTORY_BONUS = 8  # 模糊搜索中激活历史的最高加分 (与命中词首相当)
+
+# 持有期间即为唯一实例，进程退出时由内核释放
+_instance_lock = None
+
+def check_single_instance(command="show"):
+    """检查是否已有实例运行，已有则把请求转交给它"""
+    global _instance_lock
     
+    _instance_lock = acquire_instance_lock(LOCK_FILE)
+    if _instance_lock is None:
+        reply = hand_off(command)
+        print(f"Groupy 已在运行，已转交请求 {command}: {reply}")
+        return False
     return True
 
-def get_window_app_name(wid):
-    """获取窗口的应用名称"""
-    try:
-        import subprocess
-        result = subprocess.run(
-            ['xprop', '-id', wid, 'WM_CLASS'],
-            capture_output=True, text=True, timeout=1
-        )
-        output = result.stdout.strip()
-        if 'WM_CLASS' in output:
-            parts = output.split('=')
-            if len(parts) >= 2:
-                classes = parts[1].strip().strip('"').split('", "')
-                if len(classes) >= 2:
-                    return classes[1]
-                elif len(classes) >= 1:
-                    return classes[0]
-    except:
-        pass
-    return None
-
 class GroupyLiteWindow(Gtk.Window):
-    def __init__(self):
+    def __init__(self, daemon=False):
         Gtk.Window.__init__(self, title=APP_NAME)
         self.set_default_size(320, 500)
         self.set_position(Gtk.WindowPosition.CENTER)
         self.set_keep_above(True)
         self.set_decorated(False)  # 无边框
         
-        self.groups = {}
+        self.groups = {}     # app_name -> [(xid, name)]
+        self.entries = {}    # xid -> (app_name, name)
+        self.positions = {}  # xid -> 在客户端列表中的顺序
+        self.keys = {}       # xid -> 激活历史的键
+        self.frecency = {}   # xid -> 激活历史分数 (只含有记录的窗口)
+        self.history = FrecencyStore()
         self.visible = True
         self.started = False
+        self.daemon = daemon  # 常驻模式：关闭弹窗时隐藏而不是退出
         
         vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         self.add(vbox)
@@ -117,11 +71,17 @@ class GroupyLiteWindow(Gtk.Window):
         self.search_entry.connect("changed", self.on_search)
         vbox.pack_start(self.search_entry, False, False, 5)
 
-        self.store = Gtk.TreeStore(str, str)
+        # 显示文字, 窗口标题, XID, 应用图标
+        self.store = Gtk.TreeStore(str, str, int, GdkPixbuf.Pixbuf)
         self.tree = Gtk.TreeView(model=self.store)
         
+        col = Gtk.TreeViewColumn("应用 / 窗口")
+        icon_renderer = Gtk.CellRendererPixbuf()
+        col.pack_start(icon_renderer, False)
+        col.add_attribute(icon_renderer, "pixbuf", 3)
         renderer = Gtk.CellRendererText()
-        col = Gtk.TreeViewColumn("应用 / 窗口", renderer, text=0)
+        col.pack_start(renderer, True)
+        col.add_attribute(renderer, "text", 0)
         col.set_expand(True)
         self.tree.append_column(col)
         
@@ -133,20 +93,52 @@ class GroupyLiteWindow(Gtk.Window):
         sw.add(self.tree)
         vbox.pack_start(sw, True, True, 5)
 
+        # 选中窗口的缩略图 (抓到第一张后才显示)
+        self.preview = Gtk.Image()
+        self.preview.set_no_show_all(True)
+        self.preview_xid = None
+        vbox.pack_start(self.preview, False, False, 0)
+
         self.status_label = Gtk.Label(label="💡 ↑↓ 导航 | Enter 跳转 | Esc 隐藏")
         vbox.pack_start(self.status_label, False, False, 5)
 
         # 快捷键
         self.setup_accelerators()
+        # 隐藏后不再抓取缩略图
+        self.connect("hide", lambda w: self.show_preview(None))
         
         self.show_all()
         self.started = True
         
-        # 获取焦点
-        self.present_with_time(0)
-        GLib.timeout_add(100, self._grab_focus)
+        if daemon:
+            # 常驻模式：窗口先建好再隐藏，等待 show 命令
+            self.hide()
+            self.visible = False
+        else:
+            # 获取焦点
+            self.present_with_time(0)
+            GLib.timeout_add(100, self._grab_focus)
+
+        # 窗口注册表：只枚举一次，之后由 X 事件增量更新
+        # 无法监听时 (没有 python-xlib) 在后台线程枚举，结果分批到达
+        self.loader = AsyncLoader()
+        self.registry = WindowRegistry()
+        self.registry.start()
+        self._rebuild_id = None
+        self.registry.connect(self.on_registry_changed)
+
+        # 标题/应用名搜索索引，随注册表增量更新
+        self.index = TrigramIndex()
+        self.matcher = FuzzyMatcher()
+        self.query_cache = QueryCache(self.match_query, self.check_query)
+        for win in self.registry.items():
+            self.index_window(win)
         self.load_windows(None)
 
+        # 应用名规则在配置文件中修改后重新分组
+        get_config().watch()
+        get_config().subscribe("app_names", self.on_app_names_changed)
+
     def _grab_focus(self):
         """延迟获取焦点"""
         self.present()
@@ -184,8 +176,7 @@ class GroupyLiteWindow(Gtk.Window):
     def on_toggle(self, accel_group, window, keyval, modifier):
         """Super+1 切换显示/退出"""
         if self.visible:
-            self.destroy()
-            Gtk.main_quit()
+            self.dismiss()
         else:
             self.toggle_visible()
         return True
@@ -196,27 +187,59 @@ class GroupyLiteWindow(Gtk.Window):
             selection = self.tree.get_selection()
             model, treeiter = selection.get_selected()
             if treeiter:
-                name = model[treeiter][1]
+                name, xid = model[treeiter][1], model[treeiter][2]
                 if name:
-                    self.goto_window(name)
-                    self.destroy()
-                    Gtk.main_quit()
+                    self.goto_window(name, xid)
+                    self.dismiss()
         return True
 
     def on_escape(self, accel_group, window, keyval, modifier):
-        """Esc 退出程序"""
-        self.destroy()
-        Gtk.main_quit()
+        """Esc 退出程序 (常驻模式下隐藏)"""
+        self.dismiss()
         return True
 
     def on_key_press(self, widget, event):
         """键盘事件处理（RDP 环境备用）"""
         if event.keyval == Gdk.KEY_Escape:
-            self.destroy()
-            Gtk.main_quit()
+            self.dismiss()
             return True
         return False
 
+    def dismiss(self):
+        """关闭弹窗：常驻模式下隐藏并清空搜索，否则退出"""
+        if self.daemon:
+            self.hide()
+            self.visible = False
+            self.search_entry.set_text("")
+        else:
+            self.destroy()
+            Gtk.main_quit()
+
+    def on_command(self, command):
+        """处理客户端通过 socket 发来的命令"""
+        if command == "show":
+            self.show_popup()
+        elif command == "hide":
+            if self.visible:
+                self.dismiss()
+        elif command == "toggle":
+            if self.visible:
+                self.dismiss()
+            else:
+                self.show_popup()
+        elif command == "quit":
+            GLib.idle_add(Gtk.main_quit)
+        elif command == "query":
+            return json.dumps({
+                'pid': os.getpid(),
+                'daemon': self.daemon,
+                'visible': self.visible,
+                'windows': len(self.entries),
+            })
+        else:
+            return f"未知命令: {command}"
+        return "ok"
+
     def on_down(self, accel_group, window, keyval, modifier):
         """下键 - 选中下一个"""
         if not self.visible:
@@ -266,99 +289,152 @@ class GroupyLiteWindow(Gtk.Window):
             self.hide()
             self.visible = False
         else:
-            self.present()
-            self.visible = True
-            GLib.timeout_add(100, self._grab_focus)
-            self.load_windows(None)
+            self.show_popup()
+
+    def show_popup(self):
+        """显示弹窗：先从内存重建列表再显示，首帧即为最新内容"""
+        self.load_windows(None)
+        self.search_entry.grab_focus()
+        self.present()
+        self.visible = True
+        GLib.timeout_add(100, self._grab_focus)
 
     def load_windows(self, widget):
-        """加载窗口"""
-        self.store.clear()
+        """加载窗口：监听中只读内存，否则先显示已有内容再在后台重新枚举"""
+        if self.registry.watching:
+            self.registry.ensure_fresh()
+        else:
+            self.registry.refresh_async(self.loader)
+        self.update_groups()
+        self.refresh_tree()
+
+    def update_groups(self):
+        """按应用分组 (只读注册表内存)"""
         self.groups = {}
+        self.entries = {}
+        self.positions = {}
+        self.keys = {}
         
         try:
-            import subprocess
-            result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True, timeout=2)
-            
-            for line in result.stdout.strip().split('\n'):
-                if not line:
+            for pos, win in enumerate(self.registry.items()):
+                name = win['name']
+                
+                if not name or 'N/A' in name:
                     continue
-                parts = line.split()
-                if len(parts) >= 4:
-                    wid = parts[0]
-                    name = ' '.join(parts[3:])
-                    
-                    if not name or 'N/A' in name:
-                        continue
-                    
-                    app_name = get_window_app_name(wid)
-                    if not app_name:
-                        app_name = "Unknown"
-                    
-                    app_name = self.simplify_app_name(app_name)
-                    
-                    if app_name not in self.groups:
-                        self.groups[app_name] = []
-                    self.groups[app_name].append(name)
+                
+                app_name = self.window_app_name(win)
+                
+                if app_name not in self.groups:
+                    self.groups[app_name] = []
+                self.groups[app_name].append((win['xid'], name))
+                self.entries[win['xid']] = (app_name, name)
+                self.positions[win['xid']] = pos
+                self.keys[win['xid']] = history_key(
+                    app_names.cached_wm_class(win['xid']) or app_name, name)
             
-            print(f"找到 {len(self.groups)} 个应用")
-            self.build_tree()
+            self.update_frecency()
+            print(f"找到 {len(self.groups)} 个应用 (应用名缓存: {app_names.stats()})")
                 
         except Exception as e:
             print(f"错误: {e}")
 
+    def update_frecency(self):
+        """按激活历史计算各窗口的分数 (衰减不改变排序，只在分组/激活时算)"""
+        scores = self.history.scores(set(self.keys.values()))
+        self.frecency = {xid: scores[key] for xid, key in self.keys.items() if key in scores}
+
+    def window_app_name(self, win):
+        """窗口的简化应用名 (类名查询超时的窗口先显示为 Unknown)"""
+        if win['xid'] not in app_names:
+            return self.simplify_app_name(win.get('app') or "Unknown")
+        return app_names.app_name(win['xid'], self.simplify_app_name)
+
+    def index_window(self, win):
+        """更新一个窗口的搜索索引"""
+        app_name = self.window_app_name(win)
+        self.index.add(win['xid'], win['name'], app_name)
+        if win['name'] and 'N/A' not in win['name']:
+            self.matcher.add(win['xid'], f"{app_name} {win['name']}")
+        else:
+            self.matcher.remove(win['xid'])
+        self.query_cache.update(win['xid'])
+
+    def unindex_window(self, xid):
+        """从搜索索引中删除一个窗口"""
+        self.index.remove(xid)
+        self.matcher.remove(xid)
+        self.query_cache.discard(xid)
+
+    def match_query(self, query, candidates):
+        """查询全部 (或 candidates 中的) 窗口，返回 {xid: score}"""
+        if SEARCH_MODE == "fuzzy":
+            return self.matcher.scores(query, candidates)
+        return dict.fromkeys(self.index.search(query, candidates), 0)
+
+    def check_query(self, query, xid):
+        """单个窗口是否匹配，返回分数或 None"""
+        if SEARCH_MODE == "fuzzy":
+            return self.matcher.score_one(query, xid)
+        return 0 if self.index.matches(query, xid) else None
+
+    def refresh_tree(self):
+        """清空并重建分组树"""
+        self.store.clear()
+        self.build_tree()
+
+    def on_registry_changed(self, kind, xid, info):
+        """窗口增删改：合并到一次空闲回调里重建"""
+        if kind == 'active':
+            return
+        if kind == 'removed':
+            self.unindex_window(xid)
+            thumbnails.forget(xid)
+        else:
+            self.index_window(info)
+        if self._rebuild_id is None:
+            self._rebuild_id = GLib.idle_add(self._rebuild_from_registry)
+
+    def _rebuild_from_registry(self):
+        self._rebuild_id = None
+        if not self.visible:
+            return False  # 隐藏时不重建，显示时再从内存建
+        self.update_groups()
+        self.refresh_tree()
+        return False
+
+    def on_app_names_changed(self, rules):
+        """应用名规则变化：重新编译，重建索引和分组"""
+        reload_rules(rules)
+        for win in self.registry.items():
+            self.index_window(win)
+        self.update_groups()
+        self.refresh_tree()
+
     def simplify_app_name(self, name):
         """简化应用名"""
-        name = name.lower()
-        
-        mappings = {
-            'google-chrome': 'Chrome',
-            'chromium-browser': 'Chrome',
-            'firefox': 'Firefox',
-            'nautilus': 'Files',
-            'org.gnome.Nautilus': 'Files',
-            'gnome-terminal-server': 'Terminal',
-            'org.gnome.Terminal': 'Terminal',
-            'guake': 'Guake',
-            'code': 'VS Code',
-            'jetbrains-idea-ce': 'IDEA',
-            'jetbrains-idea': 'IDEA',
-            'pycharm': 'PyCharm',
-            'wechat': 'WeChat',
-            'qq': 'QQ',
-            'chrome': 'Chrome',
-            'spotify': 'Spotify',
-            'slack': 'Slack',
-            'discord': 'Discord',
-        }
-        
-        for key, value in mappings.items():
-            if key in name:
-                return value
-        
-        return name.capitalize()
+        return simplify_app_name(name)
 
     def build_tree(self):
         """构建分组树"""
         search = self.search_entry.get_text().lower()
         piter_list = []  # 保存所有分 iter 以便展开
+        last_iter = None  # 上次跳转的窗口
         
-        for app_name, names in sorted(self.groups.items()):
-            if search:
-                matched = [n for n in names if search in n.lower() or search in app_name.lower()]
-                if not matched:
-                    continue
-                names = matched
-            
-            if not names:
+        for app_name, wins in self.search_groups(search):
+            if not wins:
                 continue
             
-            piter = self.store.append(None, [f"📁 {app_name}", ""])
+            # 同一应用的图标只解码一次，之后每行复用缓存的 Pixbuf
+            icon = window_icon(wins[0][0])
+            label = app_name if icon is not None else f"📁 {app_name}"
+            piter = self.store.append(None, [label, "", 0, icon])
             piter_list.append(piter)
             
-            for name in names:
+            for xid, name in wins:
                 display_name = name[:45] + "..." if len(name) > 45 else name
-                self.store.append(piter, [f"  {display_name}", name])
+                citer = self.store.append(piter, [f"  {display_name}", name, xid, window_icon(xid)])
+                if last_iter is None and self.keys.get(xid) == self.history.latest:
+                    last_iter = citer
         
         # 默认展开所有分组
         for piter in piter_list:
@@ -366,31 +442,61 @@ class GroupyLiteWindow(Gtk.Window):
             self.tree.expand_row(path, False)
         
         # 自动选中上次选择的窗口
-        self.select_last()
-
-    def select_last(self):
-        """选中上次选择的窗口"""
-        if os.path.exists(LAST_FILE):
-            try:
-                with open(LAST_FILE, "r") as f:
-                    last_name = f.read().strip()
-                if last_name:
-                    # 查找并选中上次选择的窗口
-                    found = [False]
-                    def find_and_select(model, path, iter, data):
-                        name = model[iter][1]
-                        if name == last_name:
-                            self.tree.get_selection().select_iter(iter)
-                            self.tree.scroll_to_cell(path, None, True, 0, 0)
-                            found[0] = True
-                            return True
-                        return False
-                    
-                    self.store.foreach(find_and_select, None)
-                    if found[0]:
-                        return
-            except:
-                pass
+        self.select_last(last_iter)
+
+    def search_groups(self, search):
+        """按搜索词过滤后的分组 [(app_name, [(xid, name)])]"""
+        if not search:
+            return self.rank_groups(self.groups)
+        if SEARCH_MODE == "fuzzy":
+            return self.fuzzy_groups(search)
+        
+        # 子串匹配：只遍历索引命中的窗口
+        matched = [xid for xid in self.query_cache.search(search) if xid in self.entries]
+        matched.sort(key=self.positions.get)
+        groups = {}
+        for xid in matched:
+            app_name, name = self.entries[xid]
+            groups.setdefault(app_name, []).append((xid, name))
+        return self.rank_groups(groups)
+
+    def rank_groups(self, groups):
+        """常用的窗口和分组排在前面，没有历史的保持原顺序 (分组按名称)"""
+        if not self.frecency:
+            return sorted(groups.items())
+        frecency = self.frecency
+        ranked = []
+        for app_name, wins in groups.items():
+            wins = sorted(wins, key=lambda w: -frecency.get(w[0], 0))
+            ranked.append((-frecency.get(wins[0][0], 0) if wins else 0, app_name, wins))
+        ranked.sort(key=lambda item: item[:2])
+        return [(app_name, wins) for _, app_name, wins in ranked]
+
+    def fuzzy_groups(self, search):
+        """模糊匹配分数最高的 K 个窗口，分组按组内最高分排序"""
+        groups = {}
+        scores = self.query_cache.search(search)
+        boosted = [xid for xid in self.frecency if xid in scores]
+        if boosted:
+            # 查询缓存中的结果不能原地修改
+            scores = dict(scores)
+            for xid in boosted:
+                rank = self.frecency[xid]
+                scores[xid] += HISTORY_BONUS * rank / (rank + 1)
+        for score, xid in self.matcher.best(scores, FUZZY_TOP_K):
+            if xid not in self.entries:
+                continue
+            app_name, name = self.entries[xid]
+            groups.setdefault(app_name, []).append((xid, name))
+        return list(groups.items())
+
+    def select_last(self, last_iter=None):
+        """选中上次选择的窗口 (build_tree 建树时已找到)，没有则选中第一个"""
+        if last_iter is not None:
+            self.tree.get_selection().select_iter(last_iter)
+            path = self.store.get_path(last_iter)
+            self.tree.scroll_to_cell(path, None, True, 0, 0)
+            return
         
         # 没有上次选择，选中第一个可跳转的窗口
         self.select_first()
@@ -408,67 +514,107 @@ class GroupyLiteWindow(Gtk.Window):
         self.store.foreach(find_first, None)
 
     def on_search(self, widget):
-        """实时搜索"""
-        self.load_windows(None)
+        """实时搜索 (只读内存，不重新枚举窗口)"""
+        self.refresh_tree()
 
     def on_select(self, selection):
         """选择"""
         model, treeiter = selection.get_selected()
         if treeiter:
             name = model[treeiter][1]
-            if name:
-                pass  # 准备好跳转
+            self.show_preview(model[treeiter][2] if name else None)
+        else:
+            self.show_preview(None)
+
+    def show_preview(self, xid):
+        """切换缩略图到 xid (None 隐藏)，只刷新选中的这一张"""
+        if xid == self.preview_xid:
+            return
+        if self.preview_xid is not None:
+            thumbnails.hide(self.preview_xid)
+        self.preview_xid = xid
+        surface = thumbnails.show(xid, self.on_thumbnail, selected=True) if xid else None
+        if surface is not None:
+            self.on_thumbnail(xid, surface)
+        else:
+            self.preview.hide()
+
+    def on_thumbnail(self, xid, surface):
+        """抓到新的缩略图"""
+        if xid != self.preview_xid:
+            return
+        self.preview.set_from_surface(surface)
+        self.preview.show()
 
     def on_double_click(self, tree, path, column):
         """双击跳转"""
         model = tree.get_model()
         treeiter = model.get_iter(path)
         if treeiter:
-            name = model[treeiter][1]
+            name, xid = model[treeiter][1], model[treeiter][2]
             if name:
-                self.goto_window(name)
+                self.goto_window(name, xid)
                 self.hide()
                 self.visible = False
 
-    def goto_window(self, name):
-        """跳转并退出"""
+    def goto_window(self, name, xid):
+        """按 XID 激活窗口，确认焦点切换后隐藏或退出"""
         print(f"跳转: {name}")
         
-        # 保存选择
-        try:
-            with open(LAST_FILE, "w") as f:
-                f.write(name)
-        except:
-            pass
+        # 记入激活历史 (内存中，稍后批量写入)
+        key = self.keys.get(xid)
+        if key is not None:
+            self.history.record(key)
+            self.update_frecency()
         
         try:
-            import subprocess
-            subprocess.run(['wmctrl', '-a', name], capture_output=True, timeout=1)
+            if not activate_window(xid, user_time(self)):
+                print("窗口管理器未确认焦点切换")
+            if self.daemon:
+                print("成功，隐藏")
+                # 等待回复期间收到的 X 事件已进入队列，交给注册表处理
+                if self.registry.watching:
+                    GLib.idle_add(self.registry.process_events)
+                self.dismiss()
+                return
             print("成功，退出")
+            self.history.flush()
             Gtk.main_quit()
             sys.exit(0)
         except Exception as e:
             print(f"失败: {e}")
 
-if __name__ == "__main__":
-    install_desktop_shortcut()
+
+def main():
+    # --daemon: 常驻后台，由 groupy_ctl.py 通过 socket 呼出弹窗
+    daemon = "--daemon" in sys.argv
+    # 已有实例时转交的请求: show / toggle / query / hide / quit
+    command = next((a for a in sys.argv[1:] if not a.startswith("-")), "show")
     try:
         # 单例检查
-        if not check_single_instance():
+        if not check_single_instance(command):
             sys.exit(0)
         
         print("启动 Groupy Lite...")
         print("快捷键: ↑↓ 导航 | Enter 跳转 | Esc 隐藏 | Super+1 启动")
         print("记住上次选择，开机自动选中")
         
-        win = GroupyLiteWindow()
+        # 拿到锁后立即监听，窗口建好之前收到的请求先排队
+        server = IpcServer()
+        server.start()
+        
+        win = GroupyLiteWindow(daemon=daemon)
+        # 后续启动通过 socket 把请求转交给本实例
+        server.set_handler(win.on_command)
+        if daemon:
+            print("常驻模式: 使用 groupy_ctl.py show 显示弹窗")
+            if "--show" in sys.argv:
+                win.show_popup()
         
         def cleanup():
-            """清理"""
-            try:
-                os.remove(LOCK_FILE)
-            except:
-                pass
+            """清理 (锁文件保留，锁随进程退出释放)"""
+            server.stop()
+            win.history.flush()
         
         import atexit
         atexit.register(cleanup)
@@ -480,5 +626,5 @@ if __name__ == "__main__":
         sys.exit(1)
 
 
-# ============================================================
-# 桌面快捷方式安装（首次运行）
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Groupy AppName - 应用名规范化与解析缓存
+
+AppNameNormalizer 由内置规则加配置中的 "app_names" 编译成一个正则，
+在类名中取最长的命中规则，结果按原始类名缓存。
+
+窗口的 WM_CLASS 在其生命周期内不会变化，AppNameCache 按 XID 缓存 WM_CLASS
+以及简化后的应用名。窗口关闭时移除，总数有上限 (LRU)。
+"""
+
+import re
+from collections import OrderedDict
+
+import groupy_x11
+
+CACHE_SIZE = 1024
+
+# 内置规则: 类名中包含的关键字 -> 显示名 (不区分大小写)
+BUILTIN_RULES = {
+    'google-chrome': 'Chrome',
+    'chromium-browser': 'Chrome',
+    'chrome': 'Chrome',
+    'firefox': 'Firefox',
+    'nautilus': 'Files',
+    'org.gnome.nautilus': 'Files',
+    'gnome-terminal-server': 'Terminal',
+    'org.gnome.terminal': 'Terminal',
+    'guake': 'Guake',
+    'code': 'VS Code',
+    'jetbrains-idea-ce': 'IDEA',
+    'jetbrains-idea': 'IDEA',
+    'pycharm': 'PyCharm',
+    'wechat': 'WeChat',
+    'qq': 'QQ',
+    'dingtalk': 'DingTalk',
+    'lark': 'Lark',
+    'feishu': 'FeiShu',
+    'spotify': 'Spotify',
+    'slack': 'Slack',
+    'discord': 'Discord',
+}
+
+
+class AppNameNormalizer:
+    """编译后的应用名规范化规则，最长关键字优先"""
+
+    def __init__(self, rules=None, memo_size=CACHE_SIZE):
+        merged = {k.lower(): v for k, v in BUILTIN_RULES.items()}
+        for key, value in (rules or {}).items():
+            if key and value:
+                merged[key.lower()] = value
+        self.rules = merged
+        self.memo_size = memo_size
+        self.memo = {}  # 原始类名 -> 结果
+        # 长的关键字放前面，同一位置上先命中最长的
+        keys = sorted(merged, key=len, reverse=True)
+        alternation = '|'.join(re.escape(k) for k in keys)
+        # 零宽前瞻让每个位置都尝试匹配，关键字之间可以重叠
+        self.pattern = re.compile(f'(?=({alternation}))') if keys else None
+
+    @classmethod
+    def from_config(cls, config=None):
+        """由配置 (dict) 或共享配置中的 "app_names" 创建"""
+        if config is None:
+            from groupy_config import get_config
+            config = get_config()
+        rules = config.get("app_names") if hasattr(config, 'get') else None
+        return cls(rules if isinstance(rules, dict) else None)
+
+    def normalize(self, name):
+        """类名 -> 显示名"""
+        result = self.memo.get(name)
+        if result is not None:
+            return result
+        result = self._normalize(name)
+        if len(self.memo) >= self.memo_size:
+            self.memo.clear()
+        self.memo[name] = result
+        return result
+
+    def _normalize(self, name):
+        lowered = name.lower()
+        best = None
+        if self.pattern is not None:
+            for m in self.pattern.finditer(lowered):
+                key = m.group(1)
+                if best is None or len(key) > len(best):
+                    best = key
+        if best is not None:
+            return self.rules[best]
+        # 首字母大写
+        return lowered.capitalize()
+
+
+_normalizer = None
+
+
+def get_normalizer():
+    """进程内共享的规范化引擎 (首次使用时编译)"""
+    global _normalizer
+    if _normalizer is None:
+        _normalizer = AppNameNormalizer.from_config()
+    return _normalizer
+
+
+def reload_rules(config=None):
+    """配置变化后重新编译规则，并丢弃已缓存的简化结果
+
+    config 可以是 dict 或 "app_names" 的订阅回调传入的规则 (None 表示重新读取共享配置)
+    """
+    global _normalizer
+    if isinstance(config, dict) and "app_names" not in config:
+        config = {"app_names": config}
+    _normalizer = AppNameNormalizer.from_config(config)
+    app_names.clear_app_names()
+
+
+def simplify_app_name(name):
+    """简化应用名"""
+    return get_normalizer().normalize(name)
+
+
+class AppNameCache:
+    """按 XID 缓存 (WM_CLASS, 简化应用名)"""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # xid -> [WM_CLASS, 简化名或 None]
+        self.hits = 0
+        self.misses = 0
+        self.lookups = 0    # 实际向 X / xprop 查询 WM_CLASS 的次数
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, xid):
+        return xid in self.entries
+
+    def stats(self):
+        """命中统计"""
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'lookups': self.lookups,
+            'evictions': self.evictions,
+        }
+
+    def _store(self, xid, wm_class):
+        self.entries[xid] = [wm_class, None]
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def wm_classes(self, xids, fetch=True):
+        """批量获取 WM_CLASS，未缓存的合并成一次批量查询
+
+        查询超时的窗口返回 None 且不缓存，下次再查；fetch=False 时只读缓存。
+        在主线程中首选来源要等 xprop 子进程时也只读缓存，由调用方交给工作线程。
+        """
+        result = {}
+        missing = []
+        for xid in xids:
+            entry = self.entries.get(xid)
+            if entry is None:
+                self.misses += 1
+                missing.append(xid)
+            else:
+                self.hits += 1
+                self.entries.move_to_end(xid)
+                result[xid] = entry[0]
+        if missing and fetch:
+            from groupy_sources import sources
+            fetch = not sources.would_block()
+        if missing and fetch:
+            self.lookups += len(missing)
+            fetched = groupy_x11.get_app_names(missing)
+            for xid, wm_class in fetched.items():
+                self._store(xid, wm_class)
+        else:
+            fetched = {}
+        for xid in missing:
+            result[xid] = fetched.get(xid)
+        return result
+
+    def store_classes(self, classes):
+        """加入后台线程查到的 {xid: WM_CLASS} (已缓存的不覆盖)"""
+        for xid, wm_class in classes.items():
+            if xid not in self.entries:
+                self.lookups += 1
+                self._store(xid, wm_class)
+
+    def cached_wm_class(self, xid):
+        """已缓存的 WM_CLASS，没有时返回 None (不查询、不计入统计)"""
+        entry = self.entries.get(xid)
+        return entry[0] if entry is not None else None
+
+    def wm_class(self, xid):
+        """单个窗口的 WM_CLASS"""
+        return self.wm_classes([xid])[xid]
+
+    def app_name(self, xid, simplify):
+        """简化后的应用名，simplify 结果也一起缓存"""
+        entry = self.entries.get(xid)
+        if entry is None:
+            self.wm_class(xid)
+            entry = self.entries.get(xid)
+            if entry is None:
+                return simplify("Unknown")  # 查询超时，不缓存
+        else:
+            self.hits += 1
+            self.entries.move_to_end(xid)
+        if entry[1] is None:
+            entry[1] = simplify(entry[0] or "Unknown")
+        return entry[1]
+
+    def evict(self, xid):
+        """窗口关闭时移除"""
+        if self.entries.pop(xid, None) is not None:
+            self.evictions += 1
+
+    def retain(self, xids):
+        """只保留给定窗口，其余视为已关闭"""
+        xids = set(xids)
+        for xid in [x for x in self.entries if x not in xids]:
+            self.evict(xid)
+
+    def clear_app_names(self):
+        """简化规则变化时丢弃简化结果 (保留 WM_CLASS)"""
+        for entry in self.entries.values():
+            entry[1] = None
+
+
+# 进程内共享的缓存
+app_names = AppNameCache()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Groupy Async - 在工作线程中枚举窗口，不阻塞 GTK 主循环
+
+wmctrl / xprop 子进程和 X 往返都放到一个工作线程里，结果经 GLib.idle_add
+回到主线程。同一时刻只保留最新的任务：新任务开始时取消正在运行的旧任务、
+丢弃排队的旧任务，旧任务已发出的结果 (包括部分结果) 到达主线程时按代号丢弃。
+"""
+
+import queue
+import threading
+
+import groupy_x11
+from groupy_appname import app_names
+
+CLASS_BATCH = 16  # 子进程方式每查到多少个窗口的 WM_CLASS 发出一次部分结果
+RETRY_DELAY = 2  # 秒，xprop 超时的窗口隔多久重新查询
+
+
+def _report_error(error):
+    print(f"后台枚举错误: {error}")
+
+
+class AsyncLoader:
+    """单个工作线程 + 按代号取消的任务队列"""
+
+    def __init__(self, name="groupy-loader"):
+        self.name = name
+        self.generation = 0
+        self.pending = None  # 尚未交付最终结果的任务代号
+        self._cancelled = threading.Event()
+        self._jobs = queue.Queue()
+        self._thread = None
+
+    def start(self, job, on_done=None, on_partial=None, on_error=None):
+        """在工作线程中运行 job(emit, cancelled)，返回任务代号
+
+        job 的返回值交给 on_done，emit(部分结果) 交给 on_partial，
+        cancelled 为 threading.Event，较新的任务开始后被置位。
+        回调都在主线程中执行。
+        """
+        self.cancel()
+        while True:
+            try:
+                self._jobs.get_nowait()  # 还没开始的旧任务直接丢弃
+            except queue.Empty:
+                break
+        self._jobs.put((self.generation, self._cancelled, job,
+                        on_done, on_partial, on_error or _report_error))
+        self.pending = self.generation
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self.generation
+
+    def cancel(self):
+        """取消当前任务，已发出的结果也不再交付"""
+        self.generation += 1
+        self.pending = None
+        self._cancelled.set()
+        self._cancelled = threading.Event()
+
+    def _run(self):
+        from gi.repository import GLib
+
+        while True:
+            generation, cancelled, job, on_done, on_partial, on_error = self._jobs.get()
+            if cancelled.is_set():
+                continue
+
+            def emit(value, generation=generation, callback=on_partial):
+                GLib.idle_add(self._deliver, generation, callback, value, False)
+
+            try:
+                result = job(emit, cancelled)
+            except Exception as e:
+                GLib.idle_add(self._deliver, generation, on_error, e, True)
+                continue
+            if not cancelled.is_set():
+                GLib.idle_add(self._deliver, generation, on_done, result, True)
+
+    def _deliver(self, generation, callback, value, final):
+        if generation != self.generation:
+            return False
+        if final:
+            self.pending = None
+        if callback is not None:
+            callback(value)
+        return False
+
+
+def enumerate_job(emit, cancelled, cache=app_names):
+    """工作线程: 列出窗口，只为缓存中没有的窗口查询 WM_CLASS
+
+    返回 (窗口列表, {xid: WM_CLASS}, 是否完整)；子进程方式较慢，
+    每查到 CLASS_BATCH 个窗口发出一次部分结果。超过截止时间的窗口不在
+    结果中，由调用方显示为 Unknown 并稍后重试 (见 unresolved)。被取消时返回 None。
+    """
+    windows = groupy_x11.list_windows(with_class=False)
+    missing = [w['xid'] for w in windows if w['xid'] not in cache]
+    sent = [0]
+
+    def progress(classes):
+        if CLASS_BATCH <= len(classes) - sent[0] and len(classes) < len(missing):
+            sent[0] = len(classes)
+            emit((windows, dict(classes), False))
+
+    classes = {}
+    if missing:
+        classes = groupy_x11.get_app_names(missing, progress=progress, cancelled=cancelled)
+    if cancelled.is_set():
+        return None
+    return windows, classes, True
+
+
+def unresolved(windows, cache=app_names):
+    """完整结果中仍没有 WM_CLASS 的窗口 (xprop 超时)"""
+    return [w['xid'] for w in windows if w['xid'] not in cache]
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Groupy - 统一启动入口
+
+用法: groupy [变体] [参数...]
+      groupy --install-desktop
+      groupy --profile-startup [--profile-output 文件] [变体] [参数...]
+
+先只用标准库解析参数，确定变体后才导入 gi / GTK / Wnck。
+切换器已在常驻时，show/toggle 等请求直接走 socket，不加载 GTK。
+
+--profile-startup 统计各阶段耗时 (解释器启动、gi 导入、GTK 初始化、
+首次枚举、首帧)，首帧绘制后写入 JSON 并退出。
+"""
+
+import os
+import sys
+
+import groupy_profile
+
+# 变体名 -> (模块, 说明)
+VARIANTS = {
+    "switcher": ("groupy", "树形切换器 (默认)"),
+    "tabs": ("main", "标签页嵌入窗口"),
+    "lite": ("groupy_lite", "列表版"),
+    "group": ("groupy_group", "分组树"),
+    "simple": ("groupy_simple", "按钮列表"),
+    "gnome": ("groupy_gnome", "Wnck 按钮列表"),
+    "combo": ("groupy_combo", "下拉框"),
+    "stable": ("groupy_stable", "下拉框 (稳定版)"),
+    "ctl": ("groupy_ctl", "常驻切换器的客户端"),
+}
+DEFAULT_VARIANT = "switcher"
+# 不需要 GTK 的变体
+NO_GTK = ("ctl",)
+
+PROFILE_FILE = os.path.expanduser("~/.cache/groupy/startup-profile.json")
+PROFILE_TIMEOUT = 10  # 秒，超时仍未绘制首帧时也写出报告
+
+
+def install_desktop_shortcut():
+    """创建应用菜单快捷方式 (groupy --install-desktop)"""
+    desktop_file = os.path.expanduser("~/.local/share/applications/groupy.desktop")
+
+    # 检查是否已安装
+    if os.path.exists(desktop_file):
+        print(f"已存在: {desktop_file}")
+        return
+
+    content = """[Desktop Entry]
+Name=Groupy
+Comment=窗口标签化管理工具
+Exec=/home/lijiang/code/groupy/run_groupy.sh
+Icon=utilities-terminal
+Terminal=false
+Type=Application
+Categories=Utility;
+StartupNotify=true
+"""
+
+    try:
+        os.makedirs(os.path.dirname(desktop_file), exist_ok=True)
+        with open(desktop_file, 'w') as f:
+            f.write(content)
+        print(f"已安装应用菜单: {desktop_file}")
+    except Exception as e:
+        print(f"无法创建快捷方式: {e}")
+
+
+def usage():
+    print(__doc__.strip())
+    print("\n变体:")
+    for name, (module, desc) in VARIANTS.items():
+        print(f"  {name:<10}{module + '.py':<18}{desc}")
+
+
+def parse_args(argv):
+    """返回 (变体, 传给变体的参数, 选项)；只认识入口自己的选项，其余原样转交"""
+    options = {'profile': False, 'output': PROFILE_FILE, 'install': False, 'help': False}
+    rest = []
+    variant = None
+    args = iter(argv)
+    for arg in args:
+        if arg == "--profile-startup":
+            options['profile'] = True
+        elif arg == "--profile-output":
+            options['output'] = next(args, PROFILE_FILE)
+        elif arg == "--install-desktop":
+            options['install'] = True
+        elif arg in ("-h", "--help") and variant is None:
+            options['help'] = True
+        elif variant is None and arg in VARIANTS:
+            variant = arg
+        else:
+            rest.append(arg)
+    return variant or DEFAULT_VARIANT, rest, options
+
+
+def try_running_switcher(rest):
+    """切换器已常驻时直接转交请求，返回是否已处理"""
+    if "--daemon" in rest:
+        return False
+    from groupy_ipc import send_command
+    command = next((a for a in rest if not a.startswith("-")), "show")
+    reply = send_command(command)
+    if reply is None:
+        return False
+    if command == "query":
+        print(reply)
+    return True
+
+
+def import_gtk():
+    """导入 GTK 并打点 (PyGObject 在导入 Gtk 时完成 gtk_init)"""
+    import gi
+    gi.require_version('Gtk', '3.0')
+    from gi.repository import GLib, GObject  # noqa: F401
+    groupy_profile.mark("gi_import")
+    from gi.repository import Gtk
+    groupy_profile.mark("gtk_init")
+    return Gtk
+
+
+def watch_first_frame(variant, output):
+    """等到第一个可见的顶层窗口绘制完成后写出报告并退出"""
+    from gi.repository import Gio, GLib, Gtk
+
+    state = {'done': False}
+
+    def finish(reason):
+        if state['done']:
+            return False
+        state['done'] = True
+        data = groupy_profile.write_report(output, variant=variant, reason=reason)
+        print("启动耗时 (毫秒):")
+        for phase, ms in data['phases'].items():
+            print(f"  {phase:<20}{ms:>10.1f}  (+{data['durations'][phase]:.1f})")
+        print(f"已写入 {output}")
+        app = Gio.Application.get_default()
+        if app is not None:
+            app.quit()
+        else:
+            Gtk.main_quit()
+        return False
+
+    def on_draw(widget, cr):
+        # 绘制信号处理完后的下一个空闲时刻即首帧已提交
+        groupy_profile.mark("first_frame")
+        GLib.idle_add(finish, "first_frame")
+        return False
+
+    def find_toplevel():
+        # 窗口可能在主循环启动后才创建 (Gtk.Application 的 activate)
+        if state['done']:
+            return False
+        for window in Gtk.Window.list_toplevels():
+            if window.get_visible() and window.get_window_type() == Gtk.WindowType.TOPLEVEL:
+                window.connect_after("draw", on_draw)
+                return False
+        return True
+
+    # 优先级高于重绘，确保在第一次绘制前连上信号
+    GLib.idle_add(find_toplevel, priority=GLib.PRIORITY_HIGH)
+    GLib.timeout_add_seconds(PROFILE_TIMEOUT, finish, "timeout")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    variant, rest, options = parse_args(argv)
+    if options['profile']:
+        groupy_profile.enable()
+
+    if options['help']:
+        usage()
+        return 0
+    if options['install']:
+        install_desktop_shortcut()
+        return 0
+
+    # 常驻切换器已在运行：不加载 GTK，几毫秒内返回
+    if variant == DEFAULT_VARIANT and not options['profile'] and try_running_switcher(rest):
+        return 0
+
+    module_name = VARIANTS[variant][0]
+    if variant not in NO_GTK:
+        import_gtk()
+        if options['profile']:
+            watch_first_frame(variant, options['output'])
+
+    import importlib
+    module = importlib.import_module(module_name)
+    groupy_profile.mark("variant_import")
+
+    # 变体按自己的命令行解析剩余参数
+    sys.argv = [module.__file__] + rest
+    return module.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
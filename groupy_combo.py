@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
-"""Groupy Lite - 纯 wmctrl 版"""
+"""Groupy Lite - 下拉框版"""
 
 import sys
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
 
+import groupy_profile
+from groupy_x11 import activate_window, list_windows, user_time
+from groupy_async import AsyncLoader
+
 APP_NAME = "Groupy Lite"
 
 class GroupyLiteWindow(Gtk.Window):
@@ -13,6 +17,8 @@ class GroupyLiteWindow(Gtk.Window):
         Gtk.Window.__init__(self, title=APP_NAME)
         self.set_default_size(300, 400)
 
+        self.loader = AsyncLoader()  # 枚举在后台线程运行
+
         vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         self.add(vbox)
 
@@ -43,23 +49,35 @@ class GroupyLiteWindow(Gtk.Window):
         self.load_windows(None)
 
     def load_windows(self, widget):
-        """加载窗口列表"""
+        """加载窗口列表 (后台枚举，不阻塞界面)"""
+        self.loader.start(lambda emit, cancelled: self.list_titles(),
+                          self.show_windows, on_error=self.show_error)
+
+    def list_titles(self):
+        """工作线程: 返回 [(wid, 标题)]"""
+        titles = []
+        for win in list_windows(with_class=False):
+            name = win['name']
+            if name and 'N/A' not in name:
+                titles.append((win['id'], name))
+        return titles
+
+    def show_error(self, e):
+        print(f"错误: {e}")
+        self.combo.remove_all()
+        self.combo.append_text(f"错误: {e}")
+
+    def show_windows(self, titles):
+        """主线程: 填充下拉框"""
         self.combo.remove_all()
         
         try:
-            import subprocess
-            result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True, timeout=2)
-            
             count = 0
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        name = ' '.join(parts[3:])
-                        if name and 'N/A' not in name:
-                            self.combo.append_text(name)
-                            count += 1
+            for wid, name in titles:
+                self.combo.append(wid, name)  # id 为窗口 XID
+                count += 1
             
+            groupy_profile.mark("first_enumeration")
             print(f"加载了 {count} 个窗口")
             
             if count > 0:
@@ -81,16 +99,22 @@ class GroupyLiteWindow(Gtk.Window):
             print(f"跳转: {name}")
             
             try:
-                import subprocess
-                subprocess.run(['wmctrl', '-a', name], capture_output=True, timeout=1)
-                print("成功")
+                if activate_window(self.combo.get_active_id(), user_time(self)):
+                    print("成功")
+                else:
+                    print("窗口管理器未确认焦点切换")
             except Exception as e:
                 print(f"失败: {e}")
 
-if __name__ == "__main__":
+
+def main():
     try:
         win = GroupyLiteWindow()
         Gtk.main()
     except Exception as e:
         print(f"错误: {e}")
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
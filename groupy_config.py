@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Groupy Config - 各变体共享的配置
+
+~/.config/groupy/config.json 在进程内只解析一次，按 SCHEMA 校验
+(类型不对的值用默认值代替，不认识的键原样保留)。watch() 之后用
+Gio.FileMonitor 监听外部修改，重新读取后只通知值真正变化的键的订阅者。
+
+set() 修改后延迟一小段时间合并写入 (临时文件 + rename)，退出前 flush()。
+"""
+
+import copy
+import json
+import os
+
+CONFIG_FILE = os.path.expanduser("~/.config/groupy/config.json")
+SAVE_DELAY = 300  # 毫秒，合并连续修改
+RELOAD_DELAY = 100  # 毫秒，编辑器保存时可能先截断再写入，等写完再读
+
+TAB_POSITIONS = ("top", "bottom", "left", "right")
+WINDOW_SOURCES = ("auto", "xlib", "wmctrl", "wnck")
+EMBED_EVICT = ("snapshot", "desktop")
+
+
+def _string_list(value):
+    if not isinstance(value, list):
+        raise ValueError("应为字符串列表")
+    return [str(v) for v in value if isinstance(v, str) and v.strip()]
+
+
+def _tab_position(value):
+    if value not in TAB_POSITIONS:
+        raise ValueError(f"应为 {' / '.join(TAB_POSITIONS)}")
+    return value
+
+
+def _window_source(value):
+    if value not in WINDOW_SOURCES:
+        raise ValueError(f"应为 {' / '.join(WINDOW_SOURCES)}")
+    return value
+
+
+def _embed_evict(value):
+    if value not in EMBED_EVICT:
+        raise ValueError(f"应为 {' / '.join(EMBED_EVICT)}")
+    return value
+
+
+def _string_map(value):
+    if not isinstance(value, dict):
+        raise ValueError("应为 {关键字: 显示名}")
+    return {str(k): str(v) for k, v in value.items() if k and v}
+
+
+def _at_least(minimum, kind):
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("应为数字")
+        return max(minimum, kind(value))
+    return check
+
+
+# 键 -> (默认值, 校验函数: 返回规范化后的值，无效时抛 ValueError)
+SCHEMA = {
+    "whitelist": ([], _string_list),
+    "tab_position": ("top", _tab_position),
+    "app_names": ({}, _string_map),
+    "xprop_parallel": (8, _at_least(1, int)),
+    "xprop_deadline": (1.5, _at_least(0.1, float)),
+    "window_source": ("auto", _window_source),
+    "embed_limit": (4, _at_least(1, int)),
+    "embed_evict": ("snapshot", _embed_evict),
+}
+
+
+def validate(data):
+    """按 SCHEMA 校验，返回新的 dict (无效值换成默认值)"""
+    if not isinstance(data, dict):
+        print("配置文件格式错误: 顶层应为对象")
+        data = {}
+    result = dict(data)
+    for key, (default, check) in SCHEMA.items():
+        if key not in data:
+            continue
+        try:
+            result[key] = check(data[key])
+        except ValueError as e:
+            print(f"配置项 {key} 无效 ({e})，使用默认值")
+            result[key] = copy.deepcopy(default)
+    return result
+
+
+class Config:
+    """解析一次、可监听外部修改、延迟写入的配置"""
+
+    def __init__(self, path=CONFIG_FILE):
+        self.path = path
+        self.data = {}
+        self.subscribers = {}  # key -> [callback(value)]
+        self.dirty = False
+        self._written = None  # 自己最后写入的内容，监听到时跳过
+        self._monitor = None
+        self._save_id = None
+        self._reload_id = None
+        self.data = self._read() or {}
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                text = f.read()
+        except Exception as e:
+            print(f"读取配置失败: {e}")
+            return {}
+        if text == self._written:
+            return None
+        try:
+            return validate(json.loads(text))
+        except ValueError as e:
+            print(f"配置文件格式错误: {e}")
+            return None
+
+    def get(self, key, default=None):
+        """配置值；没有设置时取 default，再取 SCHEMA 中的默认值"""
+        if key in self.data:
+            return self.data[key]
+        if default is not None or key not in SCHEMA:
+            return default
+        return copy.deepcopy(SCHEMA[key][0])
+
+    def set(self, key, value):
+        """修改一项并通知订阅者，稍后写入文件"""
+        self.update({key: value})
+
+    def update(self, values):
+        """修改多项，只通知值变化的键"""
+        new = validate(dict(self.data, **values))
+        changed = [k for k in values if new.get(k) != self.data.get(k)]
+        if not changed:
+            return
+        self.data = new
+        self.dirty = True
+        self._schedule_save()
+        self._notify(changed)
+
+    def subscribe(self, key, callback):
+        """key 的值变化时调用 callback(新值)"""
+        self.subscribers.setdefault(key, []).append(callback)
+
+    def unsubscribe(self, key, callback):
+        callbacks = self.subscribers.get(key, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def _notify(self, keys):
+        for key in keys:
+            value = self.get(key)
+            for callback in list(self.subscribers.get(key, [])):
+                try:
+                    callback(value)
+                except Exception as e:
+                    print(f"配置回调错误 ({key}): {e}")
+
+    # ---------- 监听外部修改 ----------
+
+    def watch(self):
+        """监听配置文件 (需在主线程调用，回调在主循环中执行)"""
+        if self._monitor is not None:
+            return
+        try:
+            from gi.repository import Gio
+            gfile = Gio.File.new_for_path(self.path)
+            self._monitor = gfile.monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+            self._monitor.connect("changed", self._on_file_changed)
+        except Exception as e:
+            print(f"无法监听配置文件: {e}")
+
+    def _on_file_changed(self, monitor, gfile, other, event):
+        from gi.repository import Gio, GLib
+        if event not in (Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+                         Gio.FileMonitorEvent.CREATED,
+                         Gio.FileMonitorEvent.DELETED,
+                         Gio.FileMonitorEvent.RENAMED,
+                         Gio.FileMonitorEvent.MOVED_IN):
+            return
+        if self._reload_id is None:
+            self._reload_id = GLib.timeout_add(RELOAD_DELAY, self._on_reload_timeout)
+
+    def _on_reload_timeout(self):
+        self._reload_id = None
+        self.reload()
+        return False
+
+    def reload(self):
+        """重新读取文件，通知变化的键 (外部修改优先于尚未写入的修改)"""
+        new = self._read()
+        if new is None:
+            return  # 自己写入的，或文件写到一半
+        old = self.data
+        changed = [k for k in set(old) | set(new) if old.get(k) != new.get(k)]
+        self.data = new
+        if self._save_id is not None:
+            from gi.repository import GLib
+            GLib.source_remove(self._save_id)
+            self._save_id = None
+        self.dirty = False
+        if changed:
+            print(f"配置已更新: {', '.join(sorted(changed))}")
+            self._notify(changed)
+
+    # ---------- 写入 ----------
+
+    def _schedule_save(self):
+        if self._save_id is not None:
+            return
+        try:
+            from gi.repository import GLib
+        except ImportError:
+            self.flush()
+            return
+        self._save_id = GLib.timeout_add(SAVE_DELAY, self._on_save_timeout)
+
+    def _on_save_timeout(self):
+        self._save_id = None
+        self.flush()
+        return False
+
+    def flush(self):
+        """有修改时立即写入"""
+        if not self.dirty:
+            return
+        text = json.dumps(self.data, indent=2, ensure_ascii=False)
+        tmp = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, 'w') as f:
+                f.write(text)
+            os.replace(tmp, self.path)
+            self._written = text
+            self.dirty = False
+        except Exception as e:
+            print(f"保存配置失败: {e}")
+
+
+_config = None
+
+
+def get_config():
+    """进程内共享的配置 (首次使用时读取，退出时写入未保存的修改)"""
+    global _config
+    if _config is None:
+        _config = Config()
+        import atexit
+        atexit.register(_config.flush)
+    return _config
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Groupy Ctl - 常驻切换器的轻量客户端
+
+只导入标准库，通过 UNIX socket 通知常驻进程显示弹窗，适合绑定到 Super+1。
+没有常驻进程时自动以 --daemon 启动一个并显示。
+
+用法: groupy_ctl.py [show|hide|toggle|query|quit]
+"""
+
+import os
+import subprocess
+import sys
+
+from groupy_ipc import send_command
+
+COMMANDS = ("show", "hide", "toggle", "query", "quit")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    if command not in COMMANDS:
+        print(__doc__.strip())
+        return 2
+
+    reply = send_command(command)
+    if reply is not None:
+        if command == "query":
+            print(reply)
+        return 0
+    if command in ("hide", "query", "quit"):
+        return 1 if command == "query" else 0
+
+    # 没有常驻进程：后台启动一个，启动后自动显示
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "groupy.py")
+    subprocess.Popen([sys.executable, script, "--daemon", "--show"],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Groupy Embed - 嵌入窗口的数量上限
+
+标签页第一次被切换到时才嵌入窗口 (XEmbed)。同时嵌入的窗口数有上限，
+超过时卸下最久没有查看的：窗口放回桌面，或隐藏并在标签中显示快照，
+再次切换到该标签时重新嵌入。标签再多，同时在重绘的客户端也只有上限个。
+"""
+
+from collections import OrderedDict
+
+DEFAULT_LIMIT = 4
+
+
+class EmbedBudget:
+    """已嵌入窗口按查看时间排列 (LRU)，超过上限时给出要卸下的窗口"""
+
+    def __init__(self, limit=DEFAULT_LIMIT):
+        self.limit = max(1, limit)
+        self.live = OrderedDict()  # xid -> None，最近查看的在后
+        self.embeds = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.live)
+
+    def __contains__(self, xid):
+        return xid in self.live
+
+    def stats(self):
+        return {
+            'live': len(self.live),
+            'limit': self.limit,
+            'embeds': self.embeds,
+            'evictions': self.evictions,
+        }
+
+    def viewed(self, xid):
+        """xid 被查看 (需要时嵌入)，返回因此要卸下的窗口"""
+        if xid in self.live:
+            self.live.move_to_end(xid)
+        else:
+            self.live[xid] = None
+            self.embeds += 1
+        return self._over(keep=xid)
+
+    def set_limit(self, limit):
+        """修改上限，返回超出的窗口"""
+        self.limit = max(1, limit)
+        return self._over()
+
+    def discard(self, xid):
+        """窗口已卸下或关闭"""
+        self.live.pop(xid, None)
+
+    def _over(self, keep=None):
+        evicted = []
+        for xid in list(self.live):
+            if len(self.live) <= self.limit:
+                break
+            if xid == keep:
+                continue
+            del self.live[xid]
+            evicted.append(xid)
+            self.evictions += 1
+        return evicted
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Groupy Fuzzy - 带排序的模糊匹配
+
+子序列匹配，词首、驼峰、开头命中和连续命中加分，跳过字符扣分。
+有 NumPy 时把所有候选标题编码成二维数组，每个查询字符一次向量运算，
+一次批量算出全部分数，再用堆取前 K 个；没有 NumPy 时逐个计算。
+"""
+
+import heapq
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
+
+# 打分参数
+SCORE_MATCH = 16        # 每个命中字符
+BONUS_PREFIX = 12       # 命中文本第一个字符
+BONUS_BOUNDARY = 8      # 命中词首 (前一个字符是分隔符)
+BONUS_CAMEL = 7         # 命中驼峰大写 / 字母后的数字
+BONUS_CONSECUTIVE = 5   # 与上一个命中字符相邻
+PENALTY_GAP = 1         # 每跳过一个字符
+MAX_GAP_PENALTY = 8     # 单次跳过的最大扣分
+
+# 超出部分不参与匹配
+MAX_WIDTH = 256
+
+SEPARATORS = set(' \t-_./\\:|()[]{}<>,;@#"\'—·')
+
+
+def fold_case(text):
+    """逐字符转小写并保持长度 ('İ'.lower() 是两个字符，这类字符保留原样)
+
+    编码、位置加分和查找都按下标对应，长度变了会错位。
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def position_bonus(text):
+    """每个字符位置的加分"""
+    bonus = []
+    prev = ''
+    for i, ch in enumerate(text[:MAX_WIDTH]):
+        if i == 0:
+            b = BONUS_PREFIX
+        elif prev in SEPARATORS:
+            b = BONUS_BOUNDARY
+        elif (ch.isupper() and prev.islower()) or (ch.isdigit() and prev.isalpha()):
+            b = BONUS_CAMEL
+        else:
+            b = 0
+        bonus.append(b)
+        prev = ch
+    return bonus
+
+
+def _step_weight(bonus, pos, prev):
+    """命中 pos 位置相对上一个命中 prev 的得分"""
+    weight = SCORE_MATCH + bonus
+    if pos == prev + 1 and prev >= 0:
+        weight += BONUS_CONSECUTIVE
+    return weight - min(pos - prev - 1, MAX_GAP_PENALTY) * PENALTY_GAP
+
+
+def score_text(query, text, bonus=None):
+    """单个文本打分 (纯 Python)，不匹配返回 None
+
+    先从后往前求每个查询字符最晚可以落在哪里，保证后面的字符仍能匹配；
+    再从前往后在可行范围内挑得分最高的位置 (词首、驼峰优先)。
+    """
+    query = fold_case(query)
+    lowered = fold_case(text[:MAX_WIDTH])
+    if bonus is None:
+        bonus = position_bonus(text)
+
+    latest = []
+    end = len(lowered)
+    for ch in reversed(query):
+        end = lowered.rfind(ch, 0, end)
+        if end < 0:
+            return None
+        latest.append(end)
+    latest.reverse()
+
+    score = 0
+    prev = -1
+    for ch, last in zip(query, latest):
+        best_pos, best = -1, None
+        pos = lowered.find(ch, prev + 1, last + 1)
+        while pos >= 0:
+            weight = _step_weight(bonus[pos], pos, prev)
+            if best is None or weight > best:
+                best_pos, best = pos, weight
+            pos = lowered.find(ch, pos + 1, last + 1)
+        score += best
+        prev = best_pos
+    return score
+
+
+class FuzzyMatcher:
+    """批量模糊匹配器，候选按 key 增删，查询时一次打分全部"""
+
+    def __init__(self):
+        self.texts = {}  # key -> 文本
+        self._dirty = True
+        self._keys = []
+        self._order = {}
+        self._codes = None
+        self._bonus = None
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, key, text):
+        """添加或更新一个候选"""
+        if self.texts.get(key) != text:
+            self.texts[key] = text
+            self._dirty = True
+
+    def remove(self, key):
+        if self.texts.pop(key, None) is not None:
+            self._dirty = True
+
+    def clear(self):
+        self.texts.clear()
+        self._dirty = True
+
+    def _rebuild(self):
+        """候选变化后重新编码 (下次查询时才做)"""
+        self._keys = list(self.texts)
+        self._order = {key: i for i, key in enumerate(self._keys)}
+        self._dirty = False
+        if not HAVE_NUMPY:
+            self._bonus = [position_bonus(self.texts[k]) for k in self._keys]
+            return
+        width = max((min(len(t), MAX_WIDTH) for t in self.texts.values()), default=1) or 1
+        codes = np.zeros((len(self._keys), width), dtype=np.int32)
+        bonus = np.zeros((len(self._keys), width), dtype=np.int16)
+        for row, key in enumerate(self._keys):
+            text = self.texts[key][:MAX_WIDTH]
+            if text:
+                codes[row, :len(text)] = [ord(c) for c in fold_case(text)]
+                bonus[row, :len(text)] = position_bonus(text)
+        self._codes = codes
+        self._bonus = bonus
+
+    def scores(self, query, keys=None):
+        """所有 (或指定) 候选的分数 {key: score}，不匹配的不返回"""
+        if self._dirty:
+            self._rebuild()
+        if keys is None:
+            rows = range(len(self._keys))
+        else:
+            # 只计算给定的候选，不遍历全部
+            rows = sorted(self._order[k] for k in keys if k in self._order)
+        if not query:
+            return {self._keys[r]: 0 for r in rows}
+        if not HAVE_NUMPY:
+            result = {}
+            for r in rows:
+                key = self._keys[r]
+                s = score_text(query, self.texts[key], self._bonus[r])
+                if s is not None:
+                    result[key] = s
+            return result
+        rows = np.array(rows, dtype=np.intp)
+        rows, scores = self._score_rows(fold_case(query), rows)
+        return {self._keys[r]: int(s) for r, s in zip(rows.tolist(), scores.tolist())}
+
+    def _score_rows(self, query, rows):
+        """向量化打分，算法同 score_text，每个查询字符对所有行做一次运算"""
+        codes = self._codes
+        width = codes.shape[1]
+        cols = np.arange(width)
+
+        # 从后往前：过滤不匹配的行，并求每个字符最晚可落的位置
+        latest = []
+        end = np.full(len(rows), width, dtype=np.int64)
+        for ch in reversed(query):
+            if len(rows) == 0:
+                return rows, np.zeros(0, dtype=np.int64)
+            mask = (codes[rows] == ord(ch)) & (cols < end[:, None])
+            found = mask.any(axis=1)
+            # 只保留仍然匹配的行，后续字符计算量随之缩小
+            rows, mask = rows[found], mask[found]
+            latest = [last[found] for last in latest]
+            end = width - 1 - mask[:, ::-1].argmax(axis=1)
+            latest.append(end)
+        latest.reverse()
+
+        # 从前往后：在可行范围内挑得分最高的位置
+        prev = np.full(len(rows), -1, dtype=np.int64)
+        scores = np.zeros(len(rows), dtype=np.int64)
+        bonus = self._bonus[rows].astype(np.int64)
+        for ch, last in zip(query, latest):
+            mask = ((codes[rows] == ord(ch)) & (cols > prev[:, None])
+                    & (cols <= last[:, None]))
+            gap = cols - prev[:, None] - 1
+            weight = SCORE_MATCH + bonus - np.minimum(gap, MAX_GAP_PENALTY) * PENALTY_GAP
+            weight += np.where((gap == 0) & (prev[:, None] >= 0), BONUS_CONSECUTIVE, 0)
+            weight = np.where(mask, weight, np.iinfo(np.int64).min)
+            pos = weight.argmax(axis=1)
+            scores += weight[np.arange(len(rows)), pos]
+            prev = pos
+        return rows, scores
+
+    def score_one(self, query, key):
+        """单个候选的分数 (不触发重新编码)，不匹配返回 None"""
+        text = self.texts.get(key)
+        if text is None:
+            return None
+        return score_text(query, text) if query else 0
+
+    def top(self, query, k, keys=None):
+        """分数最高的 k 个 [(score, key)]，分数相同按加入顺序"""
+        return self.best(self.scores(query, keys), k)
+
+    def best(self, scored, k):
+        """从 {key: score} 中取分数最高的 k 个 [(score, key)]"""
+        order = self._order
+        last = len(order)  # 尚未编码的新候选排在最后
+        best = heapq.nlargest(k, scored.items(),
+                              key=lambda item: (item[1], -order.get(item[0], last)))
+        return [(score, key) for key, score in best]
@@ -7,13 +7,18 @@ gi.require_version('Gtk', '3.0')
 gi.require_version('Wnck', '3.0')
 from gi.repository import Gtk, Gdk, Wnck
 
+import groupy_profile
+from groupy_listbox import ListBoxReconciler
+from groupy_search import TrigramIndex
+
 APP_NAME = "Groupy Lite"
 
 class GroupyLiteWindow(Gtk.Window):
     def __init__(self):
         Gtk.Window.__init__(self, title=APP_NAME)
         self.set_default_size(300, 500)
-        self.windows = {}  # name -> window
+        self.index = TrigramIndex()  # xid -> 标题，随 Wnck 信号增量更新
+        self.matched = None  # 搜索命中的 xid 集合，None 表示不过滤
 
         vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         self.add(vbox)
@@ -24,10 +29,13 @@ class GroupyLiteWindow(Gtk.Window):
         # 搜索框
         self.search_entry = Gtk.Entry()
         self.search_entry.set_placeholder_text("🔍 搜索...")
+        self.search_entry.connect("changed", self.on_search)
         vbox.pack_start(self.search_entry, False, False, 5)
 
-        # 窗口列表
+        # 窗口列表：按 XID 对比更新，搜索只改变过滤
         self.listbox = Gtk.ListBox()
+        self.rows = ListBoxReconciler(self.listbox, self.create_row, self.update_row)
+        self.rows.set_filter(lambda xid, label: self.matched is None or xid in self.matched)
         sw = Gtk.ScrolledWindow()
         sw.add(self.listbox)
         vbox.pack_start(sw, True, True, 0)
@@ -49,6 +57,9 @@ class GroupyLiteWindow(Gtk.Window):
         screen = Wnck.Screen.get_default()
         screen.connect("window-opened", self.on_window_opened)
         screen.connect("window-closed", self.on_window_closed)
+        for win in screen.get_windows():
+            self.index_window(win)
+        groupy_profile.mark("first_enumeration")
 
         self.show_all()
         self.refresh(None)
@@ -66,34 +77,39 @@ class GroupyLiteWindow(Gtk.Window):
         return windows
 
     def refresh(self, widget):
-        """刷新"""
-        # 清除
-        for child in self.listbox.get_children():
-            self.listbox.remove(child)
-        self.windows.clear()
-
-        search = self.search_entry.get_text().lower()
+        """刷新：只增删改变化的行"""
         wins = self.get_windows()
         print(f"找到 {len(wins)} 个窗口")
+        self.rows.reconcile((w['win'].get_xid(), self.button_label(w['name'])) for w in wins)
+        if self.matched is not None:
+            self.on_search(None)  # 新开或改名的窗口重新匹配
 
-        for w in wins:
-            name = w['name']
-            if search and search not in name.lower():
-                continue
-            self.windows[name] = w['win']
-            self.add_button(name)
+    def on_search(self, widget):
+        """搜索：只重新过滤，不重建行"""
+        search = self.search_entry.get_text().lower()
+        self.matched = self.index.search(search) if search else None
+        self.rows.invalidate()
+
+    def button_label(self, name):
+        return name[:40] + "..." if len(name) > 40 else name
 
-    def add_button(self, name):
-        """添加按钮"""
-        btn = Gtk.Button(label=name[:40] + "..." if len(name) > 40 else name)
+    def create_row(self, xid, label):
+        """新窗口的行 (按钮)"""
+        btn = Gtk.Button(label=label)
         btn.set_halign(Gtk.Align.START)
-        btn.connect("clicked", self.on_click, name)
-        self.listbox.add(btn)
+        btn.connect("clicked", self.on_click, xid)
+        row = Gtk.ListBoxRow()
+        row.add(btn)
+        return row
 
-    def on_click(self, widget, name):
+    def update_row(self, row, label):
+        """窗口改名"""
+        row.get_child().set_label(label)
+
+    def on_click(self, widget, xid):
         """点击激活窗口"""
-        print(f"点击: {name}")
-        win = self.windows.get(name)
+        win = Wnck.Window.get(xid)
+        print(f"点击: {win.get_name() if win else xid}")
         if win:
             try:
                 win.activate(Gtk.get_current_event_time())
@@ -101,15 +117,29 @@ class GroupyLiteWindow(Gtk.Window):
             except Exception as e:
                 print(f"激活失败: {e}")
 
+    def index_window(self, window):
+        """加入搜索索引并跟踪改名"""
+        if window.get_xid() not in self.index:
+            window.connect("name-changed", self.on_window_renamed)
+        self.index.add(window.get_xid(), window.get_name() or "")
+
+    def on_window_renamed(self, window):
+        """窗口改名：更新索引和这一行的标题"""
+        self.index_window(window)
+        self.refresh(None)
+
     def on_window_opened(self, screen, window):
         """窗口打开"""
+        self.index_window(window)
         self.refresh(None)
 
     def on_window_closed(self, screen, window):
         """窗口关闭"""
+        self.index.remove(window.get_xid())
         self.refresh(None)
 
-if __name__ == "__main__":
+
+def main():
     try:
         # 设置 Wnck 工作区
         Wnck.Screen.get_default().force_update()
@@ -122,3 +152,7 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,32 +4,16 @@
 import sys
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
+from gi.repository import Gtk, GdkPixbuf, GLib
 
-APP_NAME = "Groupy Lite"
+from groupy_x11 import activate_window, user_time
+from groupy_search import TrigramIndex
+from groupy_appname import app_names, simplify_app_name, reload_rules
+from groupy_config import get_config
+from groupy_icons import window_icon
+from groupy_async import AsyncLoader, enumerate_job, unresolved, RETRY_DELAY
 
-def get_window_app_name(wid):
-    """获取窗口的应用名称"""
-    try:
-        import subprocess
-        # 使用 xprop 获取 WM_CLASS
-        result = subprocess.run(
-            ['xprop', '-id', wid, 'WM_CLASS'],
-            capture_output=True, text=True, timeout=1
-        )
-        output = result.stdout.strip()
-        if 'WM_CLASS' in output:
-            # 格式: WM_CLASS(STRING) = "instance", "Class"
-            parts = output.split('=')
-            if len(parts) >= 2:
-                classes = parts[1].strip().strip('"').split('", "')
-                if len(classes) >= 2:
-                    return classes[1]  # 返回类名
-                elif len(classes) >= 1:
-                    return classes[0]
-    except:
-        pass
-    return None
+APP_NAME = "Groupy Lite"
 
 class GroupyLiteWindow(Gtk.Window):
     def __init__(self):
@@ -38,7 +22,13 @@ class GroupyLiteWindow(Gtk.Window):
         self.set_position(Gtk.WindowPosition.CENTER)
         self.set_keep_above(True)
         
-        self.groups = {}  # {app_name: [window_names]}
+        self.groups = {}  # {app_name: [(xid, window_name)]}
+        self.index = TrigramIndex()  # 标题/应用名搜索索引
+        self.loader = AsyncLoader()  # 枚举在后台线程运行
+        self.retry_id = None
+        # 应用名规则在配置文件中修改后重新分组
+        get_config().watch()
+        get_config().subscribe("app_names", self.on_app_names_changed)
         
         vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         self.add(vbox)
@@ -50,11 +40,17 @@ class GroupyLiteWindow(Gtk.Window):
         self.search_entry.connect("changed", self.on_search)
         vbox.pack_start(self.search_entry, False, False, 5)
 
-        self.store = Gtk.TreeStore(str, str)
+        # 显示文字, 窗口标题, XID, 应用图标
+        self.store = Gtk.TreeStore(str, str, int, GdkPixbuf.Pixbuf)
         self.tree = Gtk.TreeView(model=self.store)
         
+        col = Gtk.TreeViewColumn("应用 / 窗口")
+        icon_renderer = Gtk.CellRendererPixbuf()
+        col.pack_start(icon_renderer, False)
+        col.add_attribute(icon_renderer, "pixbuf", 3)
         renderer = Gtk.CellRendererText()
-        col = Gtk.TreeViewColumn("应用 / 窗口", renderer, text=0)
+        col.pack_start(renderer, True)
+        col.add_attribute(renderer, "text", 0)
         col.set_expand(True)
         self.tree.append_column(col)
         
@@ -82,130 +78,126 @@ class GroupyLiteWindow(Gtk.Window):
         self.load_windows(None)
 
     def load_windows(self, widget):
-        """加载窗口，按应用分组"""
+        """在后台线程加载窗口 (新的刷新会取消旧的)"""
+        # 一个 X 连接读取全部窗口 (无 Xlib 时回退 wmctrl + xprop)
+        # WM_CLASS 不会变化，只为新窗口查询一次
+        self.loader.start(enumerate_job, self.show_windows, self.show_windows)
+
+    def show_windows(self, result):
+        """主线程: 按应用分组；部分结果只显示已查到类名的窗口"""
+        if result is None:
+            return
+        windows, classes, complete = result
         self.store.clear()
         self.groups = {}
+        seen = set()
         
         try:
-            import subprocess
-            result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True, timeout=2)
+            app_names.store_classes(classes)
+            if complete:
+                app_names.retain(win['xid'] for win in windows)
             
-            for line in result.stdout.strip().split('\n'):
-                if not line:
+            for win in windows:
+                name = win['name']
+                
+                if not name or 'N/A' in name:
                     continue
-                parts = line.split()
-                if len(parts) >= 4:
-                    wid = parts[0]
-                    name = ' '.join(parts[3:])
-                    
-                    if not name or 'N/A' in name:
-                        continue
-                    
-                    # 获取应用名
-                    app_name = get_window_app_name(wid)
-                    if not app_name:
-                        app_name = "Unknown"
-                    
-                    # 简化应用名
-                    app_name = self.simplify_app_name(app_name)
-                    
-                    if app_name not in self.groups:
-                        self.groups[app_name] = []
-                    self.groups[app_name].append(name)
+                if win['xid'] in app_names:
+                    # 获取并简化应用名 (按 XID 缓存)
+                    app_name = app_names.app_name(win['xid'], self.simplify_app_name)
+                elif complete:
+                    app_name = self.simplify_app_name("Unknown")  # xprop 超时，稍后重查
+                else:
+                    continue  # 类名还在查询中
+                
+                if app_name not in self.groups:
+                    self.groups[app_name] = []
+                self.groups[app_name].append((win['xid'], name))
+                
+                # 增量更新索引 (标题未变的窗口不重建)
+                self.index.add(win['xid'], name, app_name)
+                seen.add(win['xid'])
             
-            print(f"找到 {len(self.groups)} 个应用")
+            if complete:
+                self.index.retain(seen)
+                if unresolved(windows) and self.retry_id is None:
+                    self.retry_id = GLib.timeout_add_seconds(RETRY_DELAY, self.retry_unresolved)
+            print(f"找到 {len(self.groups)} 个应用 (应用名缓存: {app_names.stats()})")
             self.build_tree()
                 
         except Exception as e:
             print(f"错误: {e}")
 
+    def retry_unresolved(self):
+        """重新查询上次超时的窗口"""
+        self.retry_id = None
+        self.load_windows(None)
+        return False
+
+    def on_app_names_changed(self, rules):
+        """应用名规则变化：重新编译并重新分组"""
+        reload_rules(rules)
+        self.load_windows(None)
+
     def simplify_app_name(self, name):
         """简化应用名"""
-        name = name.lower()
-        
-        # 常见应用映射
-        mappings = {
-            'google-chrome': 'Chrome',
-            'chromium-browser': 'Chrome',
-            'firefox': 'Firefox',
-            'nautilus': 'Files',
-            'org.gnome.Nautilus': 'Files',
-            'gnome-terminal-server': 'Terminal',
-            'org.gnome.Terminal': 'Terminal',
-            'guake': 'Guake',
-            'code': 'VS Code',
-            'jetbrains-idea-ce': 'IDEA',
-            'jetbrains-idea': 'IDEA',
-            'pycharm': 'PyCharm',
-            'wechat': 'WeChat',
-            'qq': 'QQ',
-            'dingtalk': 'DingTalk',
-            'lark': 'Lark',
-            'feishu': 'FeiShu',
-            'chrome': 'Chrome',
-            'spotify': 'Spotify',
-            'slack': 'Slack',
-            'discord': 'Discord',
-        }
-        
-        for key, value in mappings.items():
-            if key in name:
-                return value
-        
-        # 首字母大写
-        return name.capitalize()
+        return simplify_app_name(name)
 
     def build_tree(self):
         """构建分组树"""
         search = self.search_entry.get_text().lower()
+        matched = self.index.search(search) if search else None
         
-        for app_name, names in sorted(self.groups.items()):
+        for app_name, wins in sorted(self.groups.items()):
             # 过滤
-            if search:
-                matched = [n for n in names if search in n.lower() or search in app_name.lower()]
-                if not matched:
-                    continue
-                names = matched
+            if matched is not None:
+                wins = [w for w in wins if w[0] in matched]
             
-            if not names:
+            if not wins:
                 continue
             
-            # 添加分组
-            piter = self.store.append(None, [f"📁 {app_name}", ""])
+            # 添加分组 (图标按 WM_CLASS 缓存，只解码一次)
+            icon = window_icon(wins[0][0])
+            label = app_name if icon is not None else f"📁 {app_name}"
+            piter = self.store.append(None, [label, "", 0, icon])
             
             # 添加窗口
-            for name in names:
+            for xid, name in wins:
                 display_name = name[:45] + "..." if len(name) > 45 else name
-                self.store.append(piter, [f"  {display_name}", name])
+                self.store.append(piter, [f"  {display_name}", name, xid, window_icon(xid)])
 
     def on_search(self, widget):
-        self.load_windows(None)
+        # 只查索引，不重新枚举窗口
+        self.store.clear()
+        self.build_tree()
 
     def on_select(self, selection):
         model, treeiter = selection.get_selected()
         if treeiter:
-            name = model[treeiter][1]
+            name, xid = model[treeiter][1], model[treeiter][2]
             if name:
-                self.goto_window(name)
+                self.goto_window(name, xid)
 
     def on_double_click(self, tree, path, column):
         model = tree.get_model()
         treeiter = model.get_iter(path)
         if treeiter:
-            name = model[treeiter][1]
+            name, xid = model[treeiter][1], model[treeiter][2]
             if name:
-                self.goto_window(name)
+                self.goto_window(name, xid)
 
-    def goto_window(self, name):
+    def goto_window(self, name, xid):
         print(f"跳转: {name}")
         try:
-            import subprocess
-            subprocess.run(['wmctrl', '-a', name], capture_output=True, timeout=1)
-            print(f"成功")
+            if activate_window(xid, user_time(self)):
+                print(f"成功")
+            else:
+                print(f"窗口管理器未确认焦点切换")
         except Exception as e:
             print(f"失败: {e}")
 
-if __name__ == "__main__":
+
+def main():
     try:
         print("启动...")
         win = GroupyLiteWindow()
@@ -215,3 +207,7 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"错误: {e}")
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
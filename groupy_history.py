@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Groupy History - 窗口激活历史 (frecency)
+
+按 "WM_CLASS + 标题" 记录激活历史，分数 = 次数按半衰期指数衰减后的和：
+每次激活先把旧分数衰减到当前时刻再加 1。所有条目同速衰减，排序不随时间改变，
+所以只在激活时计算一次。
+
+文件只在启动时读一次，之后都在内存中；修改后延迟几秒批量写入
+(临时文件 + rename)，条目数有上限，分数最低的先淘汰。
+"""
+
+import json
+import os
+import time
+
+HISTORY_FILE = os.path.expanduser("~/.config/groupy/history.json")
+HALF_LIFE = 3 * 24 * 3600  # 秒
+MAX_ENTRIES = 256
+MIN_SCORE = 0.01  # 衰减到此以下的条目写入时丢弃
+SAVE_DELAY = 5  # 秒，合并这段时间内的多次激活为一次写入
+VERSION = 1
+
+
+def history_key(wm_class, title):
+    """历史条目的键"""
+    return f"{wm_class or ''}\t{title}"
+
+
+class FrecencyStore:
+    """内存中的激活历史，延迟批量写入文件"""
+
+    def __init__(self, path=HISTORY_FILE, half_life=HALF_LIFE,
+                 max_entries=MAX_ENTRIES, save_delay=SAVE_DELAY):
+        self.path = path
+        self.half_life = half_life
+        self.max_entries = max_entries
+        self.save_delay = save_delay
+        self.entries = {}  # key -> [分数, 上次激活时间]
+        self.latest = None  # 最近激活的键
+        self.dirty = False
+        self._save_id = None
+        self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def load(self):
+        """读取历史文件 (只在启动时调用)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('v') != VERSION:
+                return
+            for key, (score, stamp) in data.get('entries', {}).items():
+                self.entries[key] = [float(score), float(stamp)]
+        except Exception as e:
+            print(f"读取激活历史失败: {e}")
+            self.entries = {}
+        if self.entries:
+            self.latest = max(self.entries, key=lambda k: self.entries[k][1])
+
+    def _decayed(self, entry, now):
+        score, stamp = entry
+        return score * 0.5 ** (max(0, now - stamp) / self.half_life)
+
+    def score(self, key, now=None):
+        """当前时刻的分数，没有记录为 0"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return 0
+        return self._decayed(entry, time.time() if now is None else now)
+
+    def scores(self, keys, now=None):
+        """{key: 分数}，只含有记录的键"""
+        now = time.time() if now is None else now
+        result = {}
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry is not None:
+                result[key] = self._decayed(entry, now)
+        return result
+
+    def record(self, key, now=None):
+        """记录一次激活，稍后写入文件"""
+        now = time.time() if now is None else now
+        entry = self.entries.get(key)
+        score = self._decayed(entry, now) if entry is not None else 0
+        self.entries[key] = [score + 1, now]
+        self.latest = key
+        if len(self.entries) > self.max_entries:
+            self._prune(now)
+        self.dirty = True
+        self._schedule_save()
+
+    def _prune(self, now):
+        """只保留分数最高的 max_entries 个，并丢弃已衰减殆尽的"""
+        ranked = sorted(self.entries.items(),
+                        key=lambda item: self._decayed(item[1], now), reverse=True)
+        self.entries = {key: entry for key, entry in ranked[:self.max_entries]
+                        if key == self.latest or self._decayed(entry, now) >= MIN_SCORE}
+
+    def _schedule_save(self):
+        if self._save_id is not None:
+            return
+        try:
+            from gi.repository import GLib
+        except ImportError:
+            self.flush()
+            return
+        self._save_id = GLib.timeout_add_seconds(self.save_delay, self._on_save_timeout)
+
+    def _on_save_timeout(self):
+        self._save_id = None
+        self.flush()
+        return False
+
+    def flush(self):
+        """有修改时立即写入 (退出前调用)"""
+        if not self.dirty:
+            return
+        now = time.time()
+        self._prune(now)
+        data = {
+            'v': VERSION,
+            'entries': {key: [round(score, 4), int(stamp)]
+                        for key, (score, stamp) in self.entries.items()},
+        }
+        tmp = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except Exception as e:
+            print(f"保存激活历史失败: {e}")
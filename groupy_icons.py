@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Groupy Icons - 窗口的应用图标
+
+优先解码窗口的 _NET_WM_ICON：取不小于目标尺寸的最小一张，缩放一次；
+没有时按 WM_CLASS 找 .desktop 文件中的图标 (图标主题)，再没有用通用图标。
+
+结果按 (WM_CLASS, 尺寸) 放进按字节数限制的 LRU，同一应用的图标只解码一次，
+刷新几百行时直接复用同一个 Pixbuf。
+"""
+
+import sys
+from array import array
+from collections import OrderedDict
+
+import groupy_x11
+from groupy_appname import app_names
+
+ICON_SIZE = 16  # 列表行中的图标尺寸 (像素)
+CACHE_BYTES = 4 * 1024 * 1024
+FALLBACK_ICON = "application-x-executable"
+
+
+def pick_icon(values, size):
+    """从 _NET_WM_ICON 的值中选出最合适的一张，返回 (宽, 高, 起始下标)"""
+    best = None
+    i = 0
+    n = len(values)
+    while i + 2 <= n:
+        width, height = int(values[i]), int(values[i + 1])
+        start = i + 2
+        if width <= 0 or height <= 0 or start + width * height > n:
+            break
+        if best is None:
+            best = (width, height, start)
+        else:
+            # 不小于目标尺寸的最小一张；都比目标小时取最大的
+            bw = best[0]
+            if (bw < size and width > bw) or (size <= width < bw):
+                best = (width, height, start)
+        i = start + width * height
+    return best
+
+
+def decode_wm_icon(values, size):
+    """_NET_WM_ICON -> size x size 的 Pixbuf，失败返回 None"""
+    from gi.repository import GdkPixbuf, GLib
+
+    picked = pick_icon(values, size) if values is not None else None
+    if picked is None:
+        return None
+    width, height, start = picked
+    pixels = array('I', values[start:start + width * height])
+    if sys.byteorder != 'little':
+        pixels.byteswap()
+    # 每个像素是 0xAARRGGBB，小端字节序为 B G R A，交换 B/R 得到 RGBA
+    data = bytearray(pixels.tobytes())
+    data[0::4], data[2::4] = data[2::4], data[0::4]
+    pixbuf = GdkPixbuf.Pixbuf.new_from_bytes(
+        GLib.Bytes.new(bytes(data)), GdkPixbuf.Colorspace.RGB, True, 8,
+        width, height, width * 4)
+    if width != size or height != size:
+        pixbuf = pixbuf.scale_simple(size, size, GdkPixbuf.InterpType.BILINEAR)
+    return pixbuf
+
+
+_desktop_icons = None
+
+
+def desktop_icons():
+    """小写的 WM_CLASS / .desktop 文件名 / 可执行文件名 -> Gio.Icon (首次使用时建立)"""
+    global _desktop_icons
+    if _desktop_icons is None:
+        _desktop_icons = {}
+        try:
+            from gi.repository import Gio
+            for info in Gio.AppInfo.get_all():
+                icon = info.get_icon()
+                if icon is None:
+                    continue
+                keys = []
+                if isinstance(info, Gio.DesktopAppInfo) and info.get_startup_wm_class():
+                    keys.append(info.get_startup_wm_class())
+                if info.get_id():
+                    keys.append(info.get_id()[:-len('.desktop')]
+                                if info.get_id().endswith('.desktop') else info.get_id())
+                if info.get_executable():
+                    keys.append(info.get_executable().rsplit('/', 1)[-1])
+                for key in keys:
+                    _desktop_icons.setdefault(key.lower(), icon)
+        except Exception as e:
+            print(f"读取 .desktop 图标失败: {e}")
+    return _desktop_icons
+
+
+def theme_icon(wm_class, size):
+    """按 .desktop 文件从图标主题加载，最后退回通用图标"""
+    from gi.repository import Gtk
+    theme = Gtk.IconTheme.get_default()
+    flags = Gtk.IconLookupFlags.FORCE_SIZE
+    gicon = desktop_icons().get(wm_class.lower()) if wm_class else None
+    if gicon is not None:
+        info = theme.lookup_by_gicon(gicon, size, flags)
+        if info is not None:
+            try:
+                return info.load_icon()
+            except Exception:
+                pass
+    try:
+        return theme.load_icon(FALLBACK_ICON, size, flags)
+    except Exception:
+        return None
+
+
+class IconCache:
+    """按 (WM_CLASS, 尺寸) 缓存 Pixbuf，总字节数有上限 (LRU)"""
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # (WM_CLASS, 尺寸) -> (Pixbuf 或 None, 字节数)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0  # 实际解码 _NET_WM_ICON 的次数
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        """命中统计"""
+        return {
+            'size': len(self.entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'decodes': self.decodes,
+            'evictions': self.evictions,
+        }
+
+    def get(self, wm_class, size=ICON_SIZE, xid=None):
+        """应用图标；未缓存时从 xid 的 _NET_WM_ICON 解码 (没有 xid 或类名时用主题图标)"""
+        key = (wm_class, size)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+        self.misses += 1
+        pixbuf = None
+        if wm_class and xid:
+            try:
+                values = groupy_x11.native_wm_icon(xid)
+                if values is not None:
+                    self.decodes += 1
+                    pixbuf = decode_wm_icon(values, size)
+            except Exception as e:
+                print(f"解码窗口图标失败: {e}")
+        if pixbuf is None:
+            pixbuf = theme_icon(wm_class, size)
+        self._store(key, pixbuf)
+        return pixbuf
+
+    def _store(self, key, pixbuf):
+        nbytes = pixbuf.get_rowstride() * pixbuf.get_height() if pixbuf is not None else 0
+        self.entries[key] = (pixbuf, nbytes)
+        self.bytes += nbytes
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, freed) = self.entries.popitem(last=False)
+            self.bytes -= freed
+            self.evictions += 1
+
+    def clear(self):
+        """图标主题变化时丢弃全部"""
+        self.entries.clear()
+        self.bytes = 0
+
+
+# 进程内共享的缓存
+icons = IconCache()
+
+
+def window_icon(xid, size=ICON_SIZE):
+    """窗口所属应用的图标 (WM_CLASS 从 app_names 缓存读取，不查询)"""
+    return icons.get(app_names.cached_wm_class(xid), size, xid)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Groupy IPC - 常驻进程与客户端之间的本地 UNIX socket 通信
+
+协议: 客户端连接后发送一行命令 (如 "show")，服务端回复一行结果后关闭连接。
+单实例由 flock 锁保证：锁随进程退出自动释放，不需要检查 PID。
+本模块不导入 GTK，客户端可以在几毫秒内完成一次请求。
+
+socket 放在 XDG_RUNTIME_DIR，没有时放在 /tmp 下只有自己可访问的目录里；
+连接和删除前检查 socket 属于当前用户，连上后再用 SO_PEERCRED 核对对方的 uid。
+"""
+
+import fcntl
+import os
+import socket
+import stat
+import struct
+import time
+
+SOCKET_NAME = f"groupy-{os.getuid()}.sock"
+CLIENT_TIMEOUT = 0.5  # 秒
+HANDOFF_TIMEOUT = 2.0  # 持锁实例刚启动、还没开始监听时最多等待的时间 (秒)
+MAX_REQUEST = 4096
+
+
+def _private_dir():
+    """/tmp 下只有当前用户可访问的目录 (XDG_RUNTIME_DIR 不存在时使用)"""
+    path = os.path.join('/tmp', f"groupy-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    # 别人预先创建的目录或符号链接都不能用
+    if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid()
+            or st.st_mode & 0o077):
+        raise PermissionError(f"{path} 不属于当前用户或权限过宽")
+    return path
+
+
+def socket_path():
+    """socket 文件路径 (优先放在 XDG_RUNTIME_DIR)"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or _private_dir()
+    return os.path.join(runtime_dir, SOCKET_NAME)
+
+
+def _owned_socket(path):
+    """path 是当前用户的 socket 文件；不存在时返回 False，属于别人时抛 PermissionError"""
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        raise PermissionError(f"{path} 不是当前用户的 socket")
+    return True
+
+
+def peer_uid(sock):
+    """对方进程的 uid (SO_PEERCRED，仅 Linux；不支持时返回 None)"""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+
+def _same_user(sock):
+    uid = peer_uid(sock)
+    return uid is None or uid == os.getuid()
+
+
+def send_command(command, timeout=CLIENT_TIMEOUT):
+    """向常驻进程发送命令，返回回复；没有常驻进程时返回 None
+
+    命令已送达但常驻进程还在启动 (主循环未运行) 时返回 "queued"，
+    命令留在连接里，启动完成后执行。
+    """
+    sent = False
+    try:
+        path = socket_path()
+        if not _owned_socket(path):
+            return None
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            if not _same_user(sock):
+                print("IPC: socket 的监听进程不属于当前用户，忽略")
+                return None
+            sock.sendall(command.encode('utf-8') + b'\n')
+            sock.shutdown(socket.SHUT_WR)
+            sent = True
+            reply = b''
+            while True:
+                chunk = sock.recv(MAX_REQUEST)
+                if not chunk:
+                    break
+                reply += chunk
+            return reply.decode('utf-8', errors='replace').strip()
+    except socket.timeout:
+        return "queued" if sent else None
+    except PermissionError as e:
+        print(f"IPC: {e}")
+        return None
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    except OSError:
+        return None
+
+
+def acquire_instance_lock(path):
+    """非阻塞地获取实例锁，成功返回需要一直持有的文件对象，已被占用返回 None"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_file = open(path, 'a+')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+
+def hand_off(command, timeout=HANDOFF_TIMEOUT):
+    """把请求转交给持锁的实例；它可能刚启动还没监听，短暂重试"""
+    deadline = time.monotonic() + timeout
+    while True:
+        reply = send_command(command)
+        if reply is not None or time.monotonic() >= deadline:
+            return reply
+        time.sleep(0.01)
+
+
+class IpcServer:
+    """接入 GLib 主循环的命令服务端，handler(command) 返回回复字符串
+
+    拿到实例锁后立即 start()，窗口建好后再 set_handler()；
+    在此之前收到的命令排队，设置 handler 时依次执行。
+    """
+
+    def __init__(self, handler=None):
+        self.handler = handler
+        self.pending = []  # handler 设置前收到的命令
+        self.sock = None
+        self.path = None
+        self.clients = {}  # 连接 -> 已收到的数据和它的 watch / 超时
+        self._source_id = None
+
+    def set_handler(self, handler):
+        """设置命令处理函数，并执行排队的命令"""
+        self.handler = handler
+        pending, self.pending = self.pending, []
+        for command in pending:
+            try:
+                handler(command)
+            except Exception as e:
+                print(f"IPC 请求处理错误: {e}")
+
+    def start(self):
+        """开始监听 (调用方需已持有实例锁，自己的旧 socket 文件直接替换)"""
+        from gi.repository import GLib
+
+        path = socket_path()
+        if _owned_socket(path):
+            os.unlink(path)  # 上次异常退出留下的文件
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # 先收紧 umask，bind 创建的文件从一开始就只有自己可访问
+        old_umask = os.umask(0o177)
+        try:
+            self.sock.bind(path)
+        finally:
+            os.umask(old_umask)
+        self.path = path
+        self.sock.listen(8)
+        self.sock.setblocking(False)
+        self._source_id = GLib.io_add_watch(self.sock.fileno(), GLib.PRIORITY_HIGH,
+                                            GLib.IOCondition.IN, self._on_accept)
+
+    def stop(self):
+        """停止监听并删除 socket 文件"""
+        if self._source_id is not None:
+            from gi.repository import GLib
+            GLib.source_remove(self._source_id)
+            self._source_id = None
+        for conn in list(self.clients):
+            self._close_client(conn)
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            try:
+                if _owned_socket(self.path):
+                    os.unlink(self.path)
+            except PermissionError as e:
+                print(f"IPC: {e}")
+
+    def _on_accept(self, fd, condition):
+        """接受连接；请求由连接自己的 watch 读取，主循环不等待客户端"""
+        from gi.repository import GLib
+
+        try:
+            conn, _ = self.sock.accept()
+        except BlockingIOError:
+            return True
+        try:
+            if not _same_user(conn):
+                print("IPC: 拒绝其他用户的连接")
+                conn.close()
+                return True
+        except OSError as e:
+            print(f"IPC 请求处理错误: {e}")
+            conn.close()
+            return True
+        conn.setblocking(False)
+        client = {'data': b'', 'watch': None, 'timer': None}
+        self.clients[conn] = client
+        client['watch'] = GLib.io_add_watch(
+            conn.fileno(), GLib.PRIORITY_HIGH,
+            GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+            self._on_client_readable, conn)
+        # 连上却不发请求的客户端到时关闭
+        client['timer'] = GLib.timeout_add(int(CLIENT_TIMEOUT * 1000), self._on_client_timeout, conn)
+        return True
+
+    def _on_client_readable(self, fd, condition, conn):
+        client = self.clients.get(conn)
+        if client is None:
+            return False
+        try:
+            while b'\n' not in client['data'] and len(client['data']) < MAX_REQUEST:
+                chunk = conn.recv(MAX_REQUEST)
+                if not chunk:
+                    break
+                client['data'] += chunk
+        except BlockingIOError:
+            return True  # 请求还没收完
+        except OSError as e:
+            print(f"IPC 请求处理错误: {e}")
+            self._close_client(conn, from_watch=True)
+            return False
+        self._handle(conn, client['data'])
+        self._close_client(conn, from_watch=True)
+        return False
+
+    def _on_client_timeout(self, conn):
+        client = self.clients.get(conn)
+        if client is not None:
+            client['timer'] = None
+            print("IPC: 客户端超时未发送请求")
+            self._close_client(conn)
+        return False
+
+    def _close_client(self, conn, from_watch=False):
+        from gi.repository import GLib
+
+        client = self.clients.pop(conn, None)
+        if client is None:
+            return
+        if client['watch'] is not None and not from_watch:
+            GLib.source_remove(client['watch'])
+        if client['timer'] is not None:
+            GLib.source_remove(client['timer'])
+        conn.close()
+
+    def _handle(self, conn, data):
+        """执行一条命令并回复"""
+        try:
+            command = data.decode('utf-8', errors='replace').strip()
+            if not command:
+                return  # 客户端没发请求就断开了
+            if command == "ping":
+                reply = "pong"
+            elif self.handler is None:
+                self.pending.append(command)
+                reply = "queued"
+            else:
+                reply = self.handler(command)
+            conn.sendall((reply or "ok").encode('utf-8') + b'\n')
+        except Exception as e:
+            print(f"IPC 请求处理错误: {e}")
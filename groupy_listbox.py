@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Groupy ListBox - 按 XID 对比的列表更新
+
+ListBoxReconciler 记住每个 XID 对应的行，新的窗口列表到达时只做必要的改动:
+删除已关闭的、插入新开的、修改标题变化的，顺序变化时保持最长的不动子序列，
+只移动其余的行。搜索过滤交给 Gtk.ListBox.set_filter_func，输入时不重建行。
+"""
+
+from bisect import bisect_left
+
+
+def stationary(positions):
+    """最长递增子序列 (不需要移动的行) 在 positions 中的下标集合
+
+    positions[i] 为新列表第 i 项在旧列表中的位置，新插入的项为 None。
+    """
+    tails = []  # tails[k] = 长度 k+1 的递增子序列末尾的下标
+    values = []  # values[k] = positions[tails[k]]
+    prev = [None] * len(positions)
+    for i, pos in enumerate(positions):
+        if pos is None:
+            continue
+        k = bisect_left(values, pos)
+        if k:
+            prev[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            values.append(pos)
+        else:
+            tails[k] = i
+            values[k] = pos
+    result = set()
+    i = tails[-1] if tails else None
+    while i is not None:
+        result.add(i)
+        i = prev[i]
+    return result
+
+
+class ListBoxReconciler:
+    """按键 (XID) 维护 Gtk.ListBox 的行"""
+
+    def __init__(self, listbox, create_row, update_row=None):
+        self.listbox = listbox
+        self.create_row = create_row  # create_row(key, item) -> Gtk.ListBoxRow
+        self.update_row = update_row  # update_row(row, item)，item 变化时调用
+        self.rows = {}   # key -> 行
+        self.items = {}  # key -> 显示内容
+        self.keys = {}   # 行 -> key (过滤函数用)
+        self.order = []  # 当前顺序
+        self.inserted = 0
+        self.removed = 0
+        self.moved = 0
+        self.updated = 0
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def stats(self):
+        return {
+            'rows': len(self.order),
+            'inserted': self.inserted,
+            'removed': self.removed,
+            'moved': self.moved,
+            'updated': self.updated,
+        }
+
+    def key_of(self, row):
+        return self.keys.get(row)
+
+    def item(self, key):
+        return self.items.get(key)
+
+    def set_filter(self, visible):
+        """visible(key, item) 为 False 的行隐藏；之后调用 invalidate() 重新过滤"""
+        if visible is None:
+            self.listbox.set_filter_func(None)
+            return
+
+        def func(row):
+            key = self.keys.get(row)
+            return key is None or visible(key, self.items[key])
+        self.listbox.set_filter_func(func)
+
+    def invalidate(self):
+        """过滤条件变化 (不改动行)"""
+        self.listbox.invalidate_filter()
+
+    def reconcile(self, entries):
+        """entries: [(key, item)]，按此顺序显示；返回是否有改动"""
+        unique = []
+        new_keys = set()
+        for key, item in entries:
+            if key not in new_keys:  # 重复的键只保留第一个
+                new_keys.add(key)
+                unique.append((key, item))
+        entries = unique
+        changed = False
+
+        # 删除已不存在的
+        for key in self.order:
+            if key not in new_keys:
+                row = self.rows.pop(key)
+                del self.items[key]
+                del self.keys[row]
+                self.listbox.remove(row)
+                self.removed += 1
+                changed = True
+        old_index = {key: i for i, key in enumerate(k for k in self.order if k in new_keys)}
+
+        # 修改内容变化的
+        for key, item in entries:
+            if key in self.rows and self.items[key] != item:
+                self.items[key] = item
+                if self.update_row is not None:
+                    self.update_row(self.rows[key], item)
+                self.updated += 1
+                changed = True
+
+        # 顺序: 最长递增子序列中的行不动，其余的按新位置依次插入
+        positions = [old_index.get(key) for key, _ in entries]
+        keep = stationary(positions)
+        for i, (key, item) in enumerate(entries):
+            if i in keep:
+                continue
+            row = self.rows.get(key)
+            if row is not None:
+                self.listbox.remove(row)
+                self.moved += 1
+        for i, (key, item) in enumerate(entries):
+            if i in keep:
+                continue
+            row = self.rows.get(key)
+            if row is None:
+                row = self.create_row(key, item)
+                self.rows[key] = row
+                self.items[key] = item
+                self.keys[row] = key
+                row.show_all()
+                self.inserted += 1
+            self.listbox.insert(row, i)
+            changed = True
+
+        self.order = [key for key, _ in entries]
+        return changed
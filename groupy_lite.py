@@ -2,16 +2,22 @@
 """Groupy Lite - 窗口快速切换工具"""
 
 import sys
-import json
 import os
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk, GLib
 
+import groupy_profile
+import groupy_x11
+from groupy_async import AsyncLoader
+from groupy_config import get_config
+from groupy_appname import app_names
+from groupy_icons import window_icon
+from groupy_listbox import ListBoxReconciler
+
 APP_NAME = "Groupy Lite"
-CONFIG_FILE = os.path.expanduser("~/.config/groupy/config.json")
 
-# 简单的窗口信息存储
+# 简单的窗口信息存储: xid -> 窗口 ID
 known_windows = {}
 
 class GroupyLiteWindow(Gtk.Window):
@@ -19,8 +25,12 @@ class GroupyLiteWindow(Gtk.Window):
         Gtk.Window.__init__(self, title=APP_NAME)
         self.set_default_size(300, 500)
 
-        # 加载配置
-        self.config = self.load_config()
+        # 共享配置：白名单在别处修改后也刷新
+        self.config = get_config()
+        self.config.watch()
+        self.config.subscribe("whitelist", lambda whitelist: self.refresh_windows(None))
+        self.loader = AsyncLoader()  # 枚举在后台线程运行
+        self.search_text = ""
 
         # 主布局
         self.vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
@@ -39,6 +49,9 @@ class GroupyLiteWindow(Gtk.Window):
         # 窗口列表
         self.listbox = Gtk.ListBox()
         self.listbox.set_selection_mode(Gtk.SelectionMode.NONE)
+        # 按 XID 对比更新，搜索只改变过滤
+        self.rows = ListBoxReconciler(self.listbox, self.create_row, self.update_row)
+        self.rows.set_filter(lambda xid, item: self.search_text in item[0].lower())
         self.sw = Gtk.ScrolledWindow()
         self.sw.add(self.listbox)
         self.vbox.pack_start(self.sw, True, True, 0)
@@ -68,25 +81,9 @@ class GroupyLiteWindow(Gtk.Window):
         # 5秒后刷新
         GLib.timeout_add(5000, self.refresh_windows)
 
-    def load_config(self):
-        """加载配置文件"""
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {"whitelist": [], "tab_position": "top"}
-
-    def save_config(self):
-        """保存配置"""
-        os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(self.config, f, indent=2)
-
     def get_windows(self):
-        """获取窗口列表 - 使用 wmctrl 或 xdotool"""
-        windows = []
+        """获取窗口列表 (来源由 groupy_sources 按耗时选择，出错时自动换用其他来源)"""
+        from groupy_sources import sources
         
         # 确保 DISPLAY 设置正确
         display = os.environ.get('DISPLAY', ':0')
@@ -95,97 +92,106 @@ class GroupyLiteWindow(Gtk.Window):
         os.environ['DISPLAY'] = display
         print(f"DISPLAY={display}")
         
-        # 方法1: 使用 wmctrl
         try:
-            import subprocess
-            env = os.environ.copy()
-            result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True, 
-                                    timeout=2, env=env)
-            print(f"wmctrl 输出: {result.stdout[:100]}")
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        wid = parts[0]
-                        name = ' '.join(parts[3:])
-                        windows.append({'id': wid, 'name': name})
+            windows = groupy_x11.list_windows(with_class=False)
             if windows:
-                return windows, 'wmctrl'
+                return windows, sources.last_used
         except Exception as e:
-            print(f"wmctrl 错误: {e}")
+            print(f"枚举窗口错误: {e}")
         
-        return windows, 'none'
+        return [], 'none'
+
+    def load_job(self, emit, cancelled):
+        """工作线程: 先交付窗口列表，再查询还没缓存的 WM_CLASS (图标按类名缓存)"""
+        windows, method = self.get_windows()
+        missing = [w['xid'] for w in windows if w['xid'] not in app_names]
+        if not missing:
+            return windows, method, {}, True
+        emit((windows, method, {}, False))
+        try:
+            classes = groupy_x11.get_app_names(missing, cancelled=cancelled)
+        except Exception as e:
+            print(f"读取 WM_CLASS 失败: {e}")
+            classes = {}
+        return windows, method, classes, True
 
     def refresh_windows(self, widget):
-        """刷新窗口列表"""
+        """刷新窗口列表 (在后台线程枚举，新的刷新会取消还没返回的旧刷新)"""
         print("刷新窗口列表...")
-        
+        self.loader.start(self.load_job, self.show_windows, self.show_windows)
+        return False  # 只运行一次
+
+    def show_windows(self, result):
+        """主线程: 与当前的行对比，只增删改变化的行 (标题、图标)"""
         try:
-            # 清除现有项
-            for child in self.listbox.get_children():
-                self.listbox.remove(child)
             known_windows.clear()
 
-            search_text = self.search_entry.get_text().lower()
-            
-            # 获取窗口
-            windows, method = self.get_windows()
+            windows, method, classes, complete = result
+            app_names.store_classes(classes)
+            if complete:
+                app_names.retain(w['xid'] for w in windows)
+            groupy_profile.mark("first_enumeration")
             print(f"找到 {len(windows)} 个窗口 (方法: {method})")
             
+            entries = []
             for win in windows:
                 name = win['name']
                 if not name or name.strip() == '':
                     continue
-                
-                # 搜索过滤
-                if search_text and search_text not in name.lower():
-                    continue
-                
-                known_windows[name] = win['id']
-                self.add_window_to_list(name)
+                known_windows[win['xid']] = win['id']
+                # 应用图标 (类名还没查到时为通用图标，查到后只更新这一行)
+                entries.append((win['xid'], (name, window_icon(win['xid']))))
 
-            self.show_all()
+            self.rows.reconcile(entries)
+            self.rows.invalidate()
             print(f"显示 {len(known_windows)} 个窗口")
         except Exception as e:
             print(f"刷新错误: {e}")
             import traceback
             traceback.print_exc()
-        
-        return False  # 只运行一次
 
-    def add_window_to_list(self, name):
-        """添加窗口到列表"""
+    def create_row(self, xid, item):
+        """新窗口的行"""
         row = Gtk.ListBoxRow()
         box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
         row.add(box)
 
-        # 默认图标
-        icon = Gtk.Image.new_from_icon_name("application-default-icon", Gtk.IconSize.MENU)
+        icon = Gtk.Image()
         box.pack_start(icon, False, False, 5)
 
         # 标签
-        label = Gtk.Label(label=name, xalign=0)
+        label = Gtk.Label(xalign=0)
         box.pack_start(label, True, True, 0)
+        self.update_row(row, item)
 
         # 点击激活
-        def on_click(widget, event, win_name=name):
+        def on_click(widget, event):
             if event.type == Gdk.EventType.BUTTON_PRESS:
-                self.activate_window(win_name)
+                self.activate_window(xid)
 
         row.add_events(Gdk.EventMask.BUTTON_PRESS_MASK)
         row.connect("button-press-event", on_click)
+        return row
+
+    def update_row(self, row, item):
+        """设置行的标题和图标"""
+        name, pixbuf = item
+        icon, label = row.get_child().get_children()
+        if pixbuf is not None:
+            icon.set_from_pixbuf(pixbuf)
+        else:
+            icon.set_from_icon_name("application-default-icon", Gtk.IconSize.MENU)
+        label.set_text(name)
 
-        self.listbox.add(row)
-
-    def activate_window(self, name):
+    def activate_window(self, xid):
         """激活窗口"""
-        wid = known_windows.get(name)
+        wid = known_windows.get(xid)
         if not wid:
             return
+        name = self.rows.item(xid)[0] if xid in self.rows else wid
         
         try:
-            import subprocess
-            subprocess.run(['wmctrl', '-i', '-a', wid], capture_output=True, timeout=1)
+            groupy_x11.activate_window(wid, groupy_x11.user_time(self))
             print(f"激活窗口: {name}")
         except:
             try:
@@ -196,8 +202,9 @@ class GroupyLiteWindow(Gtk.Window):
                 print(f"激活失败: {e}")
 
     def on_search(self, widget):
-        """搜索"""
-        self.refresh_windows(None)
+        """搜索：只重新过滤，不重新枚举"""
+        self.search_text = self.search_entry.get_text().lower()
+        self.rows.invalidate()
 
     def on_settings_clicked(self, widget):
         """打开设置对话框"""
@@ -230,17 +237,13 @@ class SettingsDialog(Gtk.Dialog):
 
     def save_config(self, widget):
         text = self.entry.get_text()
-        if text.strip():
-            whitelist = [x.strip() for x in text.split(",") if x.strip()]
-            self.parent.config["whitelist"] = whitelist
-        else:
-            self.parent.config["whitelist"] = []
-        self.parent.save_config()
-        self.parent.refresh_windows(None)
+        whitelist = [x.strip() for x in text.split(",") if x.strip()]
+        # 白名单有变化时订阅者会刷新列表
+        self.parent.config.set("whitelist", whitelist)
         self.destroy()
 
 
-if __name__ == "__main__":
+def main():
     try:
         app = Gtk.Application(application_id="com.groupy.lite.app")
         app.connect("activate", lambda app: GroupyLiteWindow().show_all())
@@ -248,3 +251,7 @@ if __name__ == "__main__":
     except Exception as e:
         print("错误:", e)
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Groupy Profile - 启动耗时分阶段统计
+
+各阶段调用 mark(phase) 打点 (未启用时什么都不做，同名阶段只记第一次)，
+时间从进程创建开始算，包含解释器自身的启动时间。
+"""
+
+import json
+import os
+import time
+
+# 阶段顺序 (报告按此排序，未知阶段排在后面)
+PHASES = ("interpreter", "gi_import", "gtk_init", "variant_import",
+          "first_enumeration", "first_frame")
+
+enabled = False
+_marks = {}      # 阶段 -> 距进程创建的秒数
+_origin = None   # perf_counter 时间轴上的进程创建时刻
+
+
+def _process_age():
+    """当前进程已运行的秒数 (由 /proc 计算，精度为一个时钟节拍)"""
+    try:
+        with open('/proc/self/stat') as f:
+            # comm 字段可能含空格，从最后一个 ')' 之后开始数
+            fields = f.read().rsplit(')', 1)[1].split()
+        start_ticks = int(fields[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - start_ticks / os.sysconf('SC_CLK_TCK'), 0.0)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def enable():
+    """开始统计，并把解释器启动耗时记为第一个阶段"""
+    global enabled, _origin
+    enabled = True
+    _origin = time.perf_counter() - _process_age()
+    mark("interpreter")
+
+
+def mark(phase):
+    """记录阶段完成的时刻"""
+    if enabled and phase not in _marks:
+        _marks[phase] = time.perf_counter() - _origin
+
+
+def has(phase):
+    return phase in _marks
+
+
+def report():
+    """各阶段的累计时刻和分段耗时 (毫秒)"""
+    order = sorted(_marks, key=lambda p: (PHASES.index(p) if p in PHASES else len(PHASES),
+                                          _marks[p]))
+    phases = {}
+    durations = {}
+    prev = 0.0
+    for phase in order:
+        phases[phase] = round(_marks[phase] * 1000, 2)
+        durations[phase] = round((_marks[phase] - prev) * 1000, 2)
+        prev = _marks[phase]
+    return {'phases': phases, 'durations': durations}
+
+
+def write_report(path, **extra):
+    """把报告写成 JSON 文件，返回报告内容"""
+    data = dict(extra)
+    data['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    data.update(report())
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+    return data
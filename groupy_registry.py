@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""Groupy Registry - 常驻内存的窗口注册表
+
+按 XID 保存窗口信息。启动时枚举一次，之后监听根窗口的
+_NET_CLIENT_LIST / _NET_ACTIVE_WINDOW 以及各客户端窗口的标题、类名变化，
+增量应用 新增/关闭/改名，搜索和建树只读内存。
+"""
+
+import groupy_x11
+from groupy_appname import app_names
+
+# 需要重新读取的客户端窗口属性 (WM_CLASS 不会变化，由 app_names 缓存)
+CLIENT_WATCH_PROPS = ('_NET_WM_NAME', 'WM_NAME')
+
+
+class WindowRegistry:
+    """按 XID 索引的窗口注册表"""
+
+    def __init__(self, app_cache=None):
+        self.app_cache = app_cache if app_cache is not None else app_names
+        self.windows = {}  # xid -> 窗口信息 (同 groupy_x11.list_windows)
+        self.order = []    # XID 列表，顺序同 _NET_CLIENT_LIST
+        self.active = None
+        self.generation = 0  # 每次内容变化递增
+        self.watching = False
+        self.synced = False
+        self.listeners = []
+        self._source_id = None
+        self._loader = None    # refresh_async 使用的后台加载器
+        self._retry_id = None  # xprop 超时的窗口稍后重新查询
+        self._deferred = set()  # 主线程上不查、交给工作线程查类名的窗口
+        self._class_loader = None
+        self._class_retry_id = None
+        self._watch_source = None  # 没有 python-xlib 时提供变化通知的窗口来源
+        self._resync_id = None
+
+    def connect(self, callback):
+        """注册变化回调 callback(kind, xid, info)
+
+        kind 为 'added' / 'removed' / 'changed' / 'active'
+        """
+        self.listeners.append(callback)
+
+    def emit(self, kind, xid, info):
+        if kind != 'active':
+            self.generation += 1
+        for callback in list(self.listeners):
+            try:
+                callback(kind, xid, info)
+            except Exception as e:
+                print(f"注册表回调错误: {e}")
+
+    def items(self):
+        """按客户端列表顺序返回窗口信息"""
+        return [self.windows[xid] for xid in self.order if xid in self.windows]
+
+    def get(self, xid):
+        return self.windows.get(xid)
+
+    # ------------------------------------------------------------
+    # 全量同步
+
+    def refresh(self):
+        """全量枚举一次，与内存内容比较后发出增量"""
+        try:
+            if self._watch_source is not None:
+                # 监听来源的列表在内存中，类名一起读出存入缓存
+                windows = self._watch_source.list_windows(with_class=True)
+                self.app_cache.store_classes({w['xid']: w['app'] for w in windows})
+            else:
+                windows = self._with_classes(groupy_x11.list_windows(with_class=False))
+        except Exception as e:
+            print(f"窗口枚举错误: {e}")
+            return
+        self.apply_snapshot(windows)
+        self.synced = True
+
+    def refresh_async(self, loader):
+        """在工作线程中全量枚举，不阻塞主循环
+
+        类名分批到达时先加入已知类名的窗口，完整结果到达后再删除已关闭的窗口。
+        """
+        from groupy_async import enumerate_job
+        self._loader = loader
+        loader.start(lambda emit, cancelled: enumerate_job(emit, cancelled, self.app_cache),
+                     self._apply_fetched, self._apply_fetched)
+
+    def _apply_fetched(self, result):
+        from groupy_async import RETRY_DELAY, unresolved
+
+        if result is None:
+            return
+        windows, classes, complete = result
+        self.app_cache.store_classes(classes)
+        if complete:
+            # xprop 超时的窗口先以 Unknown 显示，稍后重新查询
+            self.apply_snapshot(self._with_classes([dict(w) for w in windows], fetch=False))
+            self.synced = True
+            if unresolved(windows, self.app_cache) and self._retry_id is None:
+                from gi.repository import GLib
+                self._retry_id = GLib.timeout_add_seconds(RETRY_DELAY, self._retry_unresolved)
+            return
+        known = [dict(w) for w in windows if w['xid'] in self.app_cache]
+        self.order = [w['xid'] for w in windows]
+        for info in self._with_classes(known):
+            self._update(info)
+
+    def _retry_unresolved(self):
+        self._retry_id = None
+        if self._loader is not None:
+            self.refresh_async(self._loader)
+        return False
+
+    def ensure_fresh(self):
+        """监听中且已同步则什么都不做，否则全量刷新"""
+        if not (self.watching and self.synced):
+            self.refresh()
+
+    def apply_snapshot(self, windows):
+        """用一份完整窗口列表更新注册表"""
+        new_order = [w['xid'] for w in windows]
+        current = set(new_order)
+        for xid in [x for x in self.order if x not in current]:
+            self._remove(xid)
+        self.order = new_order
+        for info in windows:
+            self._update(info)
+
+    def _with_classes(self, windows, fetch=True):
+        """从缓存补上 WM_CLASS，只查询新窗口 (fetch=False 时只读缓存)
+
+        查询会阻塞主线程 (子进程来源) 时先以 Unknown 显示，在工作线程中补查。
+        """
+        classes = self.app_cache.wm_classes([w['xid'] for w in windows], fetch)
+        for info in windows:
+            info['app'] = classes[info['xid']]
+        if fetch:
+            deferred = [w['xid'] for w in windows
+                        if w['app'] is None and w['xid'] not in self.app_cache]
+            if deferred:
+                self._defer_classes(deferred)
+        return windows
+
+    def _defer_classes(self, xids):
+        """在工作线程中查询这些窗口的类名，结果回到主线程后更新"""
+        from groupy_async import AsyncLoader
+        self._deferred.update(xids)
+        if self._class_loader is None:
+            self._class_loader = AsyncLoader("groupy-classes")
+        pending = list(self._deferred)
+        self._class_loader.start(
+            lambda emit, cancelled: groupy_x11.get_app_names(pending, cancelled=cancelled),
+            self._apply_deferred_classes)
+
+    def _apply_deferred_classes(self, classes):
+        from groupy_async import RETRY_DELAY
+
+        self.app_cache.store_classes(classes)
+        for xid, wm_class in classes.items():
+            self._deferred.discard(xid)
+            info = self.windows.get(xid)
+            if info is not None and info.get('app') != wm_class:
+                self._update(dict(info, app=wm_class))
+        self._deferred &= set(self.windows)
+        if self._deferred and self._class_retry_id is None:
+            # xprop 超时的稍后再查
+            from gi.repository import GLib
+            self._class_retry_id = GLib.timeout_add_seconds(RETRY_DELAY, self._retry_deferred)
+
+    def _retry_deferred(self):
+        self._class_retry_id = None
+        self._deferred &= set(self.windows)
+        if self._deferred:
+            self._defer_classes(())
+        return False
+
+    def _update(self, info):
+        xid = info['xid']
+        old = self.windows.get(xid)
+        if old == info:
+            return
+        self.windows[xid] = info
+        self.emit('changed' if old else 'added', xid, info)
+
+    def _remove(self, xid):
+        info = self.windows.pop(xid, None)
+        self._deferred.discard(xid)
+        self.app_cache.evict(xid)
+        if info is not None:
+            self.emit('removed', xid, info)
+
+    # ------------------------------------------------------------
+    # X 事件监听
+
+    def start(self):
+        """订阅 X 属性变化事件，接入 GLib 主循环。返回是否成功"""
+        if self.watching:
+            return True
+        if not groupy_x11.native_available():
+            return self._start_source_watch()
+        try:
+            from gi.repository import GLib
+            from Xlib import X
+
+            d = groupy_x11.get_display()
+            root = d.screen().root
+            root.change_attributes(event_mask=X.PropertyChangeMask)
+            self.refresh()
+            for xid in self.order:
+                self._watch_client(xid)
+            self.active = self._read_active()
+            d.flush()
+
+            self._source_id = GLib.io_add_watch(
+                d.fileno(), GLib.PRIORITY_DEFAULT,
+                GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+                self._on_x_readable)
+            self.watching = True
+            # 订阅期间可能已有事件进入队列
+            self.process_events()
+        except Exception as e:
+            print(f"无法监听窗口变化: {e}")
+            self.watching = False
+        return self.watching
+
+    def _start_source_watch(self):
+        """没有 python-xlib 时用窗口来源自带的通知 (如 Wnck 信号)，变化合并成一次全量同步"""
+        from groupy_sources import sources
+        source = sources.watcher()
+        if source is None:
+            return False
+        try:
+            if not source.watch(self._on_source_changed):
+                return False
+        except Exception as e:
+            print(f"无法监听窗口变化 ({source.name}): {e}")
+            return False
+        self._watch_source = source
+        self.refresh()
+        self.watching = True
+        return True
+
+    def _on_source_changed(self):
+        if self._resync_id is None:
+            from gi.repository import GLib
+            self._resync_id = GLib.idle_add(self._resync)
+
+    def _resync(self):
+        self._resync_id = None
+        if self.watching:
+            self.refresh()
+        return False
+
+    def stop(self):
+        """停止监听"""
+        if self._source_id is not None:
+            from gi.repository import GLib
+            GLib.source_remove(self._source_id)
+            self._source_id = None
+        self.watching = False
+
+    def _watch_client(self, xid):
+        from Xlib import X
+        try:
+            win = groupy_x11.get_display().create_resource_object('window', xid)
+            win.change_attributes(event_mask=X.PropertyChangeMask)
+        except Exception:
+            pass
+
+    def _read_active(self):
+        d = groupy_x11.get_display()
+        prop = d.screen().root.get_full_property(groupy_x11.atom('_NET_ACTIVE_WINDOW'), 0)
+        if prop is None or len(prop.value) == 0:
+            return None
+        return int(prop.value[0]) or None
+
+    def _on_x_readable(self, fd, condition):
+        from gi.repository import GLib
+        from Xlib import error as xerror
+        try:
+            if condition & (GLib.IOCondition.HUP | GLib.IOCondition.ERR):
+                raise xerror.ConnectionClosedError("X 连接已断开")
+            self.process_events()
+        except (xerror.ConnectionClosedError, OSError) as e:
+            # 连接断了，这个监听不会再有事件
+            print(f"X 连接错误，停止监听: {e}")
+            groupy_x11.reset_display()
+            self._source_id = None
+            self.watching = False
+            self.synced = False
+            return False
+        except Exception as e:
+            # 单个事件出错 (如窗口已关闭)，保留监听
+            print(f"X 事件处理错误: {e}")
+        return True
+
+    def process_events(self):
+        """处理所有待处理的 X 事件"""
+        if self._watch_source is not None:
+            return  # 变化由来源的信号通知
+        from Xlib import X
+
+        d = groupy_x11.get_display()
+        atom_names = {groupy_x11.atom(n): n for n in
+                      ('_NET_CLIENT_LIST', '_NET_ACTIVE_WINDOW') + CLIENT_WATCH_PROPS}
+        root_id = d.screen().root.id
+        # 下面的查询要等回复，回复之前到达的事件会进入 python-xlib 的内部队列，
+        # 这些事件不会再让 fd 可读，所以处理完一轮后再检查队列，直到清空
+        while d.pending_events():
+            client_list_changed = False
+            changed = set()
+            active_changed = False
+            while d.pending_events():
+                event = d.next_event()
+                if event.type != X.PropertyNotify:
+                    continue
+                name = atom_names.get(event.atom)
+                if event.window.id == root_id:
+                    if name == '_NET_CLIENT_LIST':
+                        client_list_changed = True
+                    elif name == '_NET_ACTIVE_WINDOW':
+                        active_changed = True
+                elif name in CLIENT_WATCH_PROPS:
+                    changed.add(event.window.id)
+
+            if client_list_changed:
+                self._sync_client_list()
+            if changed:
+                xids = [x for x in changed if x in self.windows]
+                for info in self._with_classes(groupy_x11.query_windows(xids, with_class=False)):
+                    self._update(info)
+            if active_changed:
+                active = self._read_active()
+                if active != self.active:
+                    self.active = active
+                    self.emit('active', active, self.windows.get(active))
+
+    def _sync_client_list(self):
+        """客户端列表变化：只读取新增窗口的属性"""
+        new_order = groupy_x11.native_client_list()
+        current = set(new_order)
+        for xid in [x for x in self.order if x not in current]:
+            self._remove(xid)
+        added = [x for x in new_order if x not in self.windows]
+        self.order = new_order
+        for xid in added:
+            self._watch_client(xid)
+        for info in self._with_classes(groupy_x11.query_windows(added, with_class=False)):
+            self._update(info)
+        groupy_x11.get_display().flush()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Groupy Search - 窗口标题搜索索引
+
+对每个窗口的标题和应用名建立 1~3 元组倒排表 (按 XID)，
+窗口打开、关闭、改名时增量更新。子串查询先用倒排表求候选集，
+再逐个确认，结果与 `search in name.lower() or search in app.lower()` 完全一致。
+
+QueryCache 缓存逐字输入时的查询结果：新查询是上一个的延伸时只在上次结果里筛选，
+退格时直接从 LRU 取回，窗口变化时只重新判断变化的那一个窗口。
+"""
+
+from collections import OrderedDict
+
+GRAM_SIZE = 3
+
+
+def _grams(text):
+    """文本中所有长度 1~3 的子串"""
+    grams = set()
+    for n in range(1, GRAM_SIZE + 1):
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return grams
+
+
+def _query_grams(query):
+    """查询串用到的 gram：短查询本身，长查询取全部三元组"""
+    if len(query) <= GRAM_SIZE:
+        return {query}
+    return {query[i:i + GRAM_SIZE] for i in range(len(query) - GRAM_SIZE + 1)}
+
+
+class TrigramIndex:
+    """标题/应用名的 n-gram 倒排索引"""
+
+    def __init__(self):
+        self.docs = {}      # key -> (小写字段, ...)
+        self.grams = {}     # key -> 该文档的 gram 集合
+        self.postings = {}  # gram -> {key}
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, key):
+        return key in self.docs
+
+    def add(self, key, *fields):
+        """添加或更新一个文档 (字段未变化时不做任何事)"""
+        lowered = tuple(f.lower() for f in fields if f)
+        if self.docs.get(key) == lowered:
+            return
+        self.remove(key)
+        grams = set()
+        for field in lowered:
+            grams |= _grams(field)
+        self.docs[key] = lowered
+        self.grams[key] = grams
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        """删除一个文档"""
+        if key not in self.docs:
+            return
+        del self.docs[key]
+        for gram in self.grams.pop(key):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+    def retain(self, keys):
+        """只保留给定的文档，其余删除"""
+        keys = set(keys)
+        for key in [k for k in self.docs if k not in keys]:
+            self.remove(key)
+
+    def clear(self):
+        self.docs.clear()
+        self.grams.clear()
+        self.postings.clear()
+
+    def matches(self, query, key):
+        """单个文档是否包含子串 query (query 需已小写)"""
+        doc = self.docs.get(key)
+        return doc is not None and any(query in field for field in doc)
+
+    def search(self, query, candidates=None):
+        """子串查询，返回命中的 key 集合
+
+        给出 candidates 时只在其中逐个确认，不查倒排表。
+        """
+        query = query.lower()
+        if candidates is not None:
+            return {key for key in candidates if self.matches(query, key)}
+        if not query:
+            return set(self.docs)
+
+        # 按倒排表长度从小到大求交集
+        lists = []
+        for gram in _query_grams(query):
+            keys = self.postings.get(gram)
+            if not keys:
+                return set()
+            lists.append(keys)
+        lists.sort(key=len)
+        candidates = lists[0].intersection(*lists[1:])
+
+        if len(query) <= GRAM_SIZE:
+            return candidates
+        # 三元组都出现不代表子串出现，逐个确认
+        return {key for key in candidates
+                if any(query in field for field in self.docs[key])}
+
+
+class QueryCache:
+    """逐字输入的查询结果缓存 (有界 LRU)
+
+    match(query, candidates) 返回 {key: score}，candidates 为 None 时查全部；
+    check(query, key) 返回单个 key 的分数，不匹配返回 None。
+    查询 q 延伸自已缓存的 p (p 是 q 的前缀) 时，q 的结果一定是 p 的子集。
+    """
+
+    def __init__(self, match, check, size=32):
+        self.match = match
+        self.check = check
+        self.size = size
+        self.entries = OrderedDict()  # query -> {key: score}
+        self.hits = 0
+        self.narrowed = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query):
+        """查询，返回 {key: score} (调用方不要修改)"""
+        result = self.entries.get(query)
+        if result is not None:
+            self.entries.move_to_end(query)
+            self.hits += 1
+            return result
+
+        base = self._longest_prefix(query)
+        if base is not None:
+            self.narrowed += 1
+            result = self.match(query, self.entries[base])
+        else:
+            self.misses += 1
+            result = self.match(query, None)
+
+        self.entries[query] = result
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return result
+
+    def _longest_prefix(self, query):
+        """已缓存的、query 以之开头的最长查询"""
+        best = None
+        for cached in self.entries:
+            if query.startswith(cached) and (best is None or len(cached) > len(best)):
+                best = cached
+        return best
+
+    def update(self, key):
+        """一个 key 新增或内容变化：只对它重新判断每个缓存的查询"""
+        for query, result in self.entries.items():
+            score = self.check(query, key)
+            if score is None:
+                result.pop(key, None)
+            else:
+                result[key] = score
+
+    def discard(self, key):
+        """一个 key 被删除"""
+        for result in self.entries.values():
+            result.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
@@ -6,12 +6,21 @@ import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk
 
+import groupy_profile
+from groupy_async import AsyncLoader
+from groupy_listbox import ListBoxReconciler
+from groupy_search import TrigramIndex
+from groupy_x11 import activate_window, list_windows, user_time
+
 APP_NAME = "Groupy Lite"
 
 class GroupyLiteWindow(Gtk.Window):
     def __init__(self):
         Gtk.Window.__init__(self, title=APP_NAME)
         self.set_default_size(300, 500)
+        self.index = TrigramIndex()  # wid -> 标题
+        self.loader = AsyncLoader()  # 枚举在后台线程运行
+        self.matched = None  # 搜索命中的 wid 集合，None 表示不过滤
 
         vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         self.add(vbox)
@@ -22,10 +31,13 @@ class GroupyLiteWindow(Gtk.Window):
         # 搜索框
         self.search_entry = Gtk.Entry()
         self.search_entry.set_placeholder_text("🔍 搜索...")
+        self.search_entry.connect("changed", self.on_search)
         vbox.pack_start(self.search_entry, False, False, 5)
 
-        # 窗口列表
+        # 窗口列表：按 wid 对比更新，搜索只改变过滤
         self.listbox = Gtk.ListBox()
+        self.rows = ListBoxReconciler(self.listbox, self.create_row, self.update_row)
+        self.rows.set_filter(lambda wid, label: self.matched is None or wid in self.matched)
         sw = Gtk.ScrolledWindow()
         sw.add(self.listbox)
         vbox.pack_start(sw, True, True, 0)
@@ -45,66 +57,84 @@ class GroupyLiteWindow(Gtk.Window):
         print("窗口已显示")
 
     def get_windows(self):
-        """获取窗口"""
+        """获取窗口 (来源由 groupy_sources 选择，出错时自动换用其他来源)"""
         try:
-            import subprocess
-            result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True, timeout=2)
             windows = []
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        name = ' '.join(parts[3:])
-                        if name and 'N/A' not in name:
-                            windows.append(name)
+            for win in list_windows(with_class=False):
+                name = win['name']
+                if name and 'N/A' not in name:
+                    windows.append((win['id'], name))
             return windows
         except Exception as e:
-            print(f"wmctrl 错误: {e}")
+            print(f"枚举窗口错误: {e}")
             return []
 
     def refresh(self, widget):
-        """刷新"""
-        # 清除
-        for child in self.listbox.get_children():
-            self.listbox.remove(child)
+        """刷新 (后台枚举，新的刷新会取消还没返回的旧刷新)"""
+        self.loader.start(lambda emit, cancelled: self.get_windows(), self.show_windows)
 
-        search = self.search_entry.get_text().lower()
-        windows = self.get_windows()
+    def show_windows(self, windows):
+        """主线程: 与当前的行对比，只增删改变化的行"""
+        groupy_profile.mark("first_enumeration")
         print(f"找到 {len(windows)} 个窗口")
 
-        for name in windows:
-            if search and search not in name.lower():
-                continue
-            self.add_button(name)
+        # 增量更新索引：只有新开或改名的窗口需要重建
+        for wid, name in windows:
+            self.index.add(wid, name)
+        self.index.retain(wid for wid, name in windows)
 
-    def add_button(self, name):
-        """添加按钮"""
-        btn = Gtk.Button(label=name[:50] + "..." if len(name) > 50 else name)
-        btn.set_alignment(0, 0)
-        btn.connect("clicked", self.on_click, name)
-        self.listbox.add(btn)
+        self.rows.reconcile((wid, self.button_label(name)) for wid, name in windows)
+        self.on_search(None)
+
+    def on_search(self, widget):
+        """搜索：只重新过滤，不重建行"""
+        search = self.search_entry.get_text().lower()
+        self.matched = self.index.search(search) if search else None
+        self.rows.invalidate()
+
+    def button_label(self, name):
+        return name[:50] + "..." if len(name) > 50 else name
 
-    def on_click(self, widget, name):
-        """点击"""
-        print(f"点击: {name}")
+    def create_row(self, wid, label):
+        """新窗口的行 (按钮)"""
+        btn = Gtk.Button(label=label)
+        btn.set_alignment(0, 0)
+        btn.connect("clicked", self.on_click, wid)
+        row = Gtk.ListBoxRow()
+        row.add(btn)
+        return row
+
+    def update_row(self, row, label):
+        """窗口改名"""
+        row.get_child().set_label(label)
+
+    def on_click(self, widget, wid):
+        """点击：按 XID 激活，标题重复也不会跳错"""
+        print(f"点击: {widget.get_label()}")
         try:
-            import subprocess
-            # 尝试多种方法激活窗口
-            subprocess.run(['wmctrl', '-a', name], capture_output=True, timeout=1)
-            print(f"激活成功")
+            if activate_window(wid, user_time(self)):
+                print(f"激活成功")
+            else:
+                print(f"窗口管理器未确认焦点切换")
         except Exception as e:
-            print(f"wmctrl 失败: {e}")
+            print(f"激活失败: {e}")
             # 备选方案
             try:
-                subprocess.run(['xdotool', 'search', '--name', name, 'windowactivate'], 
+                import subprocess
+                subprocess.run(['xdotool', 'windowactivate', wid],
                               capture_output=True, timeout=1)
             except:
                 pass
 
-if __name__ == "__main__":
+
+def main():
     try:
         win = GroupyLiteWindow()
         Gtk.main()
     except Exception as e:
         print(f"错误: {e}")
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
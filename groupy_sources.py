@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""Groupy Sources - 可替换的窗口来源
+
+每种来源实现同一组操作:
+  list_windows(with_class)   列出窗口 (格式同 groupy_x11.list_windows)
+  app_names(xids, ...)       批量读取 WM_CLASS 类名
+  activate(xid, timestamp)   按 XID 激活窗口
+  watch(callback)            窗口增删改时回调 (不支持时返回 False)
+
+来源: xlib (python-xlib 直连 X)、wmctrl (wmctrl + xprop 子进程)、
+wnck (libwnck，只能在主线程使用)。
+
+启动时探测可用的来源并计时，按耗时排序，最快的优先；探测结果缓存一天。
+运行中某个来源出错 (例如远程桌面里没有 wmctrl) 时自动换下一个，
+出错的来源暂停一段时间后再试。config.json 的 "window_source" 可指定优先的来源。
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+
+import groupy_x11
+
+PROBE_ROUNDS = 2  # 每个来源计时的次数，取最小值
+PROBE_TTL = 24 * 3600  # 秒，探测结果的有效期
+PROBE_FILE = os.path.expanduser("~/.cache/groupy/window-sources.json")
+RETRY_AFTER = 30  # 秒，出错的来源暂停使用的时间
+
+
+def _main_thread():
+    return threading.current_thread() is threading.main_thread()
+
+
+class WindowSource:
+    """窗口来源的公共接口"""
+
+    name = None
+    main_thread_only = False  # 只能在 GTK 主线程调用
+    blocking = False  # 查询要启动子进程并等待 (不应在主线程调用)
+
+    def available(self):
+        """当前环境能否使用"""
+        return False
+
+    def list_windows(self, with_class=True):
+        raise NotImplementedError
+
+    def app_names(self, xids, progress=None, cancelled=None):
+        raise NotImplementedError
+
+    def activate(self, xid, timestamp=0):
+        raise NotImplementedError
+
+    def watch(self, callback):
+        """窗口增删改时调用 callback()，返回是否支持"""
+        return False
+
+
+class XlibSource(WindowSource):
+    """python-xlib 流水线读取属性，EWMH 消息激活"""
+
+    name = "xlib"
+
+    def available(self):
+        return groupy_x11.native_available()
+
+    def list_windows(self, with_class=True):
+        return groupy_x11.native_list_windows(with_class)
+
+    def app_names(self, xids, progress=None, cancelled=None):
+        try:
+            return groupy_x11.native_app_names(xids)
+        except Exception:
+            groupy_x11.reset_display()
+            raise
+
+    def activate(self, xid, timestamp=0):
+        try:
+            return groupy_x11.native_activate(xid, timestamp)
+        except Exception:
+            groupy_x11.reset_display()
+            raise
+
+    # 细粒度的 X 事件监听由 WindowRegistry 直接实现
+
+
+class WmctrlSource(WindowSource):
+    """wmctrl -l 列出窗口，并发 xprop 读取类名，wmctrl -i -a 激活"""
+
+    name = "wmctrl"
+    blocking = True
+
+    def available(self):
+        return bool(os.environ.get('DISPLAY')) and shutil.which('wmctrl') is not None
+
+    def list_windows(self, with_class=True):
+        return groupy_x11.subprocess_list_windows(with_class)
+
+    def app_names(self, xids, progress=None, cancelled=None):
+        if shutil.which('xprop') is None:
+            raise RuntimeError("没有 xprop")
+        return groupy_x11.xprop_app_names(xids, progress=progress, cancelled=cancelled)
+
+    def activate(self, xid, timestamp=0):
+        return groupy_x11.wmctrl_activate(xid)
+
+
+class WnckSource(WindowSource):
+    """libwnck 的窗口列表 (由主循环中的事件保持最新)"""
+
+    name = "wnck"
+    main_thread_only = True
+
+    def __init__(self):
+        self._screen = None
+
+    def _get_screen(self):
+        if self._screen is None:
+            import gi
+            gi.require_version('Wnck', '3.0')
+            from gi.repository import Wnck
+            self._screen = Wnck.Screen.get_default()
+            if self._screen is None:
+                raise RuntimeError("Wnck 无法获取屏幕")
+            self._screen.force_update()
+        return self._screen
+
+    def available(self):
+        if not os.environ.get('DISPLAY'):
+            return False
+        try:
+            import gi
+            gi.require_version('Wnck', '3.0')
+            from gi.repository import Wnck  # noqa: F401
+            return True
+        except (ImportError, ValueError):
+            return False
+
+    def list_windows(self, with_class=True):
+        windows = []
+        for win in self._get_screen().get_windows():
+            xid = win.get_xid()
+            workspace = win.get_workspace()
+            if win.is_pinned():
+                desktop = -1
+            else:
+                desktop = workspace.get_number() if workspace is not None else None
+            windows.append({
+                'id': groupy_x11.format_wid(xid),
+                'xid': xid,
+                'name': win.get_name() or '',
+                'app': win.get_class_group_name() if with_class else None,
+                'pid': win.get_pid() or None,
+                'desktop': desktop,
+            })
+        return windows
+
+    def app_names(self, xids, progress=None, cancelled=None):
+        from gi.repository import Wnck
+        self._get_screen()
+        result = {}
+        for xid in xids:
+            win = Wnck.Window.get(xid)
+            result[xid] = win.get_class_group_name() if win is not None else None
+        return result
+
+    def activate(self, xid, timestamp=0):
+        from gi.repository import Wnck
+        self._get_screen()
+        win = Wnck.Window.get(xid)
+        if win is None:
+            return False
+        workspace = win.get_workspace()
+        if workspace is not None and not win.is_pinned():
+            workspace.activate(timestamp)
+        win.activate(timestamp)
+        return True
+
+    def watch(self, callback):
+        screen = self._get_screen()
+
+        def track(win):
+            win.connect("name-changed", lambda w: callback())
+
+        def on_opened(screen, win):
+            track(win)
+            callback()
+
+        for win in screen.get_windows():
+            track(win)
+        screen.connect("window-opened", on_opened)
+        screen.connect("window-closed", lambda s, w: callback())
+        return True
+
+
+class SourceSelector:
+    """按探测到的耗时选择来源，出错时换下一个"""
+
+    def __init__(self, candidates=None, probe_file=PROBE_FILE):
+        self.candidates = candidates or [XlibSource(), WmctrlSource(), WnckSource()]
+        self.probe_file = probe_file
+        self.timings = None  # 来源名 -> 列窗口耗时 (毫秒)，None 表示还没探测
+        self.failed = {}  # 来源名 -> 出错时间 (工作线程和主线程都会修改，持锁访问)
+        self.last_used = None
+        self._partial = False  # 探测时跳过了只能在主线程使用的来源
+        self._lock = threading.RLock()
+
+    def get(self, name):
+        for source in self.candidates:
+            if source.name == name:
+                return source
+        return None
+
+    # ---------- 探测 ----------
+
+    def _environment(self):
+        return {
+            'display': os.environ.get('DISPLAY'),
+            'session': os.environ.get('XDG_SESSION_TYPE'),
+            'available': [s.name for s in self.candidates if s.available()],
+        }
+
+    def _load_probe(self, environment):
+        try:
+            with open(self.probe_file, 'r') as f:
+                data = json.load(f)
+            if (data.get('environment') == environment and data.get('complete')
+                    and time.time() - data.get('time', 0) < PROBE_TTL):
+                return data.get('timings')
+        except Exception:
+            pass
+        return None
+
+    def _save_probe(self, environment, timings):
+        tmp = self.probe_file + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.probe_file), exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump({'environment': environment, 'time': int(time.time()),
+                           'timings': timings, 'complete': True}, f)
+            os.replace(tmp, self.probe_file)
+        except Exception as e:
+            print(f"保存窗口来源探测结果失败: {e}")
+
+    def probe(self, force=False):
+        """对每个可用的来源计时列窗口，返回 {来源名: 毫秒}
+
+        在工作线程中探测时跳过只能在主线程使用的来源，结果只留在内存里，
+        之后第一次在主线程调用时补测这些来源，完整后才写入缓存文件。
+        """
+        with self._lock:
+            main = _main_thread()
+            if self.timings is not None and not force and not (self._partial and main):
+                return self.timings
+            environment = self._environment()
+            if self.timings is not None and not force:
+                timings = dict(self.timings)  # 补测跳过的来源
+            else:
+                timings = None if force else self._load_probe(environment)
+            if timings is None or self._partial:
+                timings = timings or {}
+                skipped = False
+                for source in self.candidates:
+                    if source.name not in environment['available'] or source.name in timings:
+                        continue
+                    if source.main_thread_only and not main:
+                        skipped = True  # 不计时，暂时排在最后
+                        continue
+                    try:
+                        best = None
+                        for _ in range(PROBE_ROUNDS):
+                            start = time.perf_counter()
+                            source.list_windows(with_class=False)
+                            elapsed = (time.perf_counter() - start) * 1000
+                            best = elapsed if best is None else min(best, elapsed)
+                        timings[source.name] = round(best, 3)
+                    except Exception as e:
+                        print(f"窗口来源 {source.name} 不可用: {e}")
+                self._partial = skipped
+                if not skipped:
+                    self._save_probe(environment, timings)
+                print("窗口来源耗时 (毫秒): " + ", ".join(
+                    f"{name} {ms:.1f}" for name, ms in sorted(timings.items(), key=lambda t: t[1])))
+            self.timings = timings
+            return timings
+
+    def ranking(self):
+        """按优先级排列的来源：配置指定的、已计时的 (快的在前)、未计时的"""
+        timings = self.probe()
+        from groupy_config import get_config
+        preferred = get_config().get("window_source", "auto")
+        untimed = len(self.candidates)
+        order = {s.name: i for i, s in enumerate(self.candidates)}
+
+        def key(source):
+            if source.name == preferred:
+                return (0, 0)
+            if source.name in timings:
+                return (1, timings[source.name])
+            return (2, untimed + order[source.name])
+
+        return sorted(self.candidates, key=key)
+
+    def usable(self):
+        """当前线程可以使用、且没有在暂停期内的来源"""
+        now = time.monotonic()
+        main = _main_thread()
+        timings = self.probe()
+        result = []
+        for source in self.ranking():
+            if source.main_thread_only and not main:
+                continue
+            with self._lock:
+                failed_at = self.failed.get(source.name)
+            if failed_at is not None and now - failed_at < RETRY_AFTER:
+                continue
+            if source.name not in timings and not source.available():
+                continue
+            result.append(source)
+        return result
+
+    def would_block(self):
+        """在主线程中，且首选的来源要等子进程 (调用方应改在工作线程中查询)"""
+        if not _main_thread():
+            return False
+        for source in self.usable():
+            return source.blocking
+        return False
+
+    # ---------- 调用 ----------
+
+    def call(self, operation, *args, **kwargs):
+        """依次尝试可用的来源，返回第一个成功的结果"""
+        errors = []
+        for source in self.usable():
+            try:
+                result = getattr(source, operation)(*args, **kwargs)
+            except Exception as e:
+                with self._lock:
+                    self.failed[source.name] = time.monotonic()
+                errors.append(f"{source.name}: {e}")
+                print(f"窗口来源 {source.name} 出错，换用下一个: {e}")
+                continue
+            with self._lock:
+                self.failed.pop(source.name, None)
+            self.last_used = source.name
+            return result
+        raise RuntimeError("没有可用的窗口来源" + (f" ({'; '.join(errors)})" if errors else ""))
+
+    def watcher(self):
+        """第一个能在主线程监听窗口变化的来源 (没有则 None)"""
+        for source in self.usable():
+            if type(source).watch is not WindowSource.watch:
+                return source
+        return None
+
+
+# 进程内共享的选择器
+sources = SourceSelector()
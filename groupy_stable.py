@@ -6,6 +6,10 @@ import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
 
+import groupy_profile
+from groupy_x11 import activate_window, list_windows, user_time
+from groupy_async import AsyncLoader
+
 APP_NAME = "Groupy Lite"
 
 class GroupyLiteWindow(Gtk.Window):
@@ -15,7 +19,8 @@ class GroupyLiteWindow(Gtk.Window):
         self.set_position(Gtk.WindowPosition.CENTER)
         self.set_keep_above(True)  # 置顶
         self.set_resizable(True)
-        self.windows = []  # 存储窗口名称
+        self.windows = []  # 存储 (wid, 窗口名称)
+        self.loader = AsyncLoader()  # 枚举在后台线程运行
 
         vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
         self.add(vbox)
@@ -54,25 +59,37 @@ class GroupyLiteWindow(Gtk.Window):
         self.load_windows(None)
 
     def load_windows(self, widget):
-        """加载窗口列表"""
+        """加载窗口列表 (后台枚举，不阻塞界面)"""
+        self.loader.start(lambda emit, cancelled: self.list_titles(),
+                          self.show_windows, on_error=self.show_error)
+
+    def list_titles(self):
+        """工作线程: 返回 [(wid, 标题)]"""
+        titles = []
+        for win in list_windows(with_class=False):
+            name = win['name']
+            if name and 'N/A' not in name:
+                titles.append((win['id'], name))
+        return titles
+
+    def show_error(self, e):
+        print(f"错误: {e}")
+        self.combo.remove_all()
+        self.combo.append_text(f"错误: {e}")
+
+    def show_windows(self, titles):
+        """主线程: 填充下拉框"""
         self.combo.remove_all()
         self.windows = []
         
         try:
-            import subprocess
-            result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True, timeout=2)
-            
             count = 0
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        name = ' '.join(parts[3:])
-                        if name and 'N/A' not in name:
-                            self.combo.append_text(name)
-                            self.windows.append(name)
-                            count += 1
+            for wid, name in titles:
+                self.combo.append_text(name)
+                self.windows.append((wid, name))
+                count += 1
             
+            groupy_profile.mark("first_enumeration")
             print(f"找到 {count} 个窗口")
             
             if count > 0:
@@ -86,13 +103,14 @@ class GroupyLiteWindow(Gtk.Window):
         """选择后自动跳转"""
         active = self.combo.get_active()
         if active >= 0 and active < len(self.windows):
-            name = self.windows[active]
+            wid, name = self.windows[active]
             print(f"选择: {name}")
             
             try:
-                import subprocess
-                result = subprocess.run(['wmctrl', '-a', name], capture_output=True, text=True, timeout=1)
-                print(f"跳转成功")
+                if activate_window(wid, user_time(self)):
+                    print(f"跳转成功")
+                else:
+                    print(f"窗口管理器未确认焦点切换")
             except Exception as e:
                 print(f"失败: {e}")
 
@@ -100,17 +118,16 @@ class GroupyLiteWindow(Gtk.Window):
         """跳转到选中"""
         active = self.combo.get_active()
         if active >= 0 and active < len(self.windows):
-            name = self.windows[active]
+            wid, name = self.windows[active]
             print(f"跳转: {name}")
             
             try:
-                import subprocess
-                result = subprocess.run(['wmctrl', '-a', name], capture_output=True, text=True, timeout=1)
-                print(f"结果: {result.returncode}")
+                print(f"结果: {activate_window(wid, user_time(self))}")
             except Exception as e:
-                print(f"wmctrl 失败: {e}")
+                print(f"激活失败: {e}")
 
-if __name__ == "__main__":
+
+def main():
     try:
         print("启动...")
         win = GroupyLiteWindow()
@@ -122,3 +139,7 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Groupy Tabs - 标签页索引与标签控件池
+
+TabIndex 同时维护 XID -> 标签、页面控件 -> XID、分组 -> XID 集合，
+增删都是 O(1)，切换页面、关闭窗口时不需要遍历 notebook。
+
+聊天类应用整天打开、关闭短命窗口，每次新建一整套标签控件
+(内容容器、标签栏上的文字和关闭按钮) 会不断产生垃圾。TabPool 把关闭的
+标签控件清空后留着，下次直接复用，信号只在创建时连接一次。
+"""
+
+POOL_SIZE = 32  # 最多保留的空闲标签控件数
+
+
+class Tab:
+    """一个窗口标签页的全部控件"""
+
+    __slots__ = ('container', 'tab_box', 'label', 'close_btn', 'preview',
+                 'xid', 'window', 'name', 'group')
+
+    def __init__(self, container, tab_box, label, close_btn):
+        self.container = container  # 页面内容
+        self.tab_box = tab_box      # 标签栏上的控件
+        self.label = label
+        self.close_btn = close_btn
+        self.preview = None         # 标签提示中的缩略图 (悬停时才创建)
+        self.xid = None
+        self.window = None
+        self.name = ""
+        self.group = None
+
+
+class TabIndex:
+    """XID / 页面控件 / 分组之间的双向索引"""
+
+    def __init__(self):
+        self.tabs = {}    # xid -> Tab
+        self.pages = {}   # 页面控件 -> xid
+        self.groups = {}  # 分组名 -> {xid}
+        self.group_pages = {}  # 分组名 -> 用户新建的分组标签
+        self.group_names = {}  # 分组页面控件 -> 分组名
+
+    def __len__(self):
+        return len(self.tabs)
+
+    def __contains__(self, xid):
+        return xid in self.tabs
+
+    def get(self, xid):
+        return self.tabs.get(xid)
+
+    def add(self, tab):
+        self.tabs[tab.xid] = tab
+        self.pages[tab.container] = tab.xid
+        if tab.group is not None:
+            self.groups.setdefault(tab.group, set()).add(tab.xid)
+
+    def remove(self, xid):
+        """移除并返回标签 (不存在时返回 None)"""
+        tab = self.tabs.pop(xid, None)
+        if tab is None:
+            return None
+        self.pages.pop(tab.container, None)
+        members = self.groups.get(tab.group)
+        if members is not None:
+            members.discard(xid)
+            if not members and tab.group not in self.group_pages:
+                del self.groups[tab.group]
+        return tab
+
+    def by_page(self, page):
+        """页面控件 -> 标签"""
+        xid = self.pages.get(page)
+        return self.tabs.get(xid) if xid is not None else None
+
+    def xids_in(self, group):
+        return self.groups.get(group, set())
+
+    def group_tab(self, name):
+        """分组名 -> 分组标签 (没有新建过时返回 None)"""
+        return self.group_pages.get(name)
+
+    def group_of_page(self, page):
+        """页面控件 -> 分组名 (不是分组页面时返回 None)"""
+        return self.group_names.get(page)
+
+    def add_group(self, tab):
+        """用户新建的分组标签 (tab.group 为分组名，tab.xid 为 None)"""
+        self.group_pages[tab.group] = tab
+        self.group_names[tab.container] = tab.group
+        self.groups.setdefault(tab.group, set())
+
+    def remove_group(self, name):
+        """移除并返回分组标签，分组中的窗口标签不受影响"""
+        tab = self.group_pages.pop(name, None)
+        if tab is None:
+            return None
+        self.group_names.pop(tab.container, None)
+        if not self.groups.get(name):
+            self.groups.pop(name, None)
+        return tab
+
+
+class TabPool:
+    """复用关闭的标签控件"""
+
+    def __init__(self, create, max_size=POOL_SIZE):
+        self.create = create  # 新建 Tab 的函数 (只在池空时调用)
+        self.max_size = max_size
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.dropped = 0
+
+    def stats(self):
+        return {
+            'free': len(self.free),
+            'created': self.created,
+            'reused': self.reused,
+            'dropped': self.dropped,
+        }
+
+    def acquire(self):
+        if self.free:
+            self.reused += 1
+            return self.free.pop()
+        self.created += 1
+        return self.create()
+
+    def release(self, tab):
+        """清空内容后放回池中 (池满时丢弃)"""
+        for child in tab.container.get_children():
+            tab.container.remove(child)
+        tab.label.set_text("")
+        if tab.preview is not None:
+            tab.preview.clear()
+        tab.xid = None
+        tab.window = None
+        tab.name = ""
+        tab.group = None
+        if len(self.free) < self.max_size:
+            self.free.append(tab)
+        else:
+            self.dropped += 1
+            tab.container.destroy()
+            tab.tab_box.destroy()
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""Groupy Thumbs - 窗口缩略图
+
+用 XComposite 把窗口重定向到离屏 pixmap (窗口被遮挡时内容也完整)，
+再用 MIT-SHM 的 ShmGetImage 把像素直接写进共享内存，不经过 X socket 复制；
+没有 MIT-SHM (远程 X、容器隔离了 IPC) 时退回普通 GetImage。
+整张图包装成 cairo 图像 (不复制)，一次缩小到目标尺寸后只缓存小图。
+
+ThumbnailScheduler 只刷新当前需要显示 (可见/选中) 的缩略图，
+每次最多抓一张，选中的优先，缓存总字节数有上限。计时器是单次的，
+按下一张到期的时间设定，没有要刷新的缩略图时不会每 200 毫秒空转。
+
+需要 python-xlib、pycairo，服务端需要 Composite 扩展 (Xvfb 默认开启)。
+"""
+
+import ctypes
+import ctypes.util
+import math
+import time
+from collections import OrderedDict
+
+try:
+    from Xlib import X, error as xerror
+    from Xlib import display as xdisplay
+    from Xlib.ext import composite
+    from Xlib.protocol import rq
+    HAVE_XLIB = True
+except ImportError:
+    HAVE_XLIB = False
+
+THUMB_WIDTH = 280
+THUMB_HEIGHT = 160
+CAPTURE_INTERVAL = 200  # 毫秒，两次抓取之间的最短间隔 (限速)
+REFRESH_INTERVAL = 1.0  # 秒，选中的缩略图多久重新抓一次
+VISIBLE_REFRESH = 3.0  # 秒，其余可见的缩略图多久重新抓一次
+CACHE_BYTES = 16 * 1024 * 1024
+
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+# ============================================================
+# MIT-SHM 协议 (python-xlib 没有内置)
+
+if HAVE_XLIB:
+    class ShmQueryVersion(rq.ReplyRequest):
+        _request = rq.Struct(
+            rq.Card8('opcode'),
+            rq.Opcode(0),
+            rq.RequestLength(),
+        )
+        _reply = rq.Struct(
+            rq.ReplyCode(),
+            rq.Bool('shared_pixmaps'),
+            rq.Card16('sequence_number'),
+            rq.ReplyLength(),
+            rq.Card16('major_version'),
+            rq.Card16('minor_version'),
+            rq.Card16('uid'),
+            rq.Card16('gid'),
+            rq.Card8('pixmap_format'),
+            rq.Pad(15),
+        )
+
+    class ShmAttach(rq.Request):
+        _request = rq.Struct(
+            rq.Card8('opcode'),
+            rq.Opcode(1),
+            rq.RequestLength(),
+            rq.Card32('shmseg'),
+            rq.Card32('shmid'),
+            rq.Bool('read_only'),
+            rq.Pad(3),
+        )
+
+    class ShmDetach(rq.Request):
+        _request = rq.Struct(
+            rq.Card8('opcode'),
+            rq.Opcode(2),
+            rq.RequestLength(),
+            rq.Card32('shmseg'),
+        )
+
+    class ShmGetImage(rq.ReplyRequest):
+        _request = rq.Struct(
+            rq.Card8('opcode'),
+            rq.Opcode(4),
+            rq.RequestLength(),
+            rq.Drawable('drawable'),
+            rq.Int16('x'),
+            rq.Int16('y'),
+            rq.Card16('width'),
+            rq.Card16('height'),
+            rq.Card32('plane_mask'),
+            rq.Card8('format'),
+            rq.Pad(3),
+            rq.Card32('shmseg'),
+            rq.Card32('offset'),
+        )
+        _reply = rq.Struct(
+            rq.ReplyCode(),
+            rq.Card8('depth'),
+            rq.Card16('sequence_number'),
+            rq.ReplyLength(),
+            rq.Card32('visual'),
+            rq.Card32('size'),
+            rq.Pad(16),
+        )
+
+
+class SharedSegment:
+    """SysV 共享内存段，已挂到 X 服务端 (MIT-SHM)"""
+
+    def __init__(self, d, opcode, size):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        self.libc = libc
+        self.d = d
+        self.opcode = opcode
+        self.size = size
+        self.shmseg = None
+        self.shmid = libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if self.shmid < 0:
+            raise OSError(ctypes.get_errno(), "shmget 失败")
+        self.address = libc.shmat(self.shmid, None, 0)
+        if self.address in (None, ctypes.c_void_p(-1).value):
+            libc.shmctl(self.shmid, IPC_RMID, None)
+            raise OSError(ctypes.get_errno(), "shmat 失败")
+        try:
+            catch = xerror.CatchError()
+            shmseg = d.allocate_resource_id()
+            ShmAttach(display=d.display, onerror=catch, opcode=opcode,
+                      shmseg=shmseg, shmid=self.shmid, read_only=False)
+            d.sync()
+            if catch.get_error():
+                raise OSError("X 服务端无法挂接共享内存 (远程连接?)")
+            self.shmseg = shmseg
+        except BaseException:
+            libc.shmdt(ctypes.c_void_p(self.address))  # 挂接失败，卸下自己的映射
+            raise
+        finally:
+            # 双方都挂上后标记删除，进程退出时自动回收
+            libc.shmctl(self.shmid, IPC_RMID, None)
+
+    def buffer(self, size):
+        """共享内存的可写视图 (不复制)"""
+        return (ctypes.c_char * size).from_address(self.address)
+
+    def close(self):
+        if self.shmseg is not None:
+            ShmDetach(display=self.d.display, opcode=self.opcode, shmseg=self.shmseg)
+            self.d.sync()
+            self.libc.shmdt(ctypes.c_void_p(self.address))
+            self.shmseg = None
+
+
+# ============================================================
+# 抓取
+
+class WindowCapture:
+    """XComposite + MIT-SHM 抓取窗口内容并缩小"""
+
+    def __init__(self):
+        self.d = None
+        self.shm_opcode = None
+        self.segment = None
+        self.use_shm = True
+        self.redirected = set()
+        self.captures = 0
+        self.shm_captures = 0
+
+    def available(self):
+        """是否能抓取 (python-xlib + Composite 扩展)"""
+        if not HAVE_XLIB:
+            return False
+        try:
+            return self._get_display() is not None
+        except Exception:
+            return False
+
+    def _get_display(self):
+        # 单独的连接：不打扰注册表的事件流，出错不影响其他功能
+        if self.d is None:
+            d = xdisplay.Display()
+            if not d.has_extension('Composite'):
+                d.close()
+                return None
+            d.composite_query_version().reply()
+            shm = d.query_extension('MIT-SHM')
+            self.shm_opcode = shm.major_opcode if shm is not None else None
+            if self.shm_opcode is not None:
+                ShmQueryVersion(display=d.display, opcode=self.shm_opcode).reply()
+            self.d = d
+        return self.d
+
+    def _segment(self, size):
+        if not self.use_shm or self.shm_opcode is None:
+            return None
+        if self.segment is not None and self.segment.size >= size:
+            return self.segment
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+        try:
+            self.segment = SharedSegment(self.d, self.shm_opcode, size)
+        except OSError as e:
+            print(f"MIT-SHM 不可用，改用 GetImage: {e}")
+            self.use_shm = False
+        return self.segment
+
+    def redirect(self, xid):
+        """把窗口重定向到离屏存储 (自动模式，窗口照常显示)"""
+        if xid in self.redirected:
+            return
+        d = self._get_display()
+        catch = xerror.CatchError()
+        d.create_resource_object('window', xid).composite_redirect_window(
+            composite.RedirectAutomatic, onerror=catch)
+        self.redirected.add(xid)
+
+    def unredirect(self, xid):
+        if xid not in self.redirected:
+            return
+        self.redirected.discard(xid)
+        catch = xerror.CatchError()
+        self.d.create_resource_object('window', xid).composite_unredirect_window(
+            composite.RedirectAutomatic, onerror=catch)
+        self.d.flush()
+
+    def capture(self, xid, width=THUMB_WIDTH, height=THUMB_HEIGHT):
+        """抓取窗口并缩小到不超过 width x height，返回 cairo.ImageSurface；
+        窗口未映射 (最小化) 或已关闭时返回 None"""
+        import cairo
+
+        d = self._get_display()
+        if d is None:
+            return None
+        self.redirect(xid)
+        catch = xerror.CatchError()
+        pixmap = d.create_resource_object('window', xid).composite_name_window_pixmap(onerror=catch)
+        try:
+            try:
+                geom = pixmap.get_geometry()
+            except xerror.XError:
+                return None  # 窗口没有映射，没有离屏内容
+            w, h, depth = geom.width, geom.height, geom.depth
+            if depth == 24:
+                fmt = cairo.FORMAT_RGB24
+            elif depth == 32:
+                fmt = cairo.FORMAT_ARGB32
+            else:
+                return None
+            stride = cairo.ImageSurface.format_stride_for_width(fmt, w)
+            if stride != w * 4:
+                return None
+            size = stride * h
+
+            segment = self._segment(size)
+            if segment is not None:
+                ShmGetImage(display=d.display, opcode=self.shm_opcode, drawable=pixmap.id,
+                            x=0, y=0, width=w, height=h, plane_mask=0xFFFFFFFF,
+                            format=X.ZPixmap, shmseg=segment.shmseg, offset=0).reply()
+                data = segment.buffer(size)
+                self.shm_captures += 1
+            else:
+                data = bytearray(pixmap.get_image(0, 0, w, h, X.ZPixmap, 0xFFFFFFFF).data)
+            self.captures += 1
+            return scale_surface(cairo.ImageSurface.create_for_data(data, fmt, w, h, stride),
+                                 fmt, w, h, width, height)
+        except xerror.XError:
+            return None
+        finally:
+            pixmap.free()
+            d.flush()
+
+    def close(self):
+        if self.d is None:
+            return
+        for xid in list(self.redirected):
+            self.unredirect(xid)
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+        self.d.close()
+        self.d = None
+
+
+def scale_surface(source, fmt, w, h, width, height):
+    """缩小到不超过 width x height (保持比例)，返回新的小图；释放对源数据的引用"""
+    import cairo
+
+    scale = min(width / w, height / h, 1.0)
+    tw, th = max(1, int(w * scale)), max(1, int(h * scale))
+    thumb = cairo.ImageSurface(fmt, tw, th)
+    cr = cairo.Context(thumb)
+    cr.scale(scale, scale)
+    cr.set_source_surface(source, 0, 0)
+    cr.get_source().set_filter(cairo.FILTER_GOOD)
+    cr.paint()
+    thumb.flush()
+    source.finish()  # 源数据在共享内存里，下一次抓取会覆盖
+    return thumb
+
+
+# ============================================================
+# 缓存和调度
+
+class ThumbnailCache:
+    """xid -> 缩略图，总字节数有上限 (LRU)"""
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # xid -> (surface, 字节数, 抓取时间)
+        self.bytes = 0
+        self.evictions = 0
+
+    def __contains__(self, xid):
+        return xid in self.entries
+
+    def get(self, xid):
+        entry = self.entries.get(xid)
+        if entry is None:
+            return None
+        self.entries.move_to_end(xid)
+        return entry[0]
+
+    def age(self, xid, now):
+        """距上次抓取的秒数，没有时为无穷大"""
+        entry = self.entries.get(xid)
+        return now - entry[2] if entry is not None else float('inf')
+
+    def put(self, xid, surface, now):
+        self.discard(xid)
+        nbytes = surface.get_stride() * surface.get_height()
+        self.entries[xid] = (surface, nbytes, now)
+        self.bytes += nbytes
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, freed, _) = self.entries.popitem(last=False)
+            self.bytes -= freed
+            self.evictions += 1
+
+    def touch(self, xid, now):
+        """窗口暂时抓不到 (最小化)：保留旧图，推迟下次尝试"""
+        entry = self.entries.get(xid)
+        if entry is not None:
+            self.entries[xid] = (entry[0], entry[1], now)
+
+    def discard(self, xid):
+        entry = self.entries.pop(xid, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+
+class ThumbnailScheduler:
+    """只刷新正在显示的缩略图，限速抓取"""
+
+    def __init__(self, capture=None, cache=None, width=THUMB_WIDTH, height=THUMB_HEIGHT):
+        self.capture = capture or WindowCapture()
+        self.cache = cache or ThumbnailCache()
+        self.width = width
+        self.height = height
+        self.wanted = {}  # xid -> [callback(xid, surface), 选中, 租期截止 (None 为一直显示)]
+        self.failed = {}  # xid -> 上次抓不到的时间
+        self._timer_id = None
+        self._timer_at = None  # 计时器到期的时间 (monotonic)
+        self._last_tick = float('-inf')
+        self.enabled = None  # 首次使用时检测
+
+    def available(self):
+        if self.enabled is None:
+            self.enabled = self.capture.available()
+            if not self.enabled:
+                print("缩略图不可用 (需要 python-xlib 和 Composite 扩展)")
+        return self.enabled
+
+    def show(self, xid, callback, selected=False, lease=None):
+        """开始显示 xid 的缩略图：立即回调已缓存的图，之后按间隔刷新
+
+        lease 为秒数时，超过租期没有再次 show 就停止刷新 (用于悬停提示)。
+        """
+        if not xid or not self.available():
+            return None
+        expires = time.monotonic() + lease if lease else None
+        self.wanted[xid] = [callback, selected, expires]
+        self._schedule()
+        return self.cache.get(xid)
+
+    def hide(self, xid):
+        """不再显示 xid 的缩略图"""
+        if self.wanted.pop(xid, None) is not None:
+            self.capture.unredirect(xid)
+        if not self.wanted:
+            self._cancel()
+
+    def clear(self):
+        """弹窗隐藏时停止所有刷新"""
+        for xid in list(self.wanted):
+            self.hide(xid)
+
+    def forget(self, xid):
+        """窗口关闭"""
+        self.wanted.pop(xid, None)
+        self.failed.pop(xid, None)
+        self.capture.redirected.discard(xid)
+        self.cache.discard(xid)
+        if not self.wanted:
+            self._cancel()
+
+    def snapshot(self, xid):
+        """立即抓取一张放进缓存 (窗口即将隐藏时)，抓不到时返回缓存中的旧图"""
+        if not xid or not self.available():
+            return None
+        try:
+            surface = self.capture.capture(xid, self.width, self.height)
+        except Exception as e:
+            print(f"抓取快照失败: {e}")
+            surface = None
+        if xid not in self.wanted:
+            self.capture.unredirect(xid)
+        if surface is None:
+            return self.cache.get(xid)
+        self.cache.put(xid, surface, time.time())
+        return surface
+
+    def _due_in(self, now):
+        """距下一件事 (缩略图该刷新、租期到期、失败后重试) 的秒数，没有要显示的时为 None"""
+        wall = time.time()
+        soonest = None
+        for xid, (callback, selected, expires) in self.wanted.items():
+            interval = REFRESH_INTERVAL if selected else VISIBLE_REFRESH
+            due = max(interval - self.cache.age(xid, wall),
+                      self.failed.get(xid, -interval) + interval - now)
+            if expires is not None:
+                due = min(due, expires - now)
+            soonest = due if soonest is None else min(soonest, due)
+        return soonest
+
+    def _schedule(self):
+        """按下一件事的时间设定单次计时器，两次抓取至少间隔 CAPTURE_INTERVAL"""
+        from gi.repository import GLib
+        now = time.monotonic()
+        due = self._due_in(now)
+        if due is None:
+            self._cancel()
+            return
+        at = max(now + max(due, 0), self._last_tick + CAPTURE_INTERVAL / 1000)
+        if self._timer_id is not None:
+            if at >= self._timer_at:
+                return  # 已有更早的计时器
+            GLib.source_remove(self._timer_id)
+        self._timer_at = at
+        self._timer_id = GLib.timeout_add(max(0, math.ceil((at - now) * 1000)), self._on_timer)
+
+    def _cancel(self):
+        if self._timer_id is not None:
+            from gi.repository import GLib
+            GLib.source_remove(self._timer_id)
+            self._timer_id = None
+
+    def _on_timer(self):
+        self._timer_id = None
+        self._last_tick = time.monotonic()
+        self._tick()
+        self._schedule()
+        return False
+
+    def _next(self, now):
+        """最该刷新的窗口：选中的优先，其次是最旧的"""
+        best = None
+        for xid, (callback, selected, expires) in list(self.wanted.items()):
+            if expires is not None and now > expires:
+                self.hide(xid)
+                continue
+            age = self.cache.age(xid, time.time())
+            interval = REFRESH_INTERVAL if selected else VISIBLE_REFRESH
+            if age < interval:
+                continue
+            if now - self.failed.get(xid, -interval) < interval:
+                continue
+            rank = (not selected, -age)
+            if best is None or rank < best[0]:
+                best = (rank, xid)
+        return best[1] if best is not None else None
+
+    def _tick(self):
+        """抓一张到期的缩略图"""
+        now = time.monotonic()
+        xid = self._next(now)
+        if xid is None:
+            return
+        try:
+            surface = self.capture.capture(xid, self.width, self.height)
+        except Exception as e:
+            print(f"抓取缩略图失败: {e}")
+            surface = None
+        if surface is None:
+            self.failed[xid] = now
+            return
+        self.failed.pop(xid, None)
+        self.cache.put(xid, surface, time.time())
+        entry = self.wanted.get(xid)
+        if entry is not None:
+            try:
+                entry[0](xid, surface)
+            except Exception as e:
+                print(f"缩略图回调错误: {e}")
+
+
+# 进程内共享的调度器
+thumbnails = ThumbnailScheduler()
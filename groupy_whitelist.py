@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Groupy Whitelist - 编译后的白名单匹配
+
+白名单条目支持三种写法 (都不区分大小写，匹配窗口标题或 WM_CLASS):
+  WeChat        子串 (不带前缀的条目一律按子串，* ? [ 也按字面匹配)
+  glob:*chat*   通配符 (以 glob: 开头，整体匹配)
+  re:^idea\\b    正则 (以 re: 开头，每条单独编译)
+
+配置变化时编译一次；每个窗口的判定结果按 XID 缓存，
+改名或修改白名单后只重新判断受影响的窗口。
+"""
+
+import fnmatch
+import re
+
+REGEX_PREFIX = "re:"
+GLOB_PREFIX = "glob:"
+
+
+def _compile(alternatives):
+    if not alternatives:
+        return None
+    return re.compile('|'.join(f'(?:{a})' for a in alternatives), re.IGNORECASE)
+
+
+class WhitelistMatcher:
+    """白名单条目编译成正则：子串合并成一个 (search)，通配符合并成一个 (fullmatch)，
+    用户正则各自编译 (合并后内联标志、编号反向引用会出错)"""
+
+    def __init__(self, entries):
+        self.entries = [e.strip() for e in entries if e and e.strip()]
+        substrings = []
+        globs = []
+        self._regexes = []
+        for entry in self.entries:
+            if entry.startswith(REGEX_PREFIX):
+                try:
+                    self._regexes.append(re.compile(entry[len(REGEX_PREFIX):], re.IGNORECASE))
+                except re.error as e:
+                    print(f"白名单正则无效 {entry!r}: {e}")
+            elif entry.startswith(GLOB_PREFIX):
+                globs.append(fnmatch.translate(entry[len(GLOB_PREFIX):]))
+            else:
+                substrings.append(re.escape(entry))
+        self._search = _compile(substrings)
+        self._glob = _compile(globs)
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def matches(self, name, wm_class):
+        """标题或类名是否命中任一条目"""
+        for text in (name or "", wm_class or ""):
+            if self._search is not None and self._search.search(text):
+                return True
+            if self._glob is not None and self._glob.match(text):
+                return True
+            for regex in self._regexes:
+                if regex.search(text):
+                    return True
+        return False
+
+
+class WhitelistCache:
+    """按 XID 缓存白名单判定结果"""
+
+    def __init__(self, entries):
+        self.matcher = WhitelistMatcher(entries)
+        self.verdicts = {}  # xid -> (name, wm_class, 结果)
+        self.evaluations = 0
+
+    def verdict(self, xid, name, wm_class):
+        """窗口是否在白名单 (标题和类名都没变时直接用缓存)"""
+        cached = self.verdicts.get(xid)
+        if cached is not None and cached[0] == name and cached[1] == wm_class:
+            return cached[2]
+        result = self.matcher.matches(name, wm_class)
+        self.evaluations += 1
+        self.verdicts[xid] = (name, wm_class, result)
+        return result
+
+    def forget(self, xid):
+        """窗口关闭"""
+        self.verdicts.pop(xid, None)
+
+    def set_entries(self, entries):
+        """更新白名单，返回结果发生变化的 [(xid, 新结果)]
+
+        只增加条目时，只有原来不在白名单的窗口可能变化，且只需用新增条目判断；
+        删除了条目时，只需重新判断原来在白名单的窗口。
+        """
+        old = set(self.matcher.entries)
+        self.matcher = WhitelistMatcher(entries)
+        new = set(self.matcher.entries)
+        added = WhitelistMatcher(new - old)
+        removed = bool(old - new)
+
+        changed = []
+        for xid, (name, wm_class, result) in list(self.verdicts.items()):
+            if result and removed:
+                new_result = self.matcher.matches(name, wm_class)
+            elif not result and added:
+                new_result = added.matches(name, wm_class)
+            else:
+                continue
+            self.evaluations += 1
+            if new_result != result:
+                self.verdicts[xid] = (name, wm_class, new_result)
+                changed.append((xid, new_result))
+        return changed
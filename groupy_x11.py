@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""Groupy X11 - 原生窗口枚举后端
+
+通过一个 X 连接流水线式读取 _NET_CLIENT_LIST 及各窗口属性，
+替代 `wmctrl -l` + 每个窗口一次 `xprop` 的子进程方式。
+两种方式 (以及 Wnck) 由 groupy_sources 按实测耗时选择，出错时互相回退。
+"""
+
+import os
+import threading
+import time
+
+import groupy_profile
+
+try:
+    from Xlib import X, error as xerror
+    from Xlib import display as xdisplay
+    from Xlib.protocol import request
+    HAVE_XLIB = True
+except ImportError:
+    HAVE_XLIB = False
+
+# 单个属性最多读取的长度 (32 位单位)
+PROP_LENGTH = 1024
+# _NET_WM_ICON 可能包含多种尺寸，最大读到 256x256 加几张小图
+ICON_PROP_LENGTH = 256 * 256 + 128 * 128 + 64 * 64 + 48 * 48 + 32 * 32 + 16 * 16 + 64
+
+# 激活窗口后等待 _NET_ACTIVE_WINDOW 变为目标窗口的最长时间 (秒)
+ACTIVATE_CONFIRM_TIMEOUT = 0.25
+ACTIVATE_POLL_INTERVAL = 0.005
+# 子进程方式并发查询 WM_CLASS: 同时运行的 xprop 数量和整批的截止时间 (秒)
+# 可在 config.json 中用 "xprop_parallel" / "xprop_deadline" 覆盖
+XPROP_PARALLEL = 8
+XPROP_DEADLINE = 1.5
+
+SOURCE_PAGER = 2      # EWMH: 请求来自分页器/切换器，窗口管理器不做防抢焦点
+ICONIC_STATE = 3      # ICCCM WM_STATE: 已最小化
+ALL_DESKTOPS = 0xFFFFFFFF
+
+# python-xlib 的连接不是线程安全的：每个线程各用一个 (主线程只有一个共享连接)
+_local = threading.local()
+_atoms = {}  # atom 在服务端全局唯一，各连接共用
+
+
+def get_display():
+    """获取本线程共享的 X 连接"""
+    d = getattr(_local, 'display', None)
+    if d is None:
+        d = _local.display = xdisplay.Display()
+    return d
+
+
+def reset_display():
+    """丢弃本线程失效的 X 连接，下次使用时重连"""
+    d = getattr(_local, 'display', None)
+    if d is not None:
+        try:
+            d.close()
+        except Exception:
+            pass
+    _local.display = None
+    _atoms.clear()
+
+
+def atom(name):
+    """获取 atom (带缓存)"""
+    if name not in _atoms:
+        _atoms[name] = get_display().intern_atom(name)
+    return _atoms[name]
+
+
+def format_wid(xid):
+    """XID 转为 wmctrl 风格的 0x%08x 字符串"""
+    return "0x%08x" % xid
+
+
+def parse_wid(wid):
+    """wmctrl 风格的字符串或整数转为 XID"""
+    if isinstance(wid, int):
+        return wid
+    return int(wid, 16) if wid.lower().startswith('0x') else int(wid)
+
+
+def _send_get_property(d, xid, prop, length=PROP_LENGTH):
+    """发送 GetProperty 请求但不等待回复"""
+    return request.GetProperty(display=d.display, defer=1, delete=False,
+                               window=xid, property=atom(prop),
+                               type=X.AnyPropertyType,
+                               long_offset=0, long_length=length)
+
+
+def _reply_value(req):
+    """等待回复并取出属性值，窗口已销毁等错误返回 None"""
+    try:
+        req.reply()
+        if not req.property_type:
+            return None
+        return req.value[1]
+    except xerror.XError:
+        return None
+
+
+def _decode(value, encoding):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    return bytes(value).decode(encoding, errors='replace')
+
+
+def _app_from_class(value):
+    """WM_CLASS 值 ("instance\\0Class\\0") 取类名，没有则取实例名"""
+    text = _decode(value, 'latin-1')
+    if not text:
+        return None
+    classes = [c for c in text.split('\0') if c]
+    if len(classes) >= 2:
+        return classes[1]
+    elif len(classes) >= 1:
+        return classes[0]
+    return None
+
+
+def _card(value):
+    if value is None or len(value) == 0:
+        return None
+    return int(value[0])
+
+
+# 每个客户端窗口读取的属性
+CLIENT_PROPS = ('_NET_WM_NAME', 'WM_NAME', 'WM_CLASS', '_NET_WM_PID', '_NET_WM_DESKTOP')
+
+
+def _window_info(xid, values):
+    """由属性值组装窗口信息"""
+    name = _decode(values['_NET_WM_NAME'], 'utf-8')
+    if not name:
+        name = _decode(values['WM_NAME'], 'latin-1') or ''
+    desktop = _card(values['_NET_WM_DESKTOP'])
+    if desktop == 0xFFFFFFFF:
+        desktop = -1  # 所有桌面可见
+    return {
+        'id': format_wid(xid),
+        'xid': xid,
+        'name': name,
+        'app': _app_from_class(values.get('WM_CLASS')),
+        'pid': _card(values['_NET_WM_PID']),
+        'desktop': desktop,
+    }
+
+
+def query_windows(xids, with_class=True):
+    """流水线读取一批窗口的属性：先发出全部请求，再依次收回复
+
+    with_class=False 时不读 WM_CLASS ('app' 为 None)，由调用方从缓存补上。
+    """
+    props = CLIENT_PROPS if with_class else tuple(p for p in CLIENT_PROPS if p != 'WM_CLASS')
+    d = get_display()
+    pending = [(xid, [_send_get_property(d, xid, p) for p in props])
+               for xid in xids]
+    d.flush()
+
+    windows = []
+    for xid, reqs in pending:
+        values = {p: _reply_value(r) for p, r in zip(props, reqs)}
+        windows.append(_window_info(xid, values))
+    return windows
+
+
+def native_client_list():
+    """读取根窗口的 _NET_CLIENT_LIST (与 wmctrl -l 顺序一致)"""
+    d = get_display()
+    req = _send_get_property(d, d.screen().root.id, '_NET_CLIENT_LIST')
+    value = _reply_value(req)
+    return [int(x) for x in value] if value is not None else []
+
+
+def native_list_windows(with_class=True):
+    """原生方式列出所有客户端窗口"""
+    try:
+        return query_windows(native_client_list(), with_class)
+    except (xerror.ConnectionClosedError, OSError):
+        reset_display()
+        raise
+
+
+def native_app_name(wid):
+    """原生方式读取单个窗口的 WM_CLASS 类名"""
+    xid = parse_wid(wid)
+    return native_app_names([xid])[xid]
+
+
+def native_app_names(xids):
+    """流水线读取一批窗口的 WM_CLASS 类名，返回 {xid: 类名}"""
+    d = get_display()
+    pending = [(xid, _send_get_property(d, xid, 'WM_CLASS')) for xid in xids]
+    d.flush()
+    return {xid: _app_from_class(_reply_value(req)) for xid, req in pending}
+
+
+def native_wm_icon(xid):
+    """读取窗口的 _NET_WM_ICON (宽, 高, ARGB 像素... 可重复多张)，没有时返回 None"""
+    if not native_available():
+        return None
+    try:
+        d = get_display()
+        return _reply_value(_send_get_property(d, xid, '_NET_WM_ICON', ICON_PROP_LENGTH))
+    except (xerror.ConnectionClosedError, OSError):
+        reset_display()
+        return None
+
+
+def _send_client_message(d, xid, name, data):
+    """向根窗口发送 EWMH 客户端消息"""
+    from Xlib.protocol import event
+    root = d.screen().root
+    message = event.ClientMessage(
+        window=d.create_resource_object('window', xid),
+        client_type=atom(name),
+        data=(32, (list(data) + [0] * 5)[:5]))
+    root.send_event(message, event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask)
+
+
+def native_active_window():
+    """读取根窗口的 _NET_ACTIVE_WINDOW"""
+    d = get_display()
+    return _card(_reply_value(_send_get_property(d, d.screen().root.id, '_NET_ACTIVE_WINDOW')))
+
+
+def native_activate(xid, timestamp=0, confirm_timeout=ACTIVATE_CONFIRM_TIMEOUT):
+    """按 XID 激活窗口：必要时切换桌面、取消最小化，再请求 _NET_ACTIVE_WINDOW
+
+    返回窗口管理器是否在 confirm_timeout 内把焦点交给了该窗口。
+    """
+    d = get_display()
+    root = d.screen().root
+    desktop_req = _send_get_property(d, xid, '_NET_WM_DESKTOP')
+    state_req = _send_get_property(d, xid, 'WM_STATE')
+    current_req = _send_get_property(d, root.id, '_NET_CURRENT_DESKTOP')
+    d.flush()
+    desktop = _card(_reply_value(desktop_req))
+    state = _card(_reply_value(state_req))
+    current = _card(_reply_value(current_req))
+
+    if desktop not in (None, ALL_DESKTOPS, current) and current is not None:
+        _send_client_message(d, root.id, '_NET_CURRENT_DESKTOP', [desktop, timestamp])
+    if state == ICONIC_STATE:
+        d.create_resource_object('window', xid).map()
+    _send_client_message(d, xid, '_NET_ACTIVE_WINDOW', [SOURCE_PAGER, timestamp, 0])
+    d.flush()
+
+    deadline = time.monotonic() + confirm_timeout
+    while True:
+        if native_active_window() == xid:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(ACTIVATE_POLL_INTERVAL)
+
+
+# ============================================================
+# 子进程方式 (wmctrl + xprop)，作为回退和性能对比基准
+
+def wmctrl_list():
+    """运行 wmctrl -l，返回 [(wid, desktop, name)]
+
+    wmctrl 失败 (如窗口管理器不支持 EWMH) 时抛出 RuntimeError，让来源选择换下一个。
+    """
+    import subprocess
+    result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True, timeout=2)
+    if result.returncode != 0:
+        raise RuntimeError(f"wmctrl -l 失败 ({result.returncode}): {result.stderr.strip()}")
+    entries = []
+    for line in result.stdout.strip().split('\n'):
+        if not line:
+            continue
+        parts = line.split()
+        if len(parts) >= 4:
+            try:
+                desktop = int(parts[1])
+            except ValueError:
+                desktop = None
+            entries.append((parts[0], desktop, ' '.join(parts[3:])))
+    return entries
+
+
+def xprop_app_name(wid):
+    """使用 xprop 获取窗口的 WM_CLASS 类名"""
+    try:
+        import subprocess
+        result = subprocess.run(
+            ['xprop', '-id', wid, 'WM_CLASS'],
+            capture_output=True, text=True, timeout=1
+        )
+        output = result.stdout.strip()
+        if 'WM_CLASS' in output:
+            # 格式: WM_CLASS(STRING) = "instance", "Class"
+            parts = output.split('=')
+            if len(parts) >= 2:
+                classes = parts[1].strip().strip('"').split('", "')
+                if len(classes) >= 2:
+                    return classes[1]
+                elif len(classes) >= 1:
+                    return classes[0]
+    except Exception:
+        pass
+    return None
+
+
+def wmctrl_activate(xid):
+    """用 wmctrl -i -a 按 XID 激活窗口 (没有 wmctrl 时抛出异常，由调用方换来源)"""
+    import subprocess
+    result = subprocess.run(['wmctrl', '-i', '-a', format_wid(xid)],
+                            capture_output=True, timeout=1)
+    return result.returncode == 0
+
+
+def xprop_limits(config=None):
+    """(并发数, 截止时间)，来自共享配置 (修改后下次枚举生效)"""
+    if config is None:
+        from groupy_config import get_config
+        config = get_config()
+    return (config.get("xprop_parallel", XPROP_PARALLEL),
+            config.get("xprop_deadline", XPROP_DEADLINE))
+
+
+def xprop_app_names(xids, parallel=None, deadline=None, progress=None, cancelled=None):
+    """有界并发地运行 xprop 查询一批窗口的类名，返回 {xid: 类名}
+
+    最多同时运行 parallel 个 xprop，整批超过 deadline 秒仍未返回的窗口
+    不出现在结果中 (调用方显示为 Unknown，不缓存，下次刷新再补)。
+    结果按 xids 的顺序排列。progress(已完成的结果) 在每次有查询完成时调用。
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    xids = list(xids)
+    if not xids:
+        return {}
+    default_parallel, default_deadline = xprop_limits()
+    parallel = parallel or default_parallel
+    deadline = deadline or default_deadline
+
+    pool = ThreadPoolExecutor(max_workers=min(parallel, len(xids)),
+                              thread_name_prefix="groupy-xprop")
+    futures = {pool.submit(xprop_app_name, format_wid(xid)): xid for xid in xids}
+    end = time.monotonic() + deadline
+    done_results = {}
+    pending = set(futures)
+    try:
+        while pending:
+            if cancelled is not None and cancelled.is_set():
+                break
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                done_results[futures[future]] = future.result()
+            if done and progress is not None:
+                progress(done_results)
+    finally:
+        # 还没开始的直接取消；已在运行的 xprop 自带 1 秒超时，不等待它们
+        pool.shutdown(wait=False, cancel_futures=True)
+    if pending:
+        print(f"xprop: {len(pending)} 个窗口超过 {deadline} 秒未返回，暂记为 Unknown")
+    return {xid: done_results[xid] for xid in xids if xid in done_results}
+
+
+def subprocess_list_windows(with_class=True):
+    """子进程方式列出窗口：一次 wmctrl + 并发的 xprop (顺序同 wmctrl -l)"""
+    entries = wmctrl_list()
+    classes = {}
+    if with_class:
+        classes = xprop_app_names(parse_wid(wid) for wid, desktop, name in entries)
+    windows = []
+    for wid, desktop, name in entries:
+        xid = parse_wid(wid)
+        windows.append({
+            'id': wid,
+            'xid': xid,
+            'name': name,
+            'app': classes.get(xid),
+            'pid': None,
+            'desktop': desktop,
+        })
+    return windows
+
+
+# ============================================================
+# 对外接口：经 groupy_sources 选择来源，出错时自动换下一个
+
+def native_available():
+    """是否可以使用原生后端"""
+    if not HAVE_XLIB or not os.environ.get('DISPLAY'):
+        return False
+    try:
+        get_display()
+        return True
+    except Exception:
+        return False
+
+
+def list_windows(with_class=True):
+    """列出所有客户端窗口 (由 groupy_sources 选择最快的可用来源)
+
+    返回 [{'id', 'xid', 'name', 'app', 'pid', 'desktop'}]，顺序同 wmctrl -l。
+    with_class=False 时不查询 WM_CLASS，'app' 为 None。
+    """
+    from groupy_sources import sources
+    windows = sources.call('list_windows', with_class)
+    groupy_profile.mark("first_enumeration")
+    return windows
+
+
+def get_window_app_name(wid):
+    """获取窗口的应用名称"""
+    from groupy_sources import sources
+    xid = parse_wid(wid)
+    try:
+        return sources.call('app_names', [xid]).get(xid)
+    except RuntimeError as e:
+        print(e)
+        return None
+
+
+def activate_window(wid, timestamp=0):
+    """按 XID 激活窗口，返回焦点是否已切换
+
+    timestamp 为触发激活的用户事件时间 (0 表示 CurrentTime)。
+    """
+    from groupy_sources import sources
+    try:
+        return sources.call('activate', parse_wid(wid), timestamp)
+    except RuntimeError as e:
+        print(f"激活失败: {e}")
+        return False
+
+
+def user_time(widget=None):
+    """GTK 当前事件的时间；不在事件处理中时向 X 服务器取当前时间"""
+    from gi.repository import Gtk
+    timestamp = Gtk.get_current_event_time()
+    if timestamp or widget is None or widget.get_window() is None:
+        return timestamp
+    try:
+        import gi
+        gi.require_version('GdkX11', '3.0')
+        from gi.repository import GdkX11
+        return GdkX11.x11_get_server_time(widget.get_window())
+    except Exception:
+        return 0
+
+
+def get_app_names(xids, progress=None, cancelled=None):
+    """批量获取窗口的应用名称，返回 {xid: 类名}
+
+    子进程方式下超过截止时间的窗口不在结果中。
+    """
+    from groupy_sources import sources
+    return sources.call('app_names', xids, progress=progress, cancelled=cancelled)
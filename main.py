@@ -2,26 +2,73 @@
 """Groupy - 窗口标签化管理工具"""
 
 import sys
-import json
-import os
+import time
+from collections import Counter, deque
 import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('Gdk', '3.0')
 gi.require_version('Wnck', '3.0')
 from gi.repository import Gtk, Gdk, Wnck, GLib, GdkX11
 
+import groupy_profile
+from groupy_config import get_config
+from groupy_embed import EmbedBudget
+from groupy_tabs import Tab, TabIndex, TabPool
+from groupy_thumbs import thumbnails
+from groupy_whitelist import WhitelistCache
+
 APP_NAME = "Groupy"
-CONFIG_FILE = os.path.expanduser("~/.config/groupy/config.json")
+
+# 兜底全量检查的间隔 (秒)：没发现遗漏就加倍，发现遗漏则回到最小值
+RECONCILE_MIN = 5
+RECONCILE_MAX = 600
+EMBED_DELAY = 100  # 毫秒，切换标签后稍等再嵌入 (确保 XID 有效，连续切换只嵌入最后一个)
+TOOLTIP_LEASE = 1.5  # 秒，标签提示中的缩略图在鼠标离开后继续刷新的时间
+
+
+class WakeupCounter:
+    """统计主循环被唤醒的次数 (按原因)，用于确认空闲时几乎不唤醒"""
+
+    def __init__(self, window=60):
+        self.window = window
+        self.times = deque()
+        self.reasons = Counter()
+
+    def tick(self, reason):
+        now = time.monotonic()
+        self.times.append(now)
+        self.reasons[reason] += 1
+        while self.times and now - self.times[0] > self.window:
+            self.times.popleft()
+
+    def per_minute(self):
+        """最近一分钟的唤醒次数"""
+        now = time.monotonic()
+        while self.times and now - self.times[0] > self.window:
+            self.times.popleft()
+        return len(self.times) * 60 / self.window
+
 
 class GroupyWindow(Gtk.Window):
     def __init__(self):
         Gtk.Window.__init__(self, title=APP_NAME)
         self.set_default_size(1200, 800)
-        self.containers = {}  # window_xid -> container
-        self.groups = {}  # group_name -> [windows]
-
-        # 加载配置
-        self.config = self.load_config()
+        self.tabs = TabIndex()  # window_xid <-> 页面 <-> 分组
+        self.pool = TabPool(self.create_tab)  # 关闭的标签控件留着复用
+        self.embeddable = {}  # window_xid -> 标签文字 (支持 XEmbed，切换到时才嵌入)
+        self.sockets = {}  # window_xid -> 已嵌入的 Gtk.Socket
+        self.closed = set()  # 用户关闭了标签的 window_xid (窗口关闭前不再自动添加)
+        self.embed_id = None
+        self.adding_page = False  # 正在添加新窗口的标签 (此时的 switch-page 不嵌入)
+
+        # 共享配置：外部修改后只通知变化的键
+        self.config = get_config()
+        self.config.watch()
+        self.whitelist = WhitelistCache(self.config.get("whitelist"))
+        self.config.subscribe("whitelist", self.on_whitelist_changed)
+        # 同时嵌入的窗口数上限
+        self.budget = EmbedBudget(self.config.get("embed_limit"))
+        self.config.subscribe("embed_limit", self.on_embed_limit_changed)
 
         # 主布局
         self.vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
@@ -32,6 +79,8 @@ class GroupyWindow(Gtk.Window):
         self.notebook.set_show_tabs(True)
         self.notebook.set_show_border(True)
         self.notebook.connect("switch-page", self.on_page_switched)
+        self.on_tab_position_changed(self.config.get("tab_position"))
+        self.config.subscribe("tab_position", self.on_tab_position_changed)
         self.vbox.pack_start(self.notebook, True, True, 0)
 
         # 工具栏
@@ -51,13 +100,18 @@ class GroupyWindow(Gtk.Window):
         # 初始化 Wnck
         Wnck.Screen.get_default()
 
-        # 窗口监控
+        # 窗口监控：完全由 Wnck 信号驱动
         self.screen = Wnck.Screen.get_default()
         self.screen.connect("window-opened", self.on_window_opened)
         self.screen.connect("window-closed", self.on_window_closed)
+        self.window_handlers = {}  # window_xid -> (window, [handler_id])
+        self.wakeups = WakeupCounter()
 
-        # 定时检查窗口
-        GLib.timeout_add(1000, self.check_windows)
+        # 启动时全量检查一次，之后只在需要时按退避间隔兜底检查
+        self.reconcile_interval = RECONCILE_MIN
+        self.reconcile_id = None
+        self.reconciled = False  # 第一次全量检查补上的是启动前已有的窗口，不算遗漏
+        self.schedule_reconcile()
 
         # 快捷键
         self.setup_shortcuts()
@@ -95,80 +149,115 @@ class GroupyWindow(Gtk.Window):
         return True
 
     def on_page_switched(self, notebook, page, page_num):
-        """页面切换时更新"""
-        pass
-
-    def load_config(self):
-        """加载配置文件"""
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        return {"whitelist": [], "tab_position": "top"}
-
-    def save_config(self):
-        """保存配置"""
-        os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        """页面切换后嵌入该标签的窗口 (合并连续切换)"""
+        if self.adding_page:
+            return  # 第一页加入空 notebook 时 GTK 自动切换，不算查看
+        if self.embed_id is None:
+            self.embed_id = GLib.timeout_add(EMBED_DELAY, self.embed_current)
+
+    def embed_current(self):
+        """嵌入当前标签的窗口，超过上限时卸下最久没有查看的"""
+        self.embed_id = None
+        page = self.notebook.get_nth_page(self.notebook.get_current_page())
+        tab = self.tabs.by_page(page)
+        window_xid = tab.xid if tab is not None else None
+        if window_xid is None or window_xid not in self.embeddable:
+            return False
+        if window_xid not in self.sockets and not self.embed_window(window_xid):
+            return False
+        for evicted in self.budget.viewed(window_xid):
+            self.unembed_window(evicted)
+        return False
+
+    def on_embed_limit_changed(self, limit):
+        """嵌入上限 (配置 embed_limit)"""
+        for evicted in self.budget.set_limit(limit):
+            self.unembed_window(evicted)
+
+    def on_tab_position_changed(self, position):
+        """标签栏位置 (配置 tab_position)"""
+        positions = {
+            "top": Gtk.PositionType.TOP,
+            "bottom": Gtk.PositionType.BOTTOM,
+            "left": Gtk.PositionType.LEFT,
+            "right": Gtk.PositionType.RIGHT,
+        }
+        self.notebook.set_tab_pos(positions.get(position, Gtk.PositionType.TOP))
 
     def on_window_opened(self, screen, window):
         """窗口打开时检查是否在白名单"""
         window_name = window.get_name()
         wm_class = window.get_class_instance_name() or ""
 
+        self.wakeups.tick("window-opened")
         print("窗口打开: {} ({})".format(window_name, wm_class))
 
-        if self.is_whitelisted(window_name, wm_class):
+        self.track_window(window)
+
+        if self.window_whitelisted(window):
+            self.add_window_to_notebook(window)
+
+    def track_window(self, window):
+        """连接单个窗口的信号：改名、改类名、状态变化后只重新判断这一个窗口"""
+        window_xid = window.get_xid()
+        if window_xid in self.window_handlers:
+            return
+        handlers = [
+            window.connect("name-changed", self.on_window_changed, "name-changed"),
+            window.connect("class-changed", self.on_window_changed, "class-changed"),
+            window.connect("state-changed", self.on_window_state_changed),
+        ]
+        self.window_handlers[window_xid] = (window, handlers)
+
+    def untrack_window(self, window_xid):
+        """断开单个窗口的信号"""
+        window, handlers = self.window_handlers.pop(window_xid, (None, []))
+        for handler in handlers:
+            window.disconnect(handler)
+
+    def on_window_changed(self, window, reason):
+        """窗口改名或改类名时重新判断白名单"""
+        self.wakeups.tick(reason)
+        if self.window_whitelisted(window):
             self.add_window_to_notebook(window)
 
+    def on_window_state_changed(self, window, changed_mask, new_state):
+        """窗口状态变化 (如 skip-tasklist) 时重新判断"""
+        self.on_window_changed(window, "state-changed")
+
     def on_window_closed(self, screen, window):
         """窗口关闭时移除"""
+        self.wakeups.tick("window-closed")
         window_xid = window.get_xid()
-        if window_xid in self.containers:
-            page_num = self.notebook.page_num(self.containers[window_xid])
-            if page_num >= 0:
-                self.notebook.remove_page(page_num)
-            del self.containers[window_xid]
+        self.whitelist.forget(window_xid)
+        self.closed.discard(window_xid)
+        self.untrack_window(window_xid)
+        thumbnails.forget(window_xid)
+        self.sockets.pop(window_xid, None)
+        self.budget.discard(window_xid)
+        self.remove_tab(window_xid)
 
     def is_whitelisted(self, name, wm_class):
         """检查是否在白名单"""
-        whitelist = self.config.get("whitelist", [])
-        for item in whitelist:
-            if item.lower() in name.lower() or item.lower() in wm_class.lower():
-                return True
-        return False
-
-    def add_window_to_notebook(self, window):
-        """将窗口添加到标签页"""
-        window_xid = window.get_xid()
-        if window_xid in self.containers:
-            return
-
-        window_name = window.get_name()
-        wm_class = window.get_class_instance_name() or ""
+        return self.whitelist.matcher.matches(name, wm_class)
+
+    def window_whitelisted(self, window):
+        """检查窗口是否在白名单 (结果按 XID 缓存)"""
+        return self.whitelist.verdict(window.get_xid(), window.get_name() or "",
+                                      window.get_class_instance_name() or "")
+
+    def on_whitelist_changed(self, whitelist):
+        """白名单修改后 (设置对话框或外部编辑) 只处理判定结果变化的窗口"""
+        for xid, whitelisted in self.whitelist.set_entries(whitelist):
+            if whitelisted:
+                window = Wnck.Window.get(xid)
+                if window:
+                    self.add_window_to_notebook(window)
 
-        # 创建容器
+    def create_tab(self):
+        """新建一套标签控件 (池空时调用)，信号只在这里连接一次"""
         container = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
-        label_text = "{}".format(window_name)
-
-        # 检查是否支持 XEmbed
-        supports_xembed = window.is_skip_pager() or window.is_skip_tasklist()
-
-        if supports_xembed:
-            try:
-                display = Gdk.Display.get_default()
-                if display:
-                    socket = Gtk.Socket()
-                    container.pack_start(socket, True, True, 0)
-
-                    # 延迟嵌入，确保 XID 有效
-                    GLib.timeout_add(100, self.embed_window, socket, window_xid, container, label_text)
-                    label_text = "📎 {}".format(window_name)
-            except Exception as e:
-                print("XEmbed 初始化失败: {}".format(e))
-
-        # 添加标签页
-        label = Gtk.Label(label=label_text)
+        label = Gtk.Label()
         tab_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
         tab_box.pack_start(label, False, False, 0)
 
@@ -176,48 +265,217 @@ class GroupyWindow(Gtk.Window):
         close_btn = Gtk.Button()
         close_btn.set_image(Gtk.Image.new_from_icon_name("window-close-symbolic", Gtk.IconSize.MENU))
         close_btn.set_relief(Gtk.Relief.NONE)
-        close_btn.connect("clicked", self.on_close_tab, window, container)
         tab_box.pack_start(close_btn, False, False, 0)
 
-        page_num = self.notebook.append_page(container, tab_box)
-        self.notebook.set_current_page(page_num)
+        tab = Tab(container, tab_box, label, close_btn)
+        close_btn.connect("clicked", self.on_close_tab, tab)
+        # 悬停时在提示中显示窗口缩略图
+        tab_box.set_has_tooltip(True)
+        tab_box.connect("query-tooltip", self.on_tab_tooltip, tab)
+        tab_box.show_all()
+        return tab
 
-        # 保存引用
-        self.containers[window_xid] = container
+    def add_window_to_notebook(self, window):
+        """将窗口添加到标签页 (复用池中的标签控件)"""
+        window_xid = window.get_xid()
+        if window_xid in self.tabs or window_xid in self.closed:
+            return
+
+        window_name = window.get_name()
+        label_text = "{}".format(window_name)
+
+        tab = self.pool.acquire()
+        tab.xid = window_xid
+        tab.window = window
+        tab.name = window_name
+        tab.group = window.get_class_group_name() or window.get_class_instance_name() or None
+        self.tabs.add(tab)
+        self.update_group_label(tab.group)
+
+        # 检查是否支持 XEmbed
+        supports_xembed = window.is_skip_pager() or window.is_skip_tasklist()
 
-    def embed_window(self, socket, window_xid, container, label_text):
-        """执行窗口嵌入"""
+        if supports_xembed:
+            # 第一次切换到此标签时才嵌入
+            self.embeddable[window_xid] = label_text
+            self.show_placeholder(window_xid, tab.container)
+            label_text = "📎 {}".format(window_name)
+        tab.label.set_text(label_text)
+
+        # 不切换到新标签：用户第一次切换过去时才嵌入
+        tab.container.show()
+        self.adding_page = True
+        try:
+            self.notebook.append_page(tab.container, tab.tab_box)
+        finally:
+            self.adding_page = False
+
+    def remove_tab(self, window_xid):
+        """移除窗口的标签页，控件放回池中"""
+        self.embeddable.pop(window_xid, None)
+        tab = self.tabs.remove(window_xid)
+        if tab is None:
+            return
+        thumbnails.hide(window_xid)
+        # 按控件移除，不需要先查页码
+        self.notebook.remove(tab.container)
+        group = tab.group
+        self.pool.release(tab)
+        self.update_group_label(group)
+
+    def update_group_label(self, name):
+        """分组标签上显示组内的窗口数 (按索引查，不遍历 notebook)"""
+        tab = self.tabs.group_tab(name)
+        if tab is None:
+            return
+        count = len(self.tabs.xids_in(name))
+        tab.label.set_text("📁 {} ({})".format(name, count) if count else "📁 {}".format(name))
+
+    def on_tab_tooltip(self, widget, x, y, keyboard_mode, tooltip, tab):
+        """标签提示：缩略图 (悬停期间续租刷新)，还没抓到时只显示标题"""
+        if tab.xid is None:
+            return False
+        if tab.preview is None:
+            tab.preview = Gtk.Image()
+        image = tab.preview
+        window_xid = tab.xid
+
+        def on_thumbnail(xid, surface):
+            if tab.xid == xid:
+                image.set_from_surface(surface)
+
+        surface = thumbnails.show(window_xid, on_thumbnail, lease=TOOLTIP_LEASE)
+        if surface is None:
+            tooltip.set_text(tab.name)
+            return True
+        on_thumbnail(window_xid, surface)
+        tooltip.set_custom(image)
+        return True
+
+    def set_content(self, container, widget):
+        """替换标签页的内容"""
+        for child in container.get_children():
+            container.remove(child)
+        container.pack_start(widget, True, True, 0)
+        widget.show()
+
+    def show_placeholder(self, window_xid, container):
+        """未嵌入时的内容：有缓存的缩略图时显示快照，否则显示提示文字"""
+        surface = thumbnails.cache.get(window_xid)
+        if surface is not None:
+            placeholder = Gtk.Image.new_from_surface(surface)
+        else:
+            placeholder = Gtk.Label(label="📎 {}\n切换到此标签时嵌入".format(
+                self.embeddable.get(window_xid, "")))
+        self.set_content(container, placeholder)
+
+    def embed_window(self, window_xid):
+        """执行窗口嵌入，返回是否成功"""
+        container = self.tabs.get(window_xid).container
+        socket = Gtk.Socket()
+        socket.connect("plug-removed", self.on_plug_removed, window_xid)
+        self.set_content(container, socket)
         try:
             socket.add_id(window_xid)
+            self.sockets[window_xid] = socket
             print("✅ 窗口嵌入成功: {}".format(window_xid))
+            return True
         except Exception as e:
             print("❌ 窗口嵌入失败: {}".format(e))
-            # 降级方案：显示占位符
-            for child in container.get_children():
-                container.remove(child)
-            placeholder = Gtk.Label(label="📦 {}".format(label_text))
-            container.pack_start(placeholder, True, True, 0)
-            placeholder.show()
-        return False  # 只执行一次
-
-    def on_close_tab(self, btn, window, container):
-        """关闭标签页"""
-        page_num = self.notebook.page_num(container)
-        if page_num >= 0:
-            self.notebook.remove_page(page_num)
-        window_xid = window.get_xid()
-        if window_xid in self.containers:
-            del self.containers[window_xid]
+            # 降级方案：显示占位符，不再尝试嵌入
+            label_text = self.embeddable.pop(window_xid, "")
+            self.set_content(container, Gtk.Label(label="📦 {}".format(label_text)))
+            return False
+
+    def unembed_window(self, window_xid, to_desktop=None):
+        """卸下嵌入的窗口：放回桌面，或最小化并在标签中显示快照 (配置 embed_evict)
+
+        两种方式都把窗口放回根窗口并保持映射，在 Groupy 之外也能从任务栏恢复。
+        """
+        socket = self.sockets.pop(window_xid, None)
+        self.budget.discard(window_xid)
+        if socket is None:
+            return
+        if to_desktop is None:
+            to_desktop = self.config.get("embed_evict") == "desktop"
+        plug = socket.get_plug_window()
+        if plug is not None:
+            if not to_desktop:
+                thumbnails.snapshot(window_xid)  # 最小化后就抓不到了
+            plug.reparent(self.get_screen().get_root_window(), 0, 0)
+            plug.show()
+            if not to_desktop:
+                plug.iconify()  # 通过窗口管理器最小化 (WM_CHANGE_STATE)
+        tab = self.tabs.get(window_xid)
+        if tab is not None:
+            self.show_placeholder(window_xid, tab.container)
+        print("窗口已卸下: {} ({})".format(window_xid, "放回桌面" if to_desktop else "快照"))
+
+    def on_plug_removed(self, socket, window_xid):
+        """嵌入的窗口自行离开 (关闭或被卸下)"""
+        if self.sockets.get(window_xid) is socket:
+            del self.sockets[window_xid]
+            self.budget.discard(window_xid)
+            tab = self.tabs.get(window_xid)
+            if tab is not None:
+                self.show_placeholder(window_xid, tab.container)
+        return True  # 由我们替换内容，不要销毁
+
+    def on_close_tab(self, btn, tab):
+        """关闭标签页 (嵌入的窗口放回桌面)"""
+        window_xid = tab.xid
+        if window_xid is None:
+            if tab.group is not None:
+                self.remove_group(tab.group)
+            return
+        self.closed.add(window_xid)
+        self.unembed_window(window_xid, to_desktop=True)
+        self.remove_tab(window_xid)
 
     def check_windows(self):
-        """定时检查现有窗口"""
+        """全量检查现有窗口 (兜底，正常情况下信号已处理所有变化)"""
+        self.wakeups.tick("reconcile")
+        self.reconcile_id = None
+        missed = 0
         windows = self.screen.get_windows()
         for window in windows:
-            if window.get_window_type() == Wnck.WindowType.NORMAL:
-                if self.is_whitelisted(window.get_name(),
-                                       window.get_class_instance_name() or ""):
-                    self.add_window_to_notebook(window)
-        return True
+            window_xid = window.get_xid()
+            if window_xid not in self.window_handlers:
+                # 漏掉了 window-opened
+                self.track_window(window)
+                missed += 1
+            if window.get_window_type() != Wnck.WindowType.NORMAL or window_xid in self.closed:
+                continue
+            if window_xid not in self.tabs and self.window_whitelisted(window):
+                # 漏掉了让它进入白名单的改名/改类名
+                self.add_window_to_notebook(window)
+                missed += 1
+
+        groupy_profile.mark("first_enumeration")
+        if not self.reconciled:
+            self.reconciled = True
+            missed = 0
+
+        # 发现遗漏说明信号不可靠，缩短间隔；否则加倍
+        if missed:
+            self.reconcile_interval = RECONCILE_MIN
+        else:
+            self.reconcile_interval = min(self.reconcile_interval * 2, RECONCILE_MAX)
+        print("全量检查: 补上 {} 处遗漏, 下次 {} 秒后, 唤醒 {:.1f} 次/分钟".format(
+            missed, self.reconcile_interval, self.wakeups.per_minute()))
+        self.schedule_reconcile(self.reconcile_interval)
+        return False
+
+    def schedule_reconcile(self, delay=0):
+        """安排一次全量检查 (已安排则合并)"""
+        if self.reconcile_id is not None:
+            if delay:
+                return
+            GLib.source_remove(self.reconcile_id)
+        if delay:
+            self.reconcile_id = GLib.timeout_add_seconds(delay, self.check_windows)
+        else:
+            self.reconcile_id = GLib.idle_add(self.check_windows)
 
     def on_new_group_clicked(self, widget):
         """新建分组"""
@@ -242,14 +500,29 @@ class GroupyWindow(Gtk.Window):
         dialog.show_all()
 
     def add_empty_group(self, name):
-        """添加空分组"""
-        container = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
-        label = Gtk.Label(label="📁 {}".format(name))
-
-        # 添加标签页
-        page_num = self.notebook.append_page(container, label)
+        """添加空分组 (标签控件同样从池中取)"""
+        if self.tabs.group_tab(name) is not None:
+            print("分组已存在: {}".format(name))
+            return
+        tab = self.pool.acquire()
+        tab.group = name
+        tab.name = name
+        self.tabs.add_group(tab)
+        self.update_group_label(name)
+
+        # 添加标签页 (用户操作，切换过去)
+        tab.container.show()
+        page_num = self.notebook.append_page(tab.container, tab.tab_box)
         self.notebook.set_current_page(page_num)
 
+    def remove_group(self, name):
+        """关闭分组标签，控件放回池中"""
+        tab = self.tabs.remove_group(name)
+        if tab is None:
+            return
+        self.notebook.remove(tab.container)
+        self.pool.release(tab)
+
     def on_settings_clicked(self, widget):
         """打开设置对话框"""
         dialog = SettingsDialog(self)
@@ -308,12 +581,16 @@ class SettingsDialog(Gtk.Dialog):
     def save_config(self, widget):
         text = self.entry.get_text()
         whitelist = [x.strip() for x in text.split(",") if x.strip()]
-        self.parent.config["whitelist"] = whitelist
-        self.parent.save_config()
+        # 保存稍后写入文件，白名单的订阅者立即更新
+        self.parent.config.set("whitelist", whitelist)
         self.destroy()
 
 
-if __name__ == "__main__":
+def main():
     app = Gtk.Application(application_id="com.groupy.app")
     app.connect("activate", lambda app: GroupyWindow().show_all())
     app.run(sys.argv)
+
+
+if __name__ == "__main__":
+    main()
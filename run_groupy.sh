@@ -33,4 +33,4 @@ fi
 echo "✅ 最终 DISPLAY: $DISPLAY"
 
 # 启动 Groupy
-exec python3 /home/lijiang/code/groupy/groupy.py "$@"
+exec python3 /home/lijiang/code/groupy/groupy "$@"
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""groupy_appname 测试: 应用名规范化 (最长关键字优先)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groupy_appname import AppNameNormalizer
+
+
+def test_builtin_rules():
+    normalizer = AppNameNormalizer()
+    assert normalizer.normalize("Google-chrome") == "Chrome"
+    assert normalizer.normalize("firefox") == "Firefox"
+    assert normalizer.normalize("org.gnome.Nautilus") == "Files"
+
+
+def test_longest_keyword_wins():
+    # 'term' 和更长的关键字在同一位置都能命中，取更长的
+    normalizer = AppNameNormalizer({"term": "Term", "terminal-x": "X"})
+    assert normalizer.normalize("terminal-x") == "X"
+    normalizer = AppNameNormalizer({"term": "Term", "gnome-terminal-server-x": "X"})
+    assert normalizer.normalize("gnome-terminal-server-x") == "X"
+
+
+def test_overlapping_keywords_later_in_name():
+    # 较短的关键字先出现，较长的从后面的位置开始
+    normalizer = AppNameNormalizer({"ab": "Short", "bcdef": "Long"})
+    assert normalizer.normalize("abcdef") == "Long"
+
+
+def test_user_rules_override_builtin():
+    normalizer = AppNameNormalizer({"Chrome": "Chromium", "": "x", "y": ""})
+    assert normalizer.normalize("google-chrome") == "Chrome"
+    assert normalizer.normalize("chrome") == "Chromium"
+
+
+def test_unknown_name_capitalized_and_memoized():
+    normalizer = AppNameNormalizer(memo_size=2)
+    assert normalizer.normalize("MYAPP") == "Myapp"
+    assert "MYAPP" in normalizer.memo
+    normalizer.normalize("a")
+    normalizer.normalize("b")
+    assert len(normalizer.memo) <= 2
+
+
+def test_from_config_ignores_bad_rules():
+    normalizer = AppNameNormalizer.from_config({"app_names": ["not", "a", "dict"]})
+    assert normalizer.normalize("slack") == "Slack"
+    normalizer = AppNameNormalizer.from_config({"app_names": {"foo": "Bar"}})
+    assert normalizer.normalize("x-foo") == "Bar"
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""groupy_config 测试: SCHEMA 校验、延迟写入与只通知变化的键"""
+
+import json
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groupy_config import Config, validate
+
+
+class FakeGLib:
+    """只记录 timeout_add，由测试手动触发"""
+
+    def __init__(self):
+        self.timers = {}
+        self.next_id = 0
+
+    def timeout_add(self, delay, callback):
+        self.next_id += 1
+        self.timers[self.next_id] = callback
+        return self.next_id
+
+    def source_remove(self, source_id):
+        self.timers.pop(source_id, None)
+
+    def run(self):
+        for source_id, callback in list(self.timers.items()):
+            del self.timers[source_id]
+            callback()
+
+
+@pytest.fixture
+def glib(monkeypatch):
+    fake = FakeGLib()
+    repository = types.ModuleType('gi.repository')
+    repository.GLib = fake
+    gi = types.ModuleType('gi')
+    gi.repository = repository
+    monkeypatch.setitem(sys.modules, 'gi', gi)
+    monkeypatch.setitem(sys.modules, 'gi.repository', repository)
+    return fake
+
+
+def write(path, data):
+    path.write_text(json.dumps(data))
+
+
+def test_validate_replaces_invalid_values():
+    data = validate({
+        "whitelist": ["WeChat", "", 3],
+        "tab_position": "middle",
+        "embed_limit": 0,
+        "xprop_deadline": True,
+        "custom": 1,
+    })
+    assert data["whitelist"] == ["WeChat"]
+    assert data["tab_position"] == "top"
+    assert data["embed_limit"] == 1
+    assert data["xprop_deadline"] == 1.5
+    assert data["custom"] == 1
+
+
+def test_get_falls_back_to_schema_default(tmp_path):
+    config = Config(str(tmp_path / "config.json"))
+    assert config.get("embed_limit") == 4
+    whitelist = config.get("whitelist")
+    whitelist.append("x")
+    assert config.get("whitelist") == []
+    assert config.get("unknown", 5) == 5
+
+
+def test_invalid_file_keeps_defaults(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text("{not json")
+    assert Config(str(path)).data == {}
+
+
+def test_set_notifies_only_changed_keys(tmp_path, glib):
+    path = tmp_path / "config.json"
+    write(path, {"embed_limit": 4})
+    config = Config(str(path))
+    seen = []
+    config.subscribe("tab_position", lambda v: seen.append(("tab_position", v)))
+    config.subscribe("embed_limit", lambda v: seen.append(("embed_limit", v)))
+    config.update({"tab_position": "left", "embed_limit": 4})
+    config.set("tab_position", "left")
+    assert seen == [("tab_position", "left")]
+
+
+def test_writes_are_debounced(tmp_path, glib):
+    path = tmp_path / "config.json"
+    config = Config(str(path))
+    config.set("tab_position", "left")
+    config.set("embed_limit", 2)
+    assert len(glib.timers) == 1
+    assert not path.exists()
+    glib.run()
+    assert json.loads(path.read_text()) == {"tab_position": "left", "embed_limit": 2}
+    assert not config.dirty
+
+
+def test_reload_notifies_changed_keys(tmp_path, glib):
+    path = tmp_path / "config.json"
+    write(path, {"tab_position": "top", "whitelist": ["a"]})
+    config = Config(str(path))
+    seen = []
+    config.subscribe("tab_position", seen.append)
+    config.subscribe("whitelist", seen.append)
+    write(path, {"tab_position": "top", "whitelist": ["a", "b"]})
+    config.reload()
+    assert seen == [["a", "b"]]
+
+
+def test_reload_skips_own_write_and_drops_pending_save(tmp_path, glib):
+    path = tmp_path / "config.json"
+    config = Config(str(path))
+    config.set("tab_position", "left")
+    glib.run()
+    seen = []
+    config.subscribe("tab_position", seen.append)
+    config.reload()  # 监听到自己的写入
+    assert seen == []
+
+    config.set("embed_limit", 2)
+    write(path, {"tab_position": "right"})
+    config.reload()  # 外部修改优先
+    assert seen == ["right"]
+    assert glib.timers == {}
+    assert not config.dirty
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""groupy_fuzzy 回归测试: 小写后长度会变的字符 ('İ')"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import groupy_fuzzy
+from groupy_fuzzy import FuzzyMatcher, fold_case, score_text
+
+TITLES = {
+    1: "İstanbul trip - İİİİ notes",
+    2: "İİİİ trip",
+    3: "istanbul itinerary",
+}
+
+
+def test_fold_case_keeps_length():
+    for text in TITLES.values():
+        assert len(fold_case(text)) == len(text)
+
+
+def test_score_text_non_ascii():
+    assert score_text('trip', 'İİİİ trip') is not None
+    assert score_text('stan', 'İstanbul') is not None
+
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_matcher_non_ascii(monkeypatch, numpy):
+    if numpy and not groupy_fuzzy.HAVE_NUMPY:
+        pytest.skip("没有 NumPy")
+    monkeypatch.setattr(groupy_fuzzy, 'HAVE_NUMPY', numpy)
+    matcher = FuzzyMatcher()
+    for key, title in TITLES.items():
+        matcher.add(key, title)
+    assert set(matcher.scores('trip')) == {1, 2}
+    assert 3 in matcher.scores('ist')
+    # 两种实现分数一致
+    for key, score in matcher.scores('trip').items():
+        assert score == score_text('trip', TITLES[key])
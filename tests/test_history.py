@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""groupy_history 测试: 分数衰减、淘汰与原子写入"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import groupy_history
+from groupy_history import FrecencyStore, history_key
+
+DAY = 24 * 3600
+T0 = time.time() - 2 * DAY  # 没有 GLib 时每次记录都立即写入，按当前时间淘汰
+
+
+def make_store(tmp_path, **kwargs):
+    return FrecencyStore(path=str(tmp_path / "history.json"), half_life=DAY, **kwargs)
+
+
+def test_score_halves_every_half_life(tmp_path):
+    store = make_store(tmp_path)
+    store.record("a", now=T0)
+    store.record("a", now=T0)
+    assert store.score("a", now=T0) == pytest.approx(2)
+    assert store.score("a", now=T0 + DAY) == pytest.approx(1)
+    assert store.score("a", now=T0 + 2 * DAY) == pytest.approx(0.5)
+    assert store.score("missing", now=T0) == 0
+
+
+def test_record_decays_before_adding(tmp_path):
+    store = make_store(tmp_path)
+    store.record("old", now=T0)
+    store.record("old", now=T0 + DAY)
+    assert store.score("old", now=T0 + DAY) == pytest.approx(1.5)
+    store.record("new", now=T0 + DAY)
+    store.record("new", now=T0 + DAY)
+    scores = store.scores(["old", "new", "missing"], now=T0 + 5 * DAY)
+    assert set(scores) == {"old", "new"}
+    assert scores["new"] > scores["old"]
+    assert store.latest == "new"
+
+
+def test_prune_keeps_highest_scores(tmp_path):
+    store = make_store(tmp_path, max_entries=2)
+    store.record("a", now=T0)
+    store.record("a", now=T0)
+    store.record("b", now=T0)
+    store.record("c", now=T0 + DAY)
+    assert set(store.entries) == {"a", "c"}
+
+
+def test_flush_round_trip(tmp_path):
+    store = make_store(tmp_path)
+    key = history_key("wechat", "微信")
+    store.record(key, now=T0)
+    store.flush()
+    assert not store.dirty
+    assert not os.path.exists(store.path + ".tmp")
+    loaded = make_store(tmp_path)
+    assert key in loaded
+    assert loaded.latest == key
+
+
+def test_failed_write_keeps_old_file(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    store.record("a")
+    store.flush()
+    with open(store.path) as f:
+        before = f.read()
+
+    def broken_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(groupy_history.json, "dump", broken_dump)
+    store.record("b")
+    store.flush()
+    assert store.dirty
+    with open(store.path) as f:
+        assert f.read() == before
+
+
+def test_load_ignores_other_versions(tmp_path):
+    path = tmp_path / "history.json"
+    path.write_text(json.dumps({"v": 99, "entries": {"a": [1, 0]}}))
+    assert len(FrecencyStore(path=str(path))) == 0
+    path.write_text("not json")
+    assert len(FrecencyStore(path=str(path))) == 0
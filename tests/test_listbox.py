@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""groupy_listbox 测试: 最长递增子序列与按 XID 对比更新"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groupy_listbox import ListBoxReconciler, stationary
+
+
+class FakeRow:
+    def __init__(self, key, item):
+        self.key = key
+        self.item = item
+
+    def show_all(self):
+        pass
+
+
+class FakeListBox:
+    """按顺序保存行，记录插入和删除次数"""
+
+    def __init__(self):
+        self.rows = []
+        self.filter = None
+        self.operations = 0
+
+    def insert(self, row, position):
+        self.rows.insert(position, row)
+        self.operations += 1
+
+    def remove(self, row):
+        self.rows.remove(row)
+        self.operations += 1
+
+    def set_filter_func(self, func):
+        self.filter = func
+
+    def invalidate_filter(self):
+        pass
+
+    def visible(self):
+        return [row.key for row in self.rows if self.filter is None or self.filter(row)]
+
+
+def make():
+    listbox = FakeListBox()
+
+    def update_row(row, item):
+        row.item = item
+
+    return listbox, ListBoxReconciler(listbox, FakeRow, update_row)
+
+
+def test_stationary_is_longest_increasing_subsequence():
+    assert stationary([]) == set()
+    assert stationary([0, 1, 2]) == {0, 1, 2}
+    assert stationary([2, 0, 1]) == {1, 2}
+    assert stationary([None, 0, None, 1]) == {1, 3}
+    keep = stationary([3, 0, 4, 1, 2])
+    assert len(keep) == 3 and keep == {1, 3, 4}
+
+
+def test_stationary_random_is_increasing_and_maximal():
+    rng = random.Random(2)
+    for _ in range(100):
+        positions = list(range(rng.randint(0, 12)))
+        rng.shuffle(positions)
+        keep = sorted(stationary(positions))
+        values = [positions[i] for i in keep]
+        assert values == sorted(values)
+        # 与 O(n^2) 动态规划的长度一致
+        best = [1] * len(positions)
+        for i in range(len(positions)):
+            for j in range(i):
+                if positions[j] < positions[i]:
+                    best[i] = max(best[i], best[j] + 1)
+        assert len(keep) == max(best, default=0)
+
+
+def test_reconcile_matches_entries():
+    listbox, reconciler = make()
+    rng = random.Random(3)
+    for _ in range(50):
+        keys = rng.sample(range(20), rng.randint(0, 10))
+        entries = [(key, f"title {key} {rng.randint(0, 1)}") for key in keys]
+        reconciler.reconcile(entries)
+        assert [row.key for row in listbox.rows] == keys
+        assert [row.item for row in listbox.rows] == [item for _, item in entries]
+        assert reconciler.order == keys
+
+
+def test_unchanged_list_does_nothing():
+    listbox, reconciler = make()
+    entries = [(1, "a"), (2, "b"), (3, "c")]
+    reconciler.reconcile(entries)
+    listbox.operations = 0
+    assert not reconciler.reconcile(entries)
+    assert listbox.operations == 0
+
+
+def test_single_move_touches_one_row():
+    listbox, reconciler = make()
+    reconciler.reconcile([(k, str(k)) for k in range(10)])
+    rows = {row.key: row for row in listbox.rows}
+    listbox.operations = 0
+    reconciler.reconcile([(9, "9")] + [(k, str(k)) for k in range(9)])
+    assert listbox.operations == 2  # 移除 + 插入
+    assert reconciler.moved == 1
+    assert all(rows[row.key] is row for row in listbox.rows)
+
+
+def test_title_change_updates_row_in_place():
+    listbox, reconciler = make()
+    reconciler.reconcile([(1, "a"), (2, "b")])
+    row = listbox.rows[1]
+    listbox.operations = 0
+    assert reconciler.reconcile([(1, "a"), (2, "b2")])
+    assert listbox.rows[1] is row and row.item == "b2"
+    assert listbox.operations == 0
+    assert reconciler.updated == 1
+
+
+def test_duplicate_keys_keep_first():
+    listbox, reconciler = make()
+    reconciler.reconcile([(1, "a"), (2, "b"), (1, "c")])
+    assert [(row.key, row.item) for row in listbox.rows] == [(1, "a"), (2, "b")]
+
+
+def test_filter_hides_rows_without_rebuilding():
+    listbox, reconciler = make()
+    reconciler.reconcile([(1, "terminal"), (2, "editor"), (3, "term")])
+    listbox.operations = 0
+    reconciler.set_filter(lambda key, item: "term" in item)
+    assert listbox.visible() == [1, 3]
+    reconciler.set_filter(None)
+    assert listbox.visible() == [1, 2, 3]
+    assert listbox.operations == 0
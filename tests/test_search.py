@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""groupy_search 测试: n-gram 索引与逐字输入的查询缓存"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groupy_search import QueryCache, TrigramIndex
+
+DOCS = {
+    1: ("Inbox - Mozilla Thunderbird", "Thunderbird"),
+    2: ("groupy — ~/src/groupy", "Terminal"),
+    3: ("微信", "WeChat"),
+    4: ("Release notes.txt", "gedit"),
+}
+
+
+def build():
+    index = TrigramIndex()
+    for key, fields in DOCS.items():
+        index.add(key, *fields)
+    return index
+
+
+def brute(query):
+    query = query.lower()
+    return {key for key, fields in DOCS.items()
+            if any(query in f.lower() for f in fields)}
+
+
+def test_search_matches_plain_substring():
+    index = build()
+    for query in ["", "t", "TH", "thu", "bird", "groupy", "微信", "notes.t", "xyz", "rd - m"]:
+        assert index.search(query) == brute(query), query
+
+
+def test_random_queries_match_substring():
+    index = build()
+    rng = random.Random(1)
+    for _ in range(200):
+        key = rng.choice(list(DOCS))
+        text = rng.choice(DOCS[key]).lower()
+        i = rng.randrange(len(text))
+        query = text[i:i + rng.randint(1, 6)]
+        assert index.search(query) == brute(query), query
+
+
+def test_add_is_incremental_and_remove_cleans_postings():
+    index = build()
+    index.add(2, "vim notes", "Terminal")
+    assert 2 in index.search("vim")
+    assert 2 not in index.search("groupy")
+    index.remove(2)
+    index.remove(4)
+    assert 2 not in index
+    assert "vim" not in index.postings
+    assert all(keys for keys in index.postings.values())
+
+
+def test_retain_drops_other_docs():
+    index = build()
+    index.retain([1, 3])
+    assert set(index.docs) == {1, 3}
+    assert index.search("t") == {1, 3}
+
+
+def make_cache(docs):
+    calls = []
+
+    def check(query, key):
+        return 1 if query in docs[key] else None
+
+    def match(query, candidates):
+        calls.append((query, None if candidates is None else set(candidates)))
+        keys = docs if candidates is None else candidates
+        return {key: 1 for key in keys if check(query, key) is not None}
+
+    return QueryCache(match, check, size=3), calls
+
+
+def test_query_cache_narrows_from_prefix():
+    docs = {1: "terminal", 2: "termite", 3: "editor"}
+    cache, calls = make_cache(docs)
+    assert set(cache.search("te")) == {1, 2}
+    assert set(cache.search("term")) == {1, 2}
+    assert set(cache.search("termi")) == {1, 2}
+    assert calls[1] == ("term", {1, 2})
+    assert calls[2] == ("termi", {1, 2})
+    assert cache.misses == 1 and cache.narrowed == 2
+
+    assert set(cache.search("term")) == {1, 2}  # 退格
+    assert cache.hits == 1
+
+
+def test_query_cache_is_bounded_lru():
+    cache, _ = make_cache({1: "abc"})
+    for query in ["a", "b", "c", "a", "d"]:
+        cache.search(query)
+    assert list(cache.entries) == ["c", "a", "d"]
+
+
+def test_query_cache_update_and_discard():
+    docs = {1: "terminal", 2: "editor"}
+    cache, _ = make_cache(docs)
+    cache.search("term")
+    cache.search("edit")
+    docs[2] = "terminal editor"
+    cache.update(2)
+    assert set(cache.search("term")) == {1, 2}
+    docs[1] = "files"
+    cache.update(1)
+    assert set(cache.search("term")) == {2}
+    cache.discard(2)
+    assert cache.search("edit") == {}
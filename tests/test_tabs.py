@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""groupy_tabs 测试: XID / 页面 / 分组索引"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groupy_tabs import Tab, TabIndex
+
+
+def make_tab(xid=None, group=None):
+    tab = Tab(object(), object(), None, None)
+    tab.xid = xid
+    tab.group = group
+    return tab
+
+
+def test_window_tabs_indexed_by_xid_page_and_group():
+    index = TabIndex()
+    a = make_tab(1, "Firefox")
+    b = make_tab(2, "Firefox")
+    index.add(a)
+    index.add(b)
+    assert index.get(1) is a
+    assert index.by_page(b.container) is b
+    assert index.xids_in("Firefox") == {1, 2}
+
+    assert index.remove(1) is a
+    assert index.by_page(a.container) is None
+    assert index.xids_in("Firefox") == {2}
+    index.remove(2)
+    assert "Firefox" not in index.groups
+
+
+def test_group_page_keeps_empty_group():
+    index = TabIndex()
+    page = make_tab(group="Chat")
+    index.add_group(page)
+    assert index.group_tab("Chat") is page
+    assert index.group_of_page(page.container) == "Chat"
+    assert index.by_page(page.container) is None
+
+    index.add(make_tab(7, "Chat"))
+    index.remove(7)
+    assert index.xids_in("Chat") == set()
+    assert "Chat" in index.groups
+
+    assert index.remove_group("Chat") is page
+    assert index.group_tab("Chat") is None
+    assert index.group_of_page(page.container) is None
+    assert "Chat" not in index.groups
+
+
+def test_remove_group_keeps_member_tabs():
+    index = TabIndex()
+    index.add_group(make_tab(group="Chat"))
+    index.add(make_tab(3, "Chat"))
+    index.remove_group("Chat")
+    assert index.xids_in("Chat") == {3}
+    assert 3 in index
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""groupy_whitelist 测试: 三种条目写法与按 XID 缓存的判定"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groupy_whitelist import WhitelistCache, WhitelistMatcher
+
+
+def test_plain_entries_are_substrings():
+    matcher = WhitelistMatcher(['WeChat', 'a*b'])
+    assert matcher.matches('wechat - 文件传输', '')
+    assert matcher.matches('', 'WECHAT')
+    # 不带前缀的 * 按字面匹配，和以前的配置一致
+    assert matcher.matches('x a*b y', '')
+    assert not matcher.matches('aXb', '')
+
+
+def test_glob_prefix_fullmatch():
+    matcher = WhitelistMatcher(['glob:*chat'])
+    assert matcher.matches('WeChat', '')
+    assert not matcher.matches('WeChat window', '')
+
+
+def test_regex_entries_compiled_separately():
+    matcher = WhitelistMatcher(['re:(?i)foo', 're:bar', 're:(a)\\1'])
+    assert matcher.matches('FOO', '')
+    assert matcher.matches('', 'crowbar')
+    assert matcher.matches('xaay', '')
+    assert not matcher.matches('ab', '')
+
+
+def test_invalid_regex_skipped():
+    matcher = WhitelistMatcher(['re:(', 'term'])
+    assert matcher.matches('Terminal', '')
+    assert not matcher.matches('(', '')
+
+
+def test_verdict_cached_until_name_changes():
+    cache = WhitelistCache(['term'])
+    assert cache.verdict(1, 'Terminal', 'xterm')
+    assert cache.verdict(1, 'Terminal', 'xterm')
+    assert cache.evaluations == 1
+    assert not cache.verdict(1, 'Editor', 'gedit')
+    assert cache.evaluations == 2
+
+
+def test_set_entries_reports_changed_windows():
+    cache = WhitelistCache(['term'])
+    cache.verdict(1, 'Terminal', '')
+    cache.verdict(2, 'Editor', '')
+    assert cache.set_entries(['term', 'edit']) == [(2, True)]
+    assert sorted(cache.set_entries(['edit'])) == [(1, False)]
+    assert cache.verdict(1, 'Terminal', '') is False